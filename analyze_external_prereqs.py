@@ -47,8 +47,17 @@ for ext_code in sorted(external):
             print(f"     内部前置课程 (在本专业中): {', '.join(internal_prereqs) if internal_prereqs else '无'}")
             print(f"     外部前置课程 (不在本专业): {', '.join(external_prereqs)}")
             
-            # 判断是否为"或"的关系（通过检查课程数量）
-            if len(all_prereq_codes) > 1:
+            # 前置课程的 与/或 结构 (& = 且, | = 或)
+            expr = None
+            try:
+                cur.execute('SELECT expression FROM prereq_expressions WHERE course_code = ?', (dep_course,))
+                row = cur.fetchone()
+                expr = row[0] if row else None
+            except sqlite3.OperationalError:
+                pass
+            if expr:
+                print(f"     前置条件表达式 (& = 且, | = 或): {expr}")
+            elif len(all_prereq_codes) > 1:
                 print(f"     ⚠ 注意: 有 {len(all_prereq_codes)} 个前置课程，可能是'或'的关系（二选一/多选一）")
 
 conn.close()
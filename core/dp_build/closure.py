@@ -0,0 +1,122 @@
+"""Materialized prerequisite ancestry.
+
+``prereq_closure(course_code, ancestor_code, depth)`` holds every direct
+or indirect prerequisite of a course with its shortest distance in
+prerequisite links (1 = direct). ``prereq_reduced(course_code,
+prereq_code)`` keeps only the prerequisite edges that are not implied by
+another path (the transitive reduction; edges on a cycle are kept).
+
+Both tables are derived from ``prerequisites``. A full build recomputes
+them; an incremental build recomputes only the changed courses and the
+courses that descend from them.
+"""
+import sqlite3
+from collections import deque
+from typing import Dict, Iterable, List, Set, Tuple
+
+# SQLite's default limit on bound parameters is 999 on older builds
+_CHUNK = 500
+
+
+def load_prereq_map(conn: sqlite3.Connection) -> Dict[str, Set[str]]:
+    """course_code -> set of direct prerequisite codes."""
+    prereqs: Dict[str, Set[str]] = {}
+    for course, prereq in conn.execute("SELECT course_code, prereq_code FROM prerequisites"):
+        prereqs.setdefault(course, set()).add(prereq)
+    return prereqs
+
+
+def ancestors(prereqs: Dict[str, Set[str]], code: str) -> Dict[str, int]:
+    """Breadth-first walk up the prerequisite links: {ancestor: depth}."""
+    depth = {code: 0}
+    queue = deque([code])
+    while queue:
+        node = queue.popleft()
+        for p in prereqs.get(node, ()):
+            if p not in depth:
+                depth[p] = depth[node] + 1
+                queue.append(p)
+    del depth[code]
+    return depth
+
+
+def _rows_for(
+    prereqs: Dict[str, Set[str]],
+    codes: Iterable[str],
+    cache: Dict[str, Dict[str, int]],
+) -> Tuple[List[tuple], List[tuple]]:
+    def anc(code: str) -> Dict[str, int]:
+        if code not in cache:
+            cache[code] = ancestors(prereqs, code)
+        return cache[code]
+
+    closure_rows: List[tuple] = []
+    reduced_rows: List[tuple] = []
+    for code in codes:
+        closure_rows.extend((code, a, d) for a, d in anc(code).items())
+        direct = prereqs.get(code, ())
+        for p in direct:
+            # p -> code is implied when p is an ancestor of another direct
+            # prerequisite q (and not part of a cycle with it)
+            implied = any(q != p and p in anc(q) and q not in anc(p) for q in direct)
+            if not implied:
+                reduced_rows.append((code, p))
+    return closure_rows, reduced_rows
+
+
+def rebuild_closure(conn: sqlite3.Connection) -> int:
+    """Recompute prereq_closure and prereq_reduced from scratch.
+
+    Returns:
+        number of courses whose ancestry was computed
+    """
+    prereqs = load_prereq_map(conn)
+    closure_rows, reduced_rows = _rows_for(prereqs, prereqs.keys(), {})
+    conn.execute("DELETE FROM prereq_closure")
+    conn.execute("DELETE FROM prereq_reduced")
+    conn.executemany("INSERT INTO prereq_closure VALUES (?,?,?)", closure_rows)
+    conn.executemany("INSERT INTO prereq_reduced VALUES (?,?)", reduced_rows)
+    return len(prereqs)
+
+
+def update_closure(conn: sqlite3.Connection, changed: Iterable[str]) -> int:
+    """Refresh the closure after the prerequisites of ``changed`` courses
+    were rewritten (or the courses deleted).
+
+    Only those courses and their descendants are recomputed. A course
+    that does not descend from a changed course keeps its rows, because
+    its ancestry reaches no changed edge. Falls back to a full rebuild
+    when the closure is empty but prerequisites exist (first run on a
+    database built before the closure tables).
+
+    Returns:
+        number of courses whose ancestry was recomputed
+    """
+    changed = sorted(set(changed))
+    has_closure = conn.execute("SELECT 1 FROM prereq_closure LIMIT 1").fetchone() is not None
+    if not has_closure:
+        if conn.execute("SELECT 1 FROM prerequisites LIMIT 1").fetchone() is None:
+            return 0
+        return rebuild_closure(conn)
+    if not changed:
+        return 0
+
+    affected = set(changed)
+    for i in range(0, len(changed), _CHUNK):
+        chunk = changed[i:i + _CHUNK]
+        affected.update(r[0] for r in conn.execute(
+            f"SELECT DISTINCT course_code FROM prereq_closure WHERE ancestor_code IN ({','.join('?' * len(chunk))})",
+            chunk,
+        ))
+
+    prereqs = load_prereq_map(conn)
+    params = [(code,) for code in affected]
+    conn.executemany("DELETE FROM prereq_closure WHERE course_code = ?", params)
+    conn.executemany("DELETE FROM prereq_reduced WHERE course_code = ?", params)
+    closure_rows, reduced_rows = _rows_for(prereqs, sorted(c for c in affected if c in prereqs), {})
+    conn.executemany("INSERT INTO prereq_closure VALUES (?,?,?)", closure_rows)
+    conn.executemany("INSERT INTO prereq_reduced VALUES (?,?)", reduced_rows)
+    return len(affected)
+
+
+__all__ = ["load_prereq_map", "ancestors", "rebuild_closure", "update_closure"]
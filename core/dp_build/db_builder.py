@@ -1,18 +1,18 @@
 """Database builder for course data."""
-import json
 import os
-import re
 import sqlite3
 import sys
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Union
 
-from core.scraper.http import fetch_html
-from core.scraper.cache import maybe_read_cache, write_cache
-from core.dp_build.parsers import parse_major_page
+from core.scraper.ratelimit import configure_rate_limit, current_limit
+from core.scraper.http import configure_session_pool, fetch_html_cached, get_pool_stats
+from core.dp_build.parsers import collect_course_codes, iter_courses, parse_major_page, programme_memberships
+from core.dp_build.db_writer import CourseSink, write_failed_log
 
 
 def build_course_db(
-    major_url: str,
+    major_url: Union[str, List[str]],
     db_path: str,
     *,
     delay: float = 0.2,
@@ -22,12 +22,23 @@ def build_course_db(
     concurrency: int = 4,
     reset: bool = False,
     cache_dir: Optional[str] = None,
-    out_dir: Optional[str] = None
+    out_dir: Optional[str] = None,
+    async_fetch: bool = False,
+    revalidate: bool = False,
+    rate_limit: Optional[float] = None,
+    burst: int = 1,
+    adaptive: bool = False,
+    parse_workers: int = 1,
+    incremental: bool = False
 ) -> dict:
-    """Build SQLite database from a major curriculum page.
+    """Build SQLite database from one or more major curriculum pages.
+    
+    Every major becomes a row in ``programmes`` with its course list in
+    ``programme_courses``. Courses shared by several majors are fetched
+    and stored once.
     
     Args:
-        major_url: URL of the major curriculum page
+        major_url: URL of the major curriculum page, or a list of them
         db_path: path to SQLite database file
         delay: delay between requests
         timeout: request timeout
@@ -37,138 +48,77 @@ def build_course_db(
         reset: drop existing tables before creating
         cache_dir: directory for HTML cache
         out_dir: output directory for failed courses log
+        async_fetch: fetch course pages on an asyncio event loop (AsyncFetcher)
+        revalidate: revalidate cached pages with If-None-Match / If-Modified-Since
+        rate_limit: aggregate requests/sec across all workers (replaces delay)
+        burst: requests allowed back-to-back under rate_limit
+        adaptive: shrink/grow in-flight requests on 429/5xx and latency
+        parse_workers: processes for parsing course pages (1 = in-process, 0 = all cores)
+        incremental: rewrite only courses whose content changed and delete
+            courses/edges no longer listed, instead of upserting everything
+            (requires reset=False)
         
     Returns:
         dict with statistics: courses, prerequisites, exclusions counts
+        (plus added/changed/removed/unchanged when incremental)
     """
-    # Fetch major page HTML
-    html = maybe_read_cache(cache_dir, major_url)
-    if html is None:
-        html = fetch_html(major_url, timeout=timeout, retries=retries, delay=delay)
-        write_cache(cache_dir, major_url, html)
+    if reset and incremental:
+        raise ValueError("reset and incremental cannot be combined: incremental compares against the existing data")
+    configure_session_pool(concurrency)
+    configure_rate_limit(rate_limit, burst, adaptive=adaptive, concurrency=concurrency)
     
-    # Parse major page and fetch course details
-    mp = parse_major_page(
-        major_url,
-        html,
-        include_courses=True,
-        delay=delay,
-        timeout=timeout,
-        retries=retries,
-        verbose=verbose,
-        concurrency=concurrency,
-        cache_dir=cache_dir,
-    )
+    major_urls = [major_url] if isinstance(major_url, str) else list(major_url)
     
-    # Ensure db directory exists
-    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    # Fetch and parse major pages (course lists only)
+    def load_major(u: str):
+        html = fetch_html_cached(u, cache_dir, revalidate=revalidate, timeout=timeout, retries=retries, delay=delay)
+        return parse_major_page(u, html, cache_dir=cache_dir)
     
-    # Create/connect to database
-    conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(major_urls)))) as ex:
+        majors = list(ex.map(load_major, major_urls))
+    codes = sorted({c for mp in majors for c in collect_course_codes(mp.structure_tables)})
+    if verbose and len(majors) > 1:
+        print(f"[programmes] {len(majors)} majors, {len(codes)} unique courses")
     
-    if reset:
-        cur.execute("DROP TABLE IF EXISTS courses")
-        cur.execute("DROP TABLE IF EXISTS prerequisites")
-        cur.execute("DROP TABLE IF EXISTS exclusions")
-        cur.execute("DROP TABLE IF EXISTS special_requirements")
-    
-    # Create tables
-    cur.execute(
-        "CREATE TABLE IF NOT EXISTS courses ("
-        "course_code TEXT PRIMARY KEY, "
-        "course_title TEXT, "
-        "offering_unit TEXT, "
-        "credit_units TEXT, "
-        "duration TEXT, "
-        "semester TEXT, "
-        "aims TEXT, "
-        "assessment_json TEXT, "
-        "pdf_url TEXT, "
-        "url TEXT)"
-    )
-    cur.execute(
-        "CREATE TABLE IF NOT EXISTS prerequisites ("
-        "course_code TEXT, "
-        "prereq_code TEXT, "
-        "PRIMARY KEY(course_code, prereq_code))"
-    )
-    cur.execute(
-        "CREATE TABLE IF NOT EXISTS exclusions ("
-        "course_code TEXT, "
-        "excluded_code TEXT, "
-        "PRIMARY KEY(course_code, excluded_code))"
-    )
-    cur.execute(
-        "CREATE TABLE IF NOT EXISTS special_requirements ("
-        "course_code TEXT PRIMARY KEY, "
-        "requirement_text TEXT)"
-    )
+    # Ensure db directory exists
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
     
-    # Insert course data
-    for c in mp.courses:
-        code = c.get("course_code")
-        if not code:
-            continue
-        
-        cur.execute(
-            "INSERT OR REPLACE INTO courses VALUES (?,?,?,?,?,?,?,?,?,?)",
-            (
-                code,
-                c.get("course_title"),
-                c.get("offering_unit"),
-                c.get("credit_units"),
-                c.get("duration"),
-                c.get("semester"),
-                c.get("aims"),
-                json.dumps(c.get("assessment") or {}, ensure_ascii=False),
-                c.get("pdf_url"),
-                c.get("url"),
+    # Stream courses: fetch -> parse -> bounded queue -> writer thread (batch commits)
+    sink = CourseSink(db_path, reset=reset, incremental=incremental)
+    complete = False
+    try:
+        for mp in majors:
+            sink.put_programme(
+                mp.program_code or mp.url,
+                mp.program_title,
+                mp.url,
+                programme_memberships(mp.structure_tables),
             )
-        )
-        
-        # Extract and insert prerequisites
-        prereq_text = c.get("prerequisites") or ""
-        prereq_codes = set(re.findall(r"[A-Z]{2,}\d{3,4}", prereq_text))
-        
-        # Check if there are no prerequisite codes but there is text content
-        # This indicates special text requirements
-        if not prereq_codes and prereq_text and prereq_text.strip():
-            # Clean up the text (remove extra whitespace)
-            cleaned_text = re.sub(r'\s+', ' ', prereq_text).strip()
-            # Skip if it's just "Nil" or "None" or similar, or contains only HKDSE requirements
-            lower_text = cleaned_text.lower()
-            is_hkdse_only = 'hkdse' in lower_text or 'dse' in lower_text
-            is_nil = lower_text in ['nil', 'none', 'n/a', 'na', '-', '']
-            
-            # Only store if it's not nil and not HKDSE-only requirement
-            if not is_nil and not is_hkdse_only:
-                cur.execute(
-                    "INSERT OR REPLACE INTO special_requirements VALUES (?,?)",
-                    (code, cleaned_text)
-                )
-        
-        # Insert normal prerequisite codes
-        for p in prereq_codes:
-            if p != code:
-                cur.execute("INSERT OR IGNORE INTO prerequisites VALUES (?,?)", (code, p))
-        
-        # Extract and insert exclusions
-        excl_codes = set(re.findall(r"[A-Z]{2,}\d{3,4}", c.get("exclusive_courses") or ""))
-        for e in excl_codes:
-            if e != code:
-                cur.execute("INSERT OR IGNORE INTO exclusions VALUES (?,?)", (code, e))
-        
-        # Log failed courses
-        if c.get("error") and verbose and out_dir:
-            try:
-                os.makedirs(out_dir, exist_ok=True)
-                with open(os.path.join(out_dir, "failed_courses.txt"), "a", encoding="utf-8") as f:
-                    f.write(f"{code}\t{c.get('url')}\t{c.get('error')}\n")
-            except Exception:
-                pass
+        for course in iter_courses(
+            codes,
+            delay=delay,
+            timeout=timeout,
+            retries=retries,
+            verbose=verbose,
+            concurrency=concurrency,
+            cache_dir=cache_dir,
+            async_fetch=async_fetch,
+            revalidate=revalidate,
+            parse_workers=parse_workers,
+        ):
+            sink.put(course)
+        complete = True
+    finally:
+        # Commits whatever was written even when the run is interrupted
+        sink.close(complete=complete)
+    changes = sink.changes
     
-    conn.commit()
+    # Log failed courses
+    if verbose:
+        write_failed_log(out_dir, sink.failed)
+    
+    conn = sqlite3.connect(db_path)
+    cur = conn.cursor()
     
     # Get statistics
     cur.execute("SELECT COUNT(*) FROM courses")
@@ -179,16 +129,33 @@ def build_course_db(
     n_excl = cur.fetchone()[0]
     cur.execute("SELECT COUNT(*) FROM special_requirements")
     n_special = cur.fetchone()[0]
+    cur.execute("SELECT COUNT(*) FROM programmes")
+    n_programmes = cur.fetchone()[0]
+    cur.execute("SELECT COUNT(*) FROM prereq_closure")
+    n_closure = cur.fetchone()[0]
     
     conn.close()
     
     if verbose:
-        print(f"DB saved -> {db_path} courses={n_courses} prereq={n_prereq} excl={n_excl} special={n_special}")
+        http_stats = get_pool_stats()
+        print(f"[http] requests={http_stats['requests']} connections opened={http_stats['connections_opened']} reused={http_stats['connections_reused']} not_modified={http_stats['not_modified']}")
+        if adaptive:
+            print(f"[http] adaptive concurrency settled at {current_limit()}")
+        print(f"[db] {sink.written} courses written in {sink.commits} commits, first commit after {sink.first_row_at:.2f}s")
+        if changes is not None:
+            print(f"[incremental] added={changes['added']} changed={changes['changed']} removed={changes['removed']} unchanged={changes['unchanged']} failed={changes['failed']}")
+        print(f"[closure] ancestry recomputed for {sink.closure_updated} courses, {n_closure} closure rows")
+        print(f"DB saved -> {db_path} programmes={n_programmes} courses={n_courses} prereq={n_prereq} excl={n_excl} special={n_special}")
     
-    return {
+    stats = {
         "courses": n_courses,
         "prerequisites": n_prereq,
         "exclusions": n_excl,
         "special_requirements": n_special,
+        "programmes": n_programmes,
+        "prereq_closure": n_closure,
         "db_path": db_path
     }
+    if changes is not None:
+        stats.update(changes)
+    return stats
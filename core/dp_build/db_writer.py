@@ -0,0 +1,487 @@
+"""Batched SQLite writer for course records.
+
+``CourseWriter.add`` appends rows (full builds); ``CourseWriter.sync``
+brings the tables in line with a new course list, rewriting only courses
+whose fingerprint changed and deleting courses and edges that are gone.
+"""
+import hashlib
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .closure import rebuild_closure, update_closure
+from .migrations import drop_schema, migrate, set_build_state
+from .prereq_expr import dumps, parse_prereq
+from .search_index import rebuild_search_index, update_search_index
+
+COURSE_CODE_RE = re.compile(r"[A-Z]{2,}\d{3,4}")
+_WS_RE = re.compile(r"\s+")
+NIL_TEXTS = {"nil", "none", "n/a", "na", "-", ""}
+# "Semester A 2025/26, Semester B 2025/26", "Semester A or B", "Summer Term 2026"
+SEMESTER_RE = re.compile(r"\b([AB])\b")
+SUMMER_RE = re.compile(r"\bsummer\b", re.IGNORECASE)
+# "3", "3 credit units", "6.0"
+CREDIT_RE = re.compile(r"\d+(?:\.\d+)?")
+
+def semester_codes(semester_text: Optional[str]) -> List[str]:
+    """Normalized semesters a course is offered in ('A', 'B', 'SUMMER')."""
+    text = semester_text or ""
+    codes = set(SEMESTER_RE.findall(text))
+    if SUMMER_RE.search(text):
+        codes.add("SUMMER")
+    return sorted(codes)
+
+
+def credit_value(credit_text: Optional[str]) -> Optional[float]:
+    """Credit units of a course as a number (first number in the text), or None."""
+    m = CREDIT_RE.search(credit_text or "")
+    return float(m.group()) if m else None
+
+
+def create_schema(cur: sqlite3.Cursor, reset: bool = False) -> None:
+    """Create or upgrade the course tables (dropping them first when reset).
+
+    The schema itself lives in migrations.py; this applies the steps the
+    database is missing.
+    """
+    if reset:
+        drop_schema(cur.connection)
+    migrate(cur.connection)
+
+
+def special_requirement(prereq_text: str) -> Optional[str]:
+    """Free-text prerequisite worth keeping when no course codes were found.
+
+    Returns None for empty/"Nil"-like text and HKDSE-only requirements.
+    """
+    cleaned_text = _WS_RE.sub(" ", prereq_text).strip()
+    lower_text = cleaned_text.lower()
+    is_hkdse_only = 'hkdse' in lower_text or 'dse' in lower_text
+    if lower_text in NIL_TEXTS or is_hkdse_only:
+        return None
+    return cleaned_text
+
+
+def course_rows(c: Dict[str, Any]) -> Tuple[tuple, List[tuple], List[tuple], Optional[tuple], Optional[tuple]]:
+    """Split a course dict into its courses / prerequisites / exclusions /
+    special_requirements / prereq_expressions rows."""
+    code = c["course_code"]
+    course = (
+        code,
+        c.get("course_title"),
+        c.get("offering_unit"),
+        c.get("credit_units"),
+        c.get("duration"),
+        c.get("semester"),
+        c.get("aims"),
+        json.dumps(c.get("assessment") or {}, ensure_ascii=False),
+        c.get("pdf_url"),
+        c.get("url"),
+    )
+    prereq_text = c.get("prerequisites") or ""
+    prereq_codes = set(COURSE_CODE_RE.findall(prereq_text))
+    special = None
+    # No prerequisite codes but some text: a special (free-text) requirement
+    if not prereq_codes and prereq_text.strip():
+        text = special_requirement(prereq_text)
+        if text is not None:
+            special = (code, text)
+    prereqs = [(code, p) for p in prereq_codes if p != code]
+    excl_codes = set(COURSE_CODE_RE.findall(c.get("exclusive_courses") or ""))
+    exclusions = [(code, e) for e in excl_codes if e != code]
+    expression = dumps(parse_prereq(prereq_text, code))
+    expr = (code, expression) if expression else None
+    return course, prereqs, exclusions, special, expr
+
+
+def course_fingerprint(rows: Tuple[tuple, List[tuple], List[tuple], Optional[tuple], Optional[tuple]]) -> str:
+    """Content hash of a course's rows (edge order does not matter)."""
+    course, prereqs, exclusions, special, expr = rows
+    parts = [list(course), sorted(prereqs), sorted(exclusions), special]
+    if expr is not None:
+        parts.append(expr[1])
+    payload = json.dumps(parts, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def write_failed_log(out_dir: Optional[str], failed: List[Tuple[str, Any, Any]]) -> None:
+    """Append failed courses to <out_dir>/failed_courses.txt (one open)."""
+    if not failed or not out_dir:
+        return
+    try:
+        os.makedirs(out_dir, exist_ok=True)
+        with open(os.path.join(out_dir, "failed_courses.txt"), "a", encoding="utf-8") as f:
+            f.writelines(f"{code}\t{url}\t{error}\n" for code, url, error in failed)
+    except Exception:
+        pass
+
+
+class CourseWriter:
+    """Buffers course rows and writes them with executemany in one transaction.
+
+    Rows are flushed every ``batch_size`` courses and committed by
+    ``close()``. Build runs switch the database to WAL with
+    synchronous=NORMAL. Failed courses are still written, as before, and
+    are also collected for ``failed_courses.txt``.
+
+    Args:
+        conn: open SQLite connection (schema already created)
+        batch_size: courses buffered before an executemany flush
+    """
+
+    # Child tables keyed by course_code, cleared before a course is rewritten
+    CHILD_TABLES = (
+        "prerequisites", "exclusions", "special_requirements", "prereq_expressions",
+        "course_fingerprints", "course_semesters",
+    )
+
+    def __init__(self, conn: sqlite3.Connection, batch_size: int = 5000) -> None:
+        self.conn = conn
+        self.batch_size = max(1, batch_size)
+        self.failed: List[Tuple[str, Any, Any]] = []
+        self._courses: List[tuple] = []
+        self._prereqs: List[tuple] = []
+        self._exclusions: List[tuple] = []
+        self._special: List[tuple] = []
+        self._fingerprints: List[tuple] = []
+        self._semesters: List[tuple] = []
+        self._expressions: List[tuple] = []
+        self._seen_programmes = None
+        # Courses whose rows changed since begin_sync (None: recompute everything)
+        self._dirty: Optional[Set[str]] = None
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if not conn.in_transaction:
+            conn.execute("BEGIN")
+
+    def add(self, c: Dict[str, Any]) -> None:
+        if not c.get("course_code"):
+            return
+        self._add_rows(c, course_rows(c))
+
+    def _add_rows(self, c: Dict[str, Any], rows) -> None:
+        course, prereqs, exclusions, special, expr = rows
+        self._courses.append(course)
+        self._semesters.extend((course[0], sem) for sem in semester_codes(course[5]))
+        self._prereqs.extend(prereqs)
+        self._exclusions.extend(exclusions)
+        if special is not None:
+            self._special.append(special)
+        if expr is not None:
+            self._expressions.append(expr)
+        if c.get("error"):
+            self.failed.append((c["course_code"], c.get("url"), c.get("error")))
+        else:
+            self._fingerprints.append((c["course_code"], course_fingerprint(rows)))
+        if len(self._courses) >= self.batch_size:
+            self.flush()
+
+    def add_many(self, courses) -> None:
+        for c in courses:
+            self.add(c)
+
+    def flush(self) -> None:
+        cur = self.conn.cursor()
+        if self._courses and self._dirty is None:
+            # A rebuild without reset replaces each course row; clear its old
+            # child rows too (sync_one has already done so for changed courses)
+            params = [(course[0],) for course in self._courses]
+            for table in self.CHILD_TABLES:
+                cur.executemany(f"DELETE FROM {table} WHERE course_code = ?", params)
+        if self._courses:
+            cur.executemany("INSERT OR REPLACE INTO courses VALUES (?,?,?,?,?,?,?,?,?,?)", self._courses)
+        if self._special:
+            cur.executemany("INSERT OR REPLACE INTO special_requirements VALUES (?,?)", self._special)
+        if self._prereqs:
+            cur.executemany("INSERT OR IGNORE INTO prerequisites VALUES (?,?)", self._prereqs)
+        if self._exclusions:
+            cur.executemany("INSERT OR IGNORE INTO exclusions VALUES (?,?)", self._exclusions)
+        if self._fingerprints:
+            cur.executemany("INSERT OR REPLACE INTO course_fingerprints VALUES (?,?)", self._fingerprints)
+        if self._semesters:
+            cur.executemany("INSERT OR IGNORE INTO course_semesters VALUES (?,?)", self._semesters)
+        if self._expressions:
+            cur.executemany("INSERT OR REPLACE INTO prereq_expressions VALUES (?,?)", self._expressions)
+        self._courses, self._prereqs, self._exclusions, self._special = [], [], [], []
+        self._fingerprints, self._semesters, self._expressions = [], [], []
+
+    def write_programme(
+        self,
+        programme_code: str,
+        title: Optional[str],
+        url: Optional[str],
+        memberships: List[Tuple[str, Optional[str], Optional[str]]],
+    ) -> None:
+        """Replace a programme and its course list.
+
+        Args:
+            memberships: (course_code, section, category) triples
+        """
+        self.conn.execute("DELETE FROM programme_courses WHERE programme_code = ?", (programme_code,))
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO programme_courses VALUES (?,?,?,?)",
+            [(programme_code, code, section or "", category) for code, section, category in memberships],
+        )
+        self.conn.execute("INSERT OR REPLACE INTO programmes VALUES (?,?,?)", (programme_code, title, url))
+        if self._seen_programmes is not None:
+            self._seen_programmes.add(programme_code)
+
+    def delete_courses(self, codes: List[str]) -> None:
+        """Remove courses and every row keyed by them."""
+        self.flush()
+        params = [(code,) for code in codes]
+        for table in ("courses", "programme_courses") + self.CHILD_TABLES:
+            self.conn.executemany(f"DELETE FROM {table} WHERE course_code = ?", params)
+
+    def commit(self) -> None:
+        """Flush and commit what has been written so far, then keep going."""
+        self.flush()
+        self.conn.commit()
+        self.conn.execute("BEGIN")
+
+    def begin_sync(self) -> None:
+        """Start an incremental sync (see sync); feed courses to sync_one."""
+        self._existing = {r[0] for r in self.conn.execute("SELECT course_code FROM courses")}
+        self._stored = dict(self.conn.execute("SELECT course_code, fingerprint FROM course_fingerprints"))
+        # Programmes listing each course before the run (rewritten as the run goes)
+        self._listed: Dict[str, Set[str]] = {}
+        for programme, code in self.conn.execute("SELECT programme_code, course_code FROM programme_courses"):
+            self._listed.setdefault(code, set()).add(programme)
+        self._seen = set()
+        self._seen_programmes = set()
+        self._dirty = set()
+        self.changes = {"added": 0, "changed": 0, "removed": 0, "unchanged": 0, "failed": 0}
+
+    def sync_one(self, c: Dict[str, Any]) -> None:
+        code = c.get("course_code")
+        if not code or code in self._seen:
+            return
+        self._seen.add(code)
+        if c.get("error"):
+            self.changes["failed"] += 1
+            self.failed.append((code, c.get("url"), c.get("error")))
+            if code not in self._existing:
+                self._courses.append(course_rows(c)[0])
+                self._dirty.add(code)
+                self.changes["added"] += 1
+            return
+        rows = course_rows(c)
+        if code in self._existing:
+            if self._stored.get(code) == course_fingerprint(rows):
+                self.changes["unchanged"] += 1
+                return
+            # Clear old edges before the new rows go in
+            for table in self.CHILD_TABLES:
+                self.conn.execute(f"DELETE FROM {table} WHERE course_code = ?", (code,))
+            self.changes["changed"] += 1
+        else:
+            self.changes["added"] += 1
+        self._dirty.add(code)
+        self._add_rows(c, rows)
+
+    def finish_sync(self) -> Dict[str, int]:
+        """Delete courses not seen since begin_sync; returns the change counts.
+
+        Only courses this run's programmes listed (or that no programme
+        listed) are deleted: a run over some of the majors in a shared
+        database leaves the other programmes and their courses alone.
+        Programmes are never deleted here; rebuild with reset to drop one.
+        """
+        removed = sorted(
+            code for code in self._existing - self._seen
+            if not self._listed.get(code, set()) - self._seen_programmes
+        )
+        self.delete_courses(removed)
+        self._dirty.update(removed)
+        self.changes["removed"] = len(removed)
+        return self.changes
+
+    def sync(self, courses) -> Dict[str, int]:
+        """Incrementally bring the tables in line with ``courses``.
+
+        A course is rewritten (its edges deleted and reinserted) only when
+        its fingerprint differs from the stored one. Courses no longer in
+        the list are deleted with their edges, unless a programme not
+        written in this sync still lists them (see finish_sync). Failed
+        pages keep their previous rows; they are inserted only when the
+        course is new.
+
+        Returns:
+            dict with added / changed / removed / unchanged / failed counts
+        """
+        self.begin_sync()
+        for c in courses:
+            self.sync_one(c)
+        return self.finish_sync()
+
+    def close(self) -> None:
+        """Flush remaining rows and commit."""
+        self.flush()
+        self.conn.commit()
+
+    def refresh_closure(self) -> int:
+        """Bring prereq_closure / prereq_reduced up to date and commit.
+
+        After a sync only the courses whose edges changed (and their
+        descendants) are recomputed; otherwise everything is.
+
+        Returns:
+            number of courses recomputed
+        """
+        self.flush()
+        if self._dirty is None:
+            n = rebuild_closure(self.conn)
+        else:
+            n = update_closure(self.conn, self._dirty)
+        self.conn.commit()
+        return n
+
+    def refresh_search_index(self) -> int:
+        """Bring the courses_fts full-text index up to date and commit.
+
+        Returns:
+            number of courses (re)indexed
+        """
+        self.flush()
+        if self._dirty is None:
+            n = rebuild_search_index(self.conn)
+        else:
+            n = update_search_index(self.conn, self._dirty)
+        self.conn.commit()
+        return n
+
+    def analyze(self) -> None:
+        """Refresh planner statistics (sqlite_stat1) after a build."""
+        self.conn.execute("ANALYZE")
+        self.conn.commit()
+
+    def write_failed_log(self, out_dir: Optional[str]) -> None:
+        write_failed_log(out_dir, self.failed)
+
+
+class CourseSink:
+    """Dedicated SQLite writer thread fed through a bounded queue.
+
+    The producer calls ``put`` for each course dict as it is parsed; the
+    thread writes them with a CourseWriter and commits every
+    ``commit_every`` courses, so work done before a crash stays in the
+    database. In incremental mode, courses missing from the run are only
+    deleted when ``close(complete=True)`` is called. The run is marked
+    ``building`` in schema_meta until then (see migrations.build_state).
+
+    Args:
+        db_path: SQLite database file
+        reset: drop the tables first
+        incremental: use CourseWriter.sync semantics instead of upserts
+        commit_every: courses per transaction
+        queue_size: bound on courses waiting to be written
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        *,
+        reset: bool = False,
+        incremental: bool = False,
+        commit_every: int = 200,
+        queue_size: int = 256,
+    ) -> None:
+        self.db_path = db_path
+        self.reset = reset
+        self.incremental = incremental
+        self.commit_every = max(1, commit_every)
+        self.written = 0
+        self.commits = 0
+        self.first_row_at: Optional[float] = None
+        self.failed: List[Tuple[str, Any, Any]] = []
+        self.changes: Optional[Dict[str, int]] = None
+        self.closure_updated = 0
+        self.search_indexed = 0
+        self.error: Optional[BaseException] = None
+        self._complete = False
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, queue_size))
+        self._thread = threading.Thread(target=self._run, name="course-db-writer", daemon=True)
+        self._started_at = time.monotonic()
+        self._thread.start()
+
+    def put(self, course: Dict[str, Any]) -> None:
+        if self.error is not None:
+            raise self.error
+        self._queue.put(course)
+
+    def put_programme(self, programme_code: str, title: Optional[str], url: Optional[str], memberships) -> None:
+        """Queue a CourseWriter.write_programme call."""
+        if self.error is not None:
+            raise self.error
+        self._queue.put(("programme", (programme_code, title, url, list(memberships))))
+
+    def close(self, complete: bool = True) -> None:
+        """Wait for the writer to drain the queue and commit.
+
+        Args:
+            complete: the producer saw every course (allows incremental deletes)
+        """
+        self._complete = complete
+        self._queue.put(None)
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def _run(self) -> None:
+        conn = None
+        drained = False
+        try:
+            conn = sqlite3.connect(self.db_path)
+            set_build_state(conn, "building", reset=self.reset)
+            create_schema(conn.cursor())
+            writer = CourseWriter(conn, batch_size=self.commit_every)
+            if self.incremental:
+                writer.begin_sync()
+            while True:
+                c = self._queue.get()
+                if c is None:
+                    drained = True
+                    break
+                if isinstance(c, tuple):
+                    writer.write_programme(*c[1])
+                    continue
+                if self.incremental:
+                    writer.sync_one(c)
+                else:
+                    writer.add(c)
+                self.written += 1
+                if self.written % self.commit_every == 0:
+                    writer.commit()
+                    self.commits += 1
+                    if self.first_row_at is None:
+                        self.first_row_at = time.monotonic() - self._started_at
+            if self.incremental and self._complete:
+                self.changes = writer.finish_sync()
+            writer.close()
+            self.closure_updated = writer.refresh_closure()
+            self.search_indexed = writer.refresh_search_index()
+            writer.analyze()
+            if self._complete:
+                set_build_state(conn, "complete")
+            self.commits += 1
+            if self.first_row_at is None:
+                self.first_row_at = time.monotonic() - self._started_at
+            self.failed = writer.failed
+        except BaseException as e:
+            self.error = e
+            # Keep draining so the producer never blocks on a full queue
+            while not drained:
+                drained = self._queue.get() is None
+        finally:
+            if conn is not None:
+                conn.close()
+
+
+__all__ = ["COURSE_CODE_RE", "semester_codes", "create_schema", "special_requirement", "course_rows", "course_fingerprint", "write_failed_log", "CourseWriter", "CourseSink"]
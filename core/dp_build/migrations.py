@@ -0,0 +1,350 @@
+"""Versioned schema of the course database.
+
+The schema is the list of MIGRATIONS below, applied in order. The
+version reached is kept in ``schema_meta`` (key ``schema_version``). A
+new database runs every step on empty tables. An existing one, including
+databases built before versioning (version 0), runs only the steps it is
+missing. Each step runs in its own transaction together with the version
+bump, so an interrupted upgrade leaves the database at the previous
+version.
+
+``schema_meta`` also records build-db progress (key ``build_state``:
+``building`` until a run has written every course, then ``complete``),
+so readers such as the query service can tell a half-built database
+from a finished one.
+
+To change the schema, append a step; never edit one that has shipped.
+Steps must be idempotent (``IF NOT EXISTS``, guarded backfills) because
+unversioned databases may already contain part of them.
+"""
+import sqlite3
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+
+# Rows copied per INSERT ... SELECT when a table is rebuilt
+COPY_BATCH = 5000
+
+# Reverse access paths: "which courses depend on / exclude / belong to X"
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_prerequisites_prereq ON prerequisites(prereq_code, course_code)",
+    "CREATE INDEX IF NOT EXISTS idx_exclusions_excluded ON exclusions(excluded_code, course_code)",
+    "CREATE INDEX IF NOT EXISTS idx_programme_courses_course ON programme_courses(course_code, programme_code)",
+    "CREATE INDEX IF NOT EXISTS idx_course_semesters_course ON course_semesters(course_code)",
+    "CREATE INDEX IF NOT EXISTS idx_prereq_closure_ancestor ON prereq_closure(ancestor_code, depth, course_code)",
+)
+
+# Every table the schema owns (dropped by build-db --reset)
+SCHEMA_TABLES = (
+    "courses", "prerequisites", "exclusions", "special_requirements", "course_fingerprints",
+    "programmes", "programme_courses", "course_semesters", "prereq_closure", "prereq_reduced",
+    "courses_fts", "prereq_expressions", "schema_meta",
+)
+
+
+def _table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone() is not None
+
+
+def _is_empty(conn: sqlite3.Connection, table: str) -> bool:
+    return conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is None
+
+
+def rebuild_table(
+    conn: sqlite3.Connection,
+    table: str,
+    create_sql: str,
+    columns: Sequence[str],
+    batch_size: int = COPY_BATCH,
+) -> int:
+    """Recreate ``table`` with a new definition, keeping its rows.
+
+    ``create_sql`` is the new CREATE TABLE statement written for
+    ``{table}`` (formatted with the temporary name). Rows are copied with
+    INSERT ... SELECT over rowid ranges of ``batch_size``, then the old
+    table is dropped and the new one renamed. The caller runs this inside
+    a transaction, so readers see either the old or the new table. Its
+    indexes must be recreated afterwards.
+
+    Returns:
+        rows copied
+    """
+    tmp = f"{table}__rebuild"
+    cols = ", ".join(columns)
+    conn.execute(f"DROP TABLE IF EXISTS {tmp}")
+    conn.execute(create_sql.format(table=tmp))
+    lo, hi = conn.execute(f"SELECT min(rowid), max(rowid) FROM {table}").fetchone()
+    copied = 0
+    if lo is not None:
+        for start in range(lo, hi + 1, batch_size):
+            cur = conn.execute(
+                f"INSERT OR IGNORE INTO {tmp} ({cols}) SELECT {cols} FROM {table} "
+                "WHERE rowid >= ? AND rowid < ?",
+                (start, start + batch_size),
+            )
+            copied += cur.rowcount
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {tmp} RENAME TO {table}")
+    return copied
+
+
+def _m1_baseline(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS courses ("
+        "course_code TEXT PRIMARY KEY, "
+        "course_title TEXT, "
+        "offering_unit TEXT, "
+        "credit_units TEXT, "
+        "duration TEXT, "
+        "semester TEXT, "
+        "aims TEXT, "
+        "assessment_json TEXT, "
+        "pdf_url TEXT, "
+        "url TEXT)"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS prerequisites ("
+        "course_code TEXT, "
+        "prereq_code TEXT, "
+        "PRIMARY KEY(course_code, prereq_code))"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS exclusions ("
+        "course_code TEXT, "
+        "excluded_code TEXT, "
+        "PRIMARY KEY(course_code, excluded_code))"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS special_requirements ("
+        "course_code TEXT PRIMARY KEY, "
+        "requirement_text TEXT)"
+    )
+
+
+def _m2_fingerprints(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS course_fingerprints ("
+        "course_code TEXT PRIMARY KEY, "
+        "fingerprint TEXT)"
+    )
+
+
+def _m3_programmes(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS programmes ("
+        "programme_code TEXT PRIMARY KEY, "
+        "title TEXT, "
+        "url TEXT)"
+    )
+    # section = structure table caption ('' when none), category = row remark
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS programme_courses ("
+        "programme_code TEXT, "
+        "course_code TEXT, "
+        "section TEXT NOT NULL DEFAULT '', "
+        "category TEXT, "
+        "PRIMARY KEY(programme_code, course_code, section))"
+    )
+
+
+def _m4_semesters_and_reverse_indexes(conn: sqlite3.Connection) -> None:
+    from .db_writer import semester_codes
+
+    # courses.semester split into one row per offering semester
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS course_semesters ("
+        "course_code TEXT, "
+        "semester TEXT, "
+        "PRIMARY KEY(semester, course_code)) WITHOUT ROWID"
+    )
+    for sql in INDEXES[:4]:
+        conn.execute(sql)
+    if _is_empty(conn, "course_semesters"):
+        rows = [
+            (code, sem)
+            for code, text in conn.execute("SELECT course_code, semester FROM courses").fetchall()
+            for sem in semester_codes(text)
+        ]
+        conn.executemany("INSERT OR IGNORE INTO course_semesters VALUES (?,?)", rows)
+
+
+def _m5_closure(conn: sqlite3.Connection) -> None:
+    from .closure import rebuild_closure
+
+    # Derived from prerequisites by closure.rebuild_closure / update_closure
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS prereq_closure ("
+        "course_code TEXT, "
+        "ancestor_code TEXT, "
+        "depth INTEGER, "
+        "PRIMARY KEY(course_code, ancestor_code)) WITHOUT ROWID"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS prereq_reduced ("
+        "course_code TEXT, "
+        "prereq_code TEXT, "
+        "PRIMARY KEY(course_code, prereq_code)) WITHOUT ROWID"
+    )
+    conn.execute(INDEXES[4])
+    if _is_empty(conn, "prereq_closure"):
+        rebuild_closure(conn)
+
+
+def _m6_search_index(conn: sqlite3.Connection) -> None:
+    from .search_index import FTS_TABLE, create_search_index, rebuild_search_index
+
+    if create_search_index(conn.cursor()) and _is_empty(conn, FTS_TABLE):
+        rebuild_search_index(conn)
+
+
+def _m7_prereq_expressions(conn: sqlite3.Connection) -> None:
+    # AND/OR structure of the prerequisite text (prereq_expr.dumps form).
+    # The text itself is not stored, so existing courses get their
+    # expression on the next build (their fingerprints change).
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS prereq_expressions ("
+        "course_code TEXT PRIMARY KEY, "
+        "expression TEXT)"
+    )
+
+
+def _m8_edges_without_rowid(conn: sqlite3.Connection) -> None:
+    # Edge tables are only ever read by key: store them clustered on the
+    # primary key instead of a rowid table plus a copy in the key index
+    for table, other in (("prerequisites", "prereq_code"), ("exclusions", "excluded_code")):
+        sql = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()[0]
+        if "WITHOUT ROWID" in sql.upper():
+            continue
+        rebuild_table(
+            conn,
+            table,
+            "CREATE TABLE {table} ("
+            "course_code TEXT, "
+            f"{other} TEXT, "
+            f"PRIMARY KEY(course_code, {other})) WITHOUT ROWID",
+            ("course_code", other),
+        )
+    for sql in INDEXES[:2]:
+        conn.execute(sql)
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "course, prerequisite, exclusion and special requirement tables", _m1_baseline),
+    (2, "course_fingerprints for incremental builds", _m2_fingerprints),
+    (3, "programmes and programme_courses", _m3_programmes),
+    (4, "course_semesters and reverse-edge indexes", _m4_semesters_and_reverse_indexes),
+    (5, "prereq_closure and prereq_reduced", _m5_closure),
+    (6, "courses_fts full-text index", _m6_search_index),
+    (7, "prereq_expressions", _m7_prereq_expressions),
+    (8, "prerequisites and exclusions as WITHOUT ROWID tables", _m8_edges_without_rowid),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    """Version recorded in schema_meta (0 for unversioned or empty databases)."""
+    if not _table_exists(conn, "schema_meta"):
+        return 0
+    row = conn.execute("SELECT value FROM schema_meta WHERE key = 'schema_version'").fetchone()
+    return int(row[0]) if row else 0
+
+
+def migrate(conn: sqlite3.Connection, verbose: bool = False) -> List[Tuple[int, str]]:
+    """Apply the missing migrations in order.
+
+    Args:
+        conn: open connection (committed first if a transaction is open)
+        verbose: print each step and its duration
+
+    Returns:
+        (version, description) of the steps applied
+
+    Raises:
+        RuntimeError: the database is newer than this code
+    """
+    if conn.in_transaction:
+        conn.commit()
+    current = schema_version(conn)
+    if current > SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Database schema version {current} is newer than this code supports ({SCHEMA_VERSION})"
+        )
+    conn.execute("CREATE TABLE IF NOT EXISTS schema_meta (key TEXT PRIMARY KEY, value TEXT)")
+    applied: List[Tuple[int, str]] = []
+    for version, description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        t0 = time.monotonic()
+        conn.execute("BEGIN")
+        try:
+            step(conn)
+            conn.executemany(
+                "INSERT OR REPLACE INTO schema_meta VALUES (?, ?)",
+                [("schema_version", str(version)), ("updated_at", time.strftime("%Y-%m-%dT%H:%M:%S"))],
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        applied.append((version, description))
+        if verbose:
+            print(f"[schema] {version}: {description} ({time.monotonic() - t0:.2f}s)")
+    if applied:
+        conn.execute("ANALYZE")
+        conn.commit()
+    return applied
+
+
+def drop_schema(conn: sqlite3.Connection) -> None:
+    """Drop every table of the schema (build-db --reset)."""
+    for table in SCHEMA_TABLES:
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def build_state(conn: sqlite3.Connection) -> Optional[str]:
+    """'building' or 'complete' as recorded by build-db (None if never recorded)."""
+    if not _table_exists(conn, "schema_meta"):
+        return None
+    row = conn.execute("SELECT value FROM schema_meta WHERE key = 'build_state'").fetchone()
+    return row[0] if row else None
+
+
+def set_build_state(conn: sqlite3.Connection, state: str, reset: bool = False) -> None:
+    """Record build-db progress in schema_meta.
+
+    Args:
+        conn: open connection (committed first if a transaction is open)
+        state: 'building' or 'complete'
+        reset: drop the schema in the same transaction, so no reader sees
+            the tables gone without the 'building' mark
+    """
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN")
+    try:
+        if reset:
+            drop_schema(conn)
+        conn.execute("CREATE TABLE IF NOT EXISTS schema_meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.executemany(
+            "INSERT OR REPLACE INTO schema_meta VALUES (?, ?)",
+            [("build_state", state), ("build_updated_at", time.strftime("%Y-%m-%dT%H:%M:%S"))],
+        )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+__all__ = [
+    "INDEXES",
+    "MIGRATIONS",
+    "SCHEMA_VERSION",
+    "SCHEMA_TABLES",
+    "schema_version",
+    "migrate",
+    "rebuild_table",
+    "drop_schema",
+    "build_state",
+    "set_build_state",
+]
@@ -0,0 +1,146 @@
+"""Persistent cache of parse results.
+
+Parsed course dicts and major pages are stored in a small SQLite file
+next to the HTML cache, keyed by sha256(parser version, URL, HTML). The
+parser version is a hash of parsers.py and models.py, so editing either
+file, or any change to a page, misses the cache. No explicit
+invalidation is needed.
+
+The file is ``<cache_dir>/parsed.sqlite`` for directory caches and
+``<name>.parsed.sqlite`` beside a ``<name>.sqlite`` cache.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+# SQLite's default limit on bound parameters is 999 on older builds
+_CHUNK = 500
+
+
+def _parser_version() -> str:
+    h = hashlib.sha256()
+    for name in ("parsers.py", "models.py"):
+        try:
+            with open(os.path.join(_HERE, name), "rb") as f:
+                h.update(f.read())
+        except OSError:
+            h.update(name.encode())
+    return h.hexdigest()[:16]
+
+
+PARSER_VERSION = _parser_version()
+
+
+def parse_key(kind: str, url: str, html: str) -> str:
+    """Cache key for one page: changes with the HTML, the URL or the parser code."""
+    h = hashlib.sha256()
+    for part in (PARSER_VERSION, kind, url):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    h.update(html.encode("utf-8", "surrogatepass"))
+    return h.hexdigest()
+
+
+class ParseCache:
+    """Parse results stored as JSON in one SQLite file.
+
+    Args:
+        path: database file
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS parsed (key TEXT PRIMARY KEY, version TEXT, data TEXT)"
+        )
+        # Results of older parser versions can never be hit again
+        self._conn.execute("DELETE FROM parsed WHERE version != ?", (PARSER_VERSION,))
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Bulk lookup: {key: decoded result} for the keys present."""
+        keys = list(dict.fromkeys(keys))
+        out: Dict[str, Any] = {}
+        with self._lock:
+            for i in range(0, len(keys), _CHUNK):
+                chunk = keys[i:i + _CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT key, data FROM parsed WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for key, data in rows:
+                    out[key] = json.loads(data)
+            self.hits += len(out)
+            self.misses += len(keys) - len(out)
+        return out
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items: Iterable[Tuple[str, Any]]) -> None:
+        rows = [(key, PARSER_VERSION, json.dumps(value, ensure_ascii=False)) for key, value in items]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("INSERT OR REPLACE INTO parsed VALUES (?,?,?)", rows)
+            self._conn.execute("COMMIT")
+
+    def put(self, key: str, value: Any) -> None:
+        self.put_many([(key, value)])
+
+
+_enabled = True
+_caches: Dict[str, ParseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def configure_parse_cache(enabled: bool = True) -> None:
+    """Turn the parse cache on or off for this process."""
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def parse_cache_path(cache_dir: str) -> str:
+    from core.scraper.sqlite_cache import SQLITE_SUFFIXES
+
+    path = os.path.abspath(cache_dir)
+    if path.lower().endswith(SQLITE_SUFFIXES):
+        return os.path.splitext(path)[0] + ".parsed.sqlite"
+    return os.path.join(path, "parsed.sqlite")
+
+
+def open_parse_cache(cache_dir: Optional[str]) -> Optional[ParseCache]:
+    """Shared ParseCache for an HTML cache path, or None when caching is off."""
+    if not cache_dir or not _enabled:
+        return None
+    path = parse_cache_path(cache_dir)
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                cache = ParseCache(path)
+            except (OSError, sqlite3.Error):
+                return None
+            _caches[path] = cache
+        return cache
+
+
+__all__ = [
+    "PARSER_VERSION",
+    "ParseCache",
+    "parse_key",
+    "configure_parse_cache",
+    "parse_cache_path",
+    "open_parse_cache",
+]
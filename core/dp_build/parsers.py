@@ -1,12 +1,21 @@
-import re
+import atexit
 import os
-from typing import Optional, List, Dict, Any, Set
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from bs4 import BeautifulSoup
+import re
+import threading
+from collections import deque
+from dataclasses import asdict
+from typing import Optional, List, Dict, Any, Iterator, Set, Tuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from bs4 import BeautifulSoup, Tag
+import lxml.html
+from lxml import etree
 import requests
 
 from .models import MajorPage, StructureTable
-from core.scraper.http import fetch_html
+from .parse_cache import open_parse_cache, parse_key
+from core.scraper.http import fetch_html_cached
+from core.scraper.async_fetch import fetch_many
+from core.scraper.cache import prefetch_cache
 
 
 def normalize_space(s: str) -> str:
@@ -19,17 +28,36 @@ def text_or_none(el) -> Optional[str]:
     return normalize_space(el.get_text(" "))
 
 
-def parse_course_page(code: str, url: str, html: str) -> Dict[str, Any]:
-    soup = BeautifulSoup(html, "lxml")
-    title_el = soup.select_one("#div_course_code_and_title")
-    full_title = normalize_space(title_el.get_text(" ")) if title_el else code
+COURSE_FIELD_IDS = (
+    "div_course_code_and_title",
+    "div_offering_dept",
+    "div_course_credits",
+    "div_course_duration",
+    "div_course_offering_term",
+    "div_prerequisites",
+    "div_exclusive_courses",
+    "div_course_aims",
+    "div_assessment_coursework_pct",
+    "div_assessment_exam_pct",
+    "div_exam_duration",
+    "div_min_exam_pass_pct",
+    "div_min_cont_pass_pct",
+    "div_assessment_supp",
+)
+
+# Text of these elements is not part of BeautifulSoup's get_text()
+_NON_TEXT_TAGS = {"script", "style"}
+
+
+def _course_record(code: str, url: str, texts: Dict[str, Optional[str]], pdf_url: Optional[str]) -> Dict[str, Any]:
+    """Assemble the course dict from the normalized text of each field element."""
+    full_title = texts.get("div_course_code_and_title")
+    if full_title is None:
+        full_title = code
     course_title = full_title.split(" - ", 1)[1] if " - " in full_title else full_title
-    offering_unit = text_or_none(soup.select_one("#div_offering_dept"))
-    credit_units = text_or_none(soup.select_one("#div_course_credits"))
-    duration = text_or_none(soup.select_one("#div_course_duration"))
     
     # Extract semester from course offering term (e.g., "Semester A 2025/26" -> "A")
-    semester_raw = text_or_none(soup.select_one("#div_course_offering_term"))
+    semester_raw = texts.get("div_course_offering_term")
     semester = None
     if semester_raw:
         # Extract semester letter (A, B, or both)
@@ -40,57 +68,553 @@ def parse_course_page(code: str, url: str, html: str) -> Dict[str, Any]:
         elif 'Semester B' in semester_raw:
             semester = 'B'
     
-    prerequisites_raw = text_or_none(soup.select_one("#div_prerequisites"))
+    prerequisites_raw = texts.get("div_prerequisites")
     prerequisites = prerequisites_raw.replace("\n", " ") if prerequisites_raw else None
-    exclusive_raw = text_or_none(soup.select_one("#div_exclusive_courses"))
+    exclusive_raw = texts.get("div_exclusive_courses")
     exclusive_courses = None
     if exclusive_raw:
         exclusive_courses = ", ".join(sorted(set(re.findall(r"[A-Z]{2,}\d{3,4}", exclusive_raw))))
-    aims = text_or_none(soup.select_one("#div_course_aims"))
     assessment = {
-        "coursework_pct": text_or_none(soup.select_one("#div_assessment_coursework_pct")),
-        "exam_pct": text_or_none(soup.select_one("#div_assessment_exam_pct")),
-        "exam_duration": text_or_none(soup.select_one("#div_exam_duration")),
-        "min_exam_pass_pct": text_or_none(soup.select_one("#div_min_exam_pass_pct")),
-        "min_cont_pass_pct": text_or_none(soup.select_one("#div_min_cont_pass_pct")),
-        "assessment_notes": text_or_none(soup.select_one("#div_assessment_supp")),
+        "coursework_pct": texts.get("div_assessment_coursework_pct"),
+        "exam_pct": texts.get("div_assessment_exam_pct"),
+        "exam_duration": texts.get("div_exam_duration"),
+        "min_exam_pass_pct": texts.get("div_min_exam_pass_pct"),
+        "min_cont_pass_pct": texts.get("div_min_cont_pass_pct"),
+        "assessment_notes": texts.get("div_assessment_supp"),
     }
-    pdf_url_el = soup.select_one("#pdf_url")
-    pdf_relative = pdf_url_el.get_text(strip=True) if pdf_url_el else None
-    pdf_url = None
-    if pdf_relative and pdf_relative.lower().endswith('.pdf'):
-        a_parent = pdf_url_el.find_parent('a')
-        if a_parent and a_parent.get('href'):
-            pdf_url = a_parent.get('href')
     return {
         "course_code": code,
         "url": url,
         "course_title": course_title,
-        "offering_unit": offering_unit,
-        "credit_units": credit_units,
-        "duration": duration,
+        "offering_unit": texts.get("div_offering_dept"),
+        "credit_units": texts.get("div_course_credits"),
+        "duration": texts.get("div_course_duration"),
         "semester": semester,
         "prerequisites": prerequisites,
         "exclusive_courses": exclusive_courses,
-        "aims": aims,
+        "aims": texts.get("div_course_aims"),
         "assessment": assessment,
         "pdf_url": pdf_url,
     }
 
 
-def parse_major_page(
-    url: str,
-    html: str,
+def parse_course_page_bs4(code: str, url: str, html: str) -> Dict[str, Any]:
+    """Reference BeautifulSoup implementation of parse_course_page."""
+    soup = BeautifulSoup(html, "lxml")
+    texts = {fid: text_or_none(soup.select_one(f"#{fid}")) for fid in COURSE_FIELD_IDS}
+    pdf_url_el = soup.select_one("#pdf_url")
+    pdf_relative = pdf_url_el.get_text(strip=True) if pdf_url_el else None
+    pdf_url = None
+    if pdf_relative and pdf_relative.lower().endswith('.pdf'):
+        a_parent = pdf_url_el.find_parent('a')
+        if a_parent and a_parent.get('href'):
+            pdf_url = a_parent.get('href')
+    return _course_record(code, url, texts, pdf_url)
+
+
+def _lxml_strings(el) -> List[str]:
+    """Text nodes under an lxml element in document order, as BeautifulSoup sees them."""
+    out: List[str] = []
+
+    def walk(node) -> None:
+        if node.text and node.tag not in _NON_TEXT_TAGS:
+            out.append(node.text)
+        for child in node:
+            if isinstance(child.tag, str):
+                walk(child)
+            if child.tail:
+                out.append(child.tail)
+
+    walk(el)
+    return out
+
+
+def parse_course_page_lxml(code: str, url: str, html: str) -> Dict[str, Any]:
+    """Fast path: one id-indexed pass over an lxml tree, same output as parse_course_page_bs4."""
+    try:
+        root = lxml.html.fromstring(html)
+    except ValueError:
+        # str input with an XML encoding declaration
+        root = lxml.html.fromstring(html.encode("utf-8"))
+    wanted = set(COURSE_FIELD_IDS)
+    wanted.add("pdf_url")
+    found: Dict[str, Any] = {}
+    for el in root.iter(etree.Element):
+        el_id = el.get("id")
+        if el_id in wanted and el_id not in found:
+            found[el_id] = el
+            if len(found) == len(wanted):
+                break
+    texts = {
+        fid: normalize_space(" ".join(_lxml_strings(found[fid]))) if fid in found else None
+        for fid in COURSE_FIELD_IDS
+    }
+    pdf_url = None
+    pdf_el = found.get("pdf_url")
+    if pdf_el is not None:
+        pdf_relative = "".join(s.strip() for s in _lxml_strings(pdf_el))
+        if pdf_relative and pdf_relative.lower().endswith('.pdf'):
+            a_parent = next(pdf_el.iterancestors("a"), None)
+            if a_parent is not None and a_parent.get('href'):
+                pdf_url = a_parent.get('href')
+    return _course_record(code, url, texts, pdf_url)
+
+
+def parse_course_page(code: str, url: str, html: str) -> Dict[str, Any]:
+    """Parse a course detail page (lxml fast path, BeautifulSoup as fallback)."""
+    try:
+        return parse_course_page_lxml(code, url, html)
+    except Exception:
+        return parse_course_page_bs4(code, url, html)
+
+
+BASE_COURSE_URL = "https://www.cityu.edu.hk/catalogue/ug/current/course/"
+COURSE_CODE_PATTERN = re.compile(r"\b([A-Z]{2,}\d{3,4})\b")
+
+# Below this many pages a process pool costs more than it saves
+MIN_PARALLEL_PARSE = 16
+# Pages parsed together by iter_courses / looked up in the cache at once
+STREAM_CHUNK = 32
+CACHE_LOOKUP_CHUNK = 500
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def course_url(code: str) -> str:
+    return f"{BASE_COURSE_URL}{code}.htm"
+
+
+def collect_course_codes(structure_tables: List[StructureTable]) -> List[str]:
+    """Return the sorted set of course codes mentioned in structure tables."""
+    codes: Set[str] = set()
+    for t in structure_tables:
+        for row in t.rows:
+            for cell in row:
+                for m in COURSE_CODE_PATTERN.finditer(cell):
+                    codes.add(m.group(1))
+    return sorted(codes)
+
+
+def programme_memberships(structure_tables: List[StructureTable]) -> List[Tuple[str, Optional[str], Optional[str]]]:
+    """Sections of the programme structure that list each course.
+
+    Bordered tables are often nested, and an outer table repeats every
+    row of the tables inside it. Courses are therefore taken from the
+    innermost tables. An outer table only counts for courses that no inner
+    table lists. The category is the row's "Remarks" cell when the table
+    has one (e.g. "B3 level / General").
+
+    Returns:
+        Sorted, de-duplicated (course_code, section, category) triples
+    """
+    row_sets = [{tuple(r) for r in t.rows} for t in structure_tables]
+    containers = {
+        i for i, rows in enumerate(row_sets)
+        if any(j != i and other and len(other) < len(rows) and other <= rows for j, other in enumerate(row_sets))
+    }
+
+    def entries(t: StructureTable):
+        remarks_idx = next((i for i, h in enumerate(t.headers) if h.lower().startswith("remark")), None)
+        section = t.caption[:120] if t.caption else None
+        for row in t.rows:
+            category = None
+            if remarks_idx is not None and len(row) == len(t.headers):
+                category = row[remarks_idx] or None
+            for cell in row:
+                for m in COURSE_CODE_PATTERN.finditer(cell):
+                    yield m.group(1), section, category
+
+    found: Dict[Tuple[str, Optional[str]], Optional[str]] = {}
+    for i, t in enumerate(structure_tables):
+        if i not in containers:
+            for code, section, category in entries(t):
+                found[(code, section)] = found.get((code, section)) or category
+    listed = {code for code, _ in found}
+    for i in sorted(containers):
+        for code, section, category in entries(structure_tables[i]):
+            if code not in listed:
+                found[(code, section)] = found.get((code, section)) or category
+    return sorted(((code, sec, cat) for (code, sec), cat in found.items()), key=lambda x: (x[0], x[1] or ""))
+
+
+def _parse_course_safe(code: str, url: str, html: str) -> Dict[str, Any]:
+    try:
+        return parse_course_page(code, url, html)
+    except Exception as e:
+        return {"course_code": code, "url": url, "error": str(e)}
+
+
+def _parse_course_chunk(items: List[Tuple[str, str, str]]) -> List[Dict[str, Any]]:
+    """Process-pool task: parse a chunk of (code, url, html) triples."""
+    return [_parse_course_safe(code, url, html) for code, url, html in items]
+
+
+def resolve_parse_workers(parse_workers: int) -> int:
+    """0 means one parse process per CPU core."""
+    if parse_workers <= 0:
+        return os.cpu_count() or 1
+    return parse_workers
+
+
+def parse_courses(
+    items: List[Tuple[str, str, str]],
+    *,
+    parse_workers: int = 1,
+    chunk_size: Optional[int] = None,
+    verbose: bool = False,
+    cache_dir: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Parse downloaded course pages, optionally across worker processes.
+
+    Parsing is CPU-bound, so with more than one worker the pages are sent
+    in chunks to a ProcessPoolExecutor and plain course dicts come back.
+    Small batches (and any pool failure) are parsed in this process.
+    With a cache_dir, results are memoized in the parse cache and only
+    new or changed pages are parsed.
+
+    Args:
+        items: (code, url, html) triples
+        parse_workers: worker processes (1 = in-process, 0 = one per CPU)
+        chunk_size: pages per task (default: about 4 tasks per worker)
+        cache_dir: HTML cache path the parse cache lives beside
+
+    Returns:
+        Course dicts in the order of items; failed pages carry an "error" key.
+    """
+    pcache = open_parse_cache(cache_dir)
+    if pcache is None:
+        return _parse_courses(items, parse_workers=parse_workers, chunk_size=chunk_size, verbose=verbose)
+    keys = [parse_key("course", url, html) for _, url, html in items]
+    known = pcache.get_many(keys)
+    todo = [i for i, k in enumerate(keys) if k not in known]
+    if verbose and known:
+        print(f"  [courses] {len(items) - len(todo)} parse results reused, {len(todo)} to parse")
+    fresh = _parse_courses([items[i] for i in todo], parse_workers=parse_workers, chunk_size=chunk_size, verbose=verbose)
+    pcache.put_many((keys[i], course) for i, course in zip(todo, fresh) if "error" not in course)
+    known.update((keys[i], course) for i, course in zip(todo, fresh))
+    return [known[k] for k in keys]
+
+
+def _parse_pool(workers: int) -> ProcessPoolExecutor:
+    """Process pool shared by every parse call in this process."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            _pool_workers = workers
+        return _pool
+
+
+def _drop_parse_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(_drop_parse_pool)
+
+
+def _parse_courses(
+    items: List[Tuple[str, str, str]],
+    *,
+    parse_workers: int = 1,
+    chunk_size: Optional[int] = None,
+    verbose: bool = False,
+) -> List[Dict[str, Any]]:
+    workers = resolve_parse_workers(parse_workers)
+    if workers <= 1 or len(items) < MIN_PARALLEL_PARSE:
+        return _parse_course_chunk(items)
+    if chunk_size is None:
+        chunk_size = max(1, -(-len(items) // (workers * 4)))
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    if verbose:
+        print(f"  [courses] parsing {len(items)} pages in {workers} processes ({len(chunks)} chunks)")
+    try:
+        return [course for part in _parse_pool(workers).map(_parse_course_chunk, chunks) for course in part]
+    except Exception as e:
+        _drop_parse_pool()
+        if verbose:
+            print(f"  [courses] process pool unavailable ({e}); parsing in-process")
+        return _parse_course_chunk(items)
+
+
+def _fetch_stream(
+    code_list: List[str],
+    *,
+    delay: float,
+    timeout: float,
+    retries: int,
+    verbose: bool,
+    concurrency: int,
+    cache_dir: Optional[str],
+    async_fetch: bool,
+    revalidate: bool,
+) -> Iterator[Tuple[str, Any]]:
+    """Yield (code, html or exception) as course pages are downloaded.
+
+    The thread path keeps at most 4 x concurrency pages fetched ahead of
+    the consumer, so memory does not grow with the catalogue.
+    """
+    if async_fetch:
+        if verbose:
+            print(f"  [courses] fetching {len(code_list)} courses with up to {concurrency} in flight...")
+        fetched = fetch_many(
+            [course_url(code) for code in code_list],
+            concurrency=max(1, concurrency),
+            timeout=timeout,
+            retries=retries,
+            delay=delay,
+            cache_dir=cache_dir,
+            revalidate=revalidate,
+        )
+        for code in code_list:
+            yield code, fetched.get(course_url(code))
+        return
+
+    # Fetch function (each worker thread reuses its own pooled keep-alive session)
+    def fetch_one(code: str) -> Any:
+        try:
+            return fetch_html_cached(
+                course_url(code), cache_dir, revalidate=revalidate, delay=delay, timeout=timeout, retries=retries
+            )
+        except Exception as e:
+            return e
+
+    if concurrency <= 1:
+        # Serial
+        for idx, code in enumerate(code_list, 1):
+            if verbose:
+                print(f"  [courses] {idx}/{len(code_list)} {code}")
+            yield code, fetch_one(code)
+        return
+
+    # Concurrent, with a bounded window of pages in flight or waiting
+    if verbose:
+        print(f"  [courses] fetching {len(code_list)} courses with {concurrency} workers...")
+    window = max(1, concurrency) * 4
+    todo = iter(code_list)
+    done = 0
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as ex:
+        running = {}
+        for code in todo:
+            running[ex.submit(fetch_one, code)] = code
+            if len(running) >= window:
+                break
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                code = running.pop(fut)
+                done += 1
+                if verbose and (done % 5 == 0 or done == len(code_list)):
+                    print(f"    progress: {done}/{len(code_list)}")
+                yield code, fut.result()
+            for code in todo:
+                running[ex.submit(fetch_one, code)] = code
+                if len(running) >= window:
+                    break
+
+
+def iter_courses(
+    code_list: List[str],
     *,
-    include_courses: bool = False,
-    session: Optional[requests.Session] = None,
     delay: float = 0.0,
     timeout: float = 15.0,
     retries: int = 3,
     verbose: bool = False,
     concurrency: int = 1,
     cache_dir: Optional[str] = None,
-) -> MajorPage:
+    async_fetch: bool = False,
+    revalidate: bool = False,
+    parse_workers: int = 1,
+    chunk_size: int = STREAM_CHUNK,
+) -> Iterator[Dict[str, Any]]:
+    """Yield course dicts as soon as their pages are fetched and parsed.
+
+    Cached pages are looked up chunk by chunk and come first; the rest are
+    downloaded by fetch workers while earlier chunks are parsed. Courses
+    are yielded in completion order, not in the order of code_list.
+
+    Args:
+        code_list: course codes to fetch
+        chunk_size: pages handed to the parse stage at a time
+        (other arguments as for fetch_courses)
+
+    Yields:
+        Course dicts; failed courses carry an "error" key.
+    """
+    chunk_size = max(chunk_size, 8 * resolve_parse_workers(parse_workers))
+    batch: List[Tuple[str, str, str]] = []
+
+    def parse_batch() -> List[Dict[str, Any]]:
+        items = list(batch)
+        batch.clear()
+        return parse_courses(items, parse_workers=parse_workers, cache_dir=cache_dir)
+
+    # Cache lookups in chunks; only misses go to the fetch workers
+    to_fetch: List[str] = []
+    n_cached = 0
+    for i in range(0, len(code_list), CACHE_LOOKUP_CHUNK):
+        part = code_list[i:i + CACHE_LOOKUP_CHUNK]
+        cached = {} if revalidate else prefetch_cache(cache_dir, [course_url(c) for c in part])
+        for code in part:
+            html_c = cached.get(course_url(code))
+            if html_c is None:
+                to_fetch.append(code)
+                continue
+            n_cached += 1
+            batch.append((code, course_url(code), html_c))
+            if len(batch) >= chunk_size:
+                yield from parse_batch()
+    if verbose and n_cached:
+        print(f"  [courses] {n_cached} served from cache")
+
+    if to_fetch:
+        for code, res in _fetch_stream(
+            to_fetch,
+            delay=delay,
+            timeout=timeout,
+            retries=retries,
+            verbose=verbose,
+            concurrency=concurrency,
+            cache_dir=cache_dir,
+            async_fetch=async_fetch,
+            revalidate=revalidate,
+        ):
+            if isinstance(res, str):
+                batch.append((code, course_url(code), res))
+                if len(batch) >= chunk_size:
+                    yield from parse_batch()
+            else:
+                yield {"course_code": code, "url": course_url(code), "error": str(res)}
+    if batch:
+        yield from parse_batch()
+
+
+def fetch_courses(
+    code_list: List[str],
+    *,
+    delay: float = 0.0,
+    timeout: float = 15.0,
+    retries: int = 3,
+    verbose: bool = False,
+    concurrency: int = 1,
+    cache_dir: Optional[str] = None,
+    async_fetch: bool = False,
+    revalidate: bool = False,
+    parse_workers: int = 1,
+) -> List[Dict[str, Any]]:
+    """Fetch (or read from cache) and parse the detail page of each course.
+
+    Fetching (I/O-bound, threads or asyncio) and parsing (CPU-bound, see
+    parse_courses) are separate stages; see iter_courses for the
+    streaming form.
+
+    Args:
+        code_list: course codes to fetch
+        async_fetch: download uncached pages on one event loop (AsyncFetcher)
+            instead of a thread per worker
+        revalidate: send conditional requests for cached pages (304 = hit)
+        parse_workers: processes for the parse stage (1 = in-process, 0 = all cores)
+
+    Returns:
+        List of course dicts in code_list order; failed courses carry an "error" key.
+    """
+    by_code = {
+        c["course_code"]: c
+        for c in iter_courses(
+            code_list,
+            delay=delay,
+            timeout=timeout,
+            retries=retries,
+            verbose=verbose,
+            concurrency=concurrency,
+            cache_dir=cache_dir,
+            async_fetch=async_fetch,
+            revalidate=revalidate,
+            parse_workers=parse_workers,
+        )
+    }
+    return [by_code[c] for c in code_list if c in by_code]
+
+
+# How many preceding tags are searched for a structure table caption
+CAPTION_LOOKBACK = 25
+CAPTION_CLASSES = ("formText", "colorTitle", "formTitle")
+CAPTION_TAGS = ("strong", "p", "div")
+STRUCTURE_TABLE_PATTERN = re.compile(r"Course Code|Credit Units|GE|SDSC", re.I)
+
+
+def _descendant_tags(tag, names=None) -> List[Tag]:
+    """Same result as tag.find_all(names or True) without bs4's filter overhead."""
+    return [d for d in tag.descendants if isinstance(d, Tag) and (names is None or d.name in names)]
+
+
+def extract_structure_tables(soup, content_root) -> List[StructureTable]:
+    """Collect the bordered course tables under content_root with their captions.
+
+    One forward pass over the document keeps the last CAPTION_LOOKBACK tags
+    in a window; a table's caption is the nearest of those (walking
+    backwards, stopping at another table) that is short and looks like a
+    heading. Text of each candidate is computed at most once.
+    """
+    wanted = {id(t) for t in _descendant_tags(content_root, ("table",)) if t.has_attr("border")}
+    if not wanted:
+        return []
+    window: deque = deque(maxlen=CAPTION_LOOKBACK)
+    caption_text: Dict[int, Optional[str]] = {}
+
+    def candidate(tag) -> Optional[str]:
+        key = id(tag)
+        if key not in caption_text:
+            txt = normalize_space(tag.get_text(" "))
+            ok = bool(txt) and len(txt) <= 300 and (
+                tag.name in CAPTION_TAGS or any(c in " ".join(tag.get("class", [])) for c in CAPTION_CLASSES)
+            )
+            caption_text[key] = txt[:120] if ok else None
+        return caption_text[key]
+
+    def infer_caption() -> Optional[str]:
+        for prev in reversed(window):
+            if prev.name == "table":
+                return None
+            txt = candidate(prev)
+            if txt is not None:
+                return txt
+        return None
+
+    structure_tables: List[StructureTable] = []
+    for tag in _descendant_tags(soup):
+        if id(tag) in wanted and STRUCTURE_TABLE_PATTERN.search(tag.get_text(" ")):
+            caption = infer_caption()
+            headers: List[str] = []
+            thead = tag.find("thead")
+            if thead:
+                headers = [normalize_space(th.get_text(" ")) for th in _descendant_tags(thead, ("th", "td"))]
+            else:
+                first_row = tag.find("tr")
+                if first_row:
+                    headers = [normalize_space(c.get_text(" ")) for c in _descendant_tags(first_row, ("th", "td"))]
+            rows: List[List[str]] = []
+            for tr in _descendant_tags(tag, ("tr",)):
+                cells = _descendant_tags(tr, ("td", "th"))
+                if not cells:
+                    continue
+                row = [normalize_space(c.get_text(" ")) for c in cells]
+                if row and row != headers:
+                    rows.append(row)
+            structure_tables.append(StructureTable(caption=caption, headers=headers, rows=rows))
+        window.append(tag)
+    return structure_tables
+
+
+def _parse_major_html(url: str, html: str) -> MajorPage:
+    """Parse a major page without its courses."""
     soup = BeautifulSoup(html, "lxml")
 
     header_title = soup.select_one("#div_prog_title_header")
@@ -111,48 +635,8 @@ def parse_major_page(
     aims = None
     il_outcomes: List[str] = []
 
-    structure_tables: List[StructureTable] = []
     content_root = soup.select_one("#cityu-content") or soup
-    tables = content_root.find_all("table", attrs={"border": True})
-
-    def infer_caption(tbl) -> Optional[str]:
-        for prev in tbl.find_all_previous(limit=25):
-            if prev is tbl:
-                continue
-            if prev.name == "table":
-                return None
-            txt = normalize_space(prev.get_text(" ")) if prev.get_text(strip=True) else ""
-            if not txt:
-                continue
-            if len(txt) > 300:
-                continue
-            classes = " ".join(prev.get("class", []))
-            if any(key in classes for key in ["formText", "colorTitle", "formTitle"]) or prev.name in ["strong", "p", "div"]:
-                return txt[:120]
-        return None
-
-    for tbl in tables:
-        tbl_text = tbl.get_text(" ")
-        if not re.search(r"Course Code|Credit Units|GE|SDSC", tbl_text, re.I):
-            continue
-        caption = infer_caption(tbl)
-        headers: List[str] = []
-        thead = tbl.find("thead")
-        if thead:
-            headers = [normalize_space(th.get_text(" ")) for th in thead.find_all(["th", "td"])]
-        else:
-            first_row = tbl.find("tr")
-            if first_row:
-                headers = [normalize_space(c.get_text(" ")) for c in first_row.find_all(["th", "td"])]
-        rows: List[List[str]] = []
-        for tr in tbl.find_all("tr"):
-            cells = tr.find_all(["td", "th"])
-            if not cells:
-                continue
-            row = [normalize_space(c.get_text(" ")) for c in cells]
-            if row and row != headers:
-                rows.append(row)
-        structure_tables.append(StructureTable(caption=caption, headers=headers, rows=rows))
+    structure_tables = extract_structure_tables(soup, content_root)
 
     remarks = None
     notes_block = soup.find(string=re.compile(r"Notes?:|\*Remark", re.I))
@@ -171,67 +655,6 @@ def parse_major_page(
         if rem_parts:
             remarks = "\n".join(rem_parts)
 
-    courses: List[Dict[str, Any]] = []
-    if include_courses:
-        codes: Set[str] = set()
-        code_pattern = re.compile(r"\b([A-Z]{2,}\d{3,4})\b")
-        for t in structure_tables:
-            for row in t.rows:
-                for cell in row:
-                    for m in code_pattern.finditer(cell):
-                        codes.add(m.group(1))
-        base_course_url = "https://www.cityu.edu.hk/catalogue/ug/current/course/"
-
-        # Fetch function (separate session per thread for safety)
-        def fetch_one(code: str) -> Dict[str, Any]:
-            course_url = f"{base_course_url}{code}.htm"
-            key = course_url.replace("https://", "").replace("http://", "").replace("/", "_")
-            try:
-                # Try cache first when available
-                html_c: Optional[str] = None
-                if cache_dir:
-                    try:
-                        path = os.path.join(cache_dir, key + ".html")
-                        if os.path.isfile(path):
-                            with open(path, "r", encoding="utf-8") as f:
-                                html_c = f.read()
-                    except Exception:
-                        html_c = None
-                if html_c is None:
-                    html_c = fetch_html(course_url, session=None, delay=delay, timeout=timeout, retries=retries)
-                    if cache_dir:
-                        try:
-                            os.makedirs(cache_dir, exist_ok=True)
-                            with open(os.path.join(cache_dir, key + ".html"), "w", encoding="utf-8") as f:
-                                f.write(html_c)
-                        except Exception:
-                            pass
-                info = parse_course_page(code, course_url, html_c)
-                return info
-            except Exception as e:
-                return {"course_code": code, "url": course_url, "error": str(e)}
-
-        code_list = sorted(codes)
-        if concurrency <= 1:
-            # Serial
-            for idx, code in enumerate(code_list, 1):
-                if verbose:
-                    print(f"  [courses] {idx}/{len(code_list)} {code}")
-                courses.append(fetch_one(code))
-        else:
-            # Concurrent
-            if verbose:
-                print(f"  [courses] fetching {len(code_list)} courses with {concurrency} workers...")
-            with ThreadPoolExecutor(max_workers=max(1, concurrency)) as ex:
-                future_map = {ex.submit(fetch_one, code): code for code in code_list}
-                done = 0
-                for fut in as_completed(future_map):
-                    res = fut.result()
-                    courses.append(res)
-                    done += 1
-                    if verbose and (done % 5 == 0 or done == len(code_list)):
-                        print(f"    progress: {done}/{len(code_list)}")
-
     return MajorPage(
         url=url,
         program_title=program_title,
@@ -240,5 +663,48 @@ def parse_major_page(
         il_outcomes=il_outcomes,
         structure_tables=structure_tables,
         remarks=remarks,
-        courses=courses,
+        courses=[],
     )
+
+
+def parse_major_page(
+    url: str,
+    html: str,
+    *,
+    include_courses: bool = False,
+    session: Optional[requests.Session] = None,
+    delay: float = 0.0,
+    timeout: float = 15.0,
+    retries: int = 3,
+    verbose: bool = False,
+    concurrency: int = 1,
+    cache_dir: Optional[str] = None,
+    async_fetch: bool = False,
+    revalidate: bool = False,
+    parse_workers: int = 1,
+) -> MajorPage:
+    pcache = open_parse_cache(cache_dir)
+    key = parse_key("major", url, html) if pcache else None
+    cached = pcache.get(key) if pcache else None
+    if cached is not None:
+        cached["structure_tables"] = [StructureTable(**t) for t in cached["structure_tables"]]
+        page = MajorPage(**cached)
+    else:
+        page = _parse_major_html(url, html)
+        if pcache:
+            pcache.put(key, asdict(page))
+
+    if include_courses:
+        page.courses = fetch_courses(
+            collect_course_codes(page.structure_tables),
+            delay=delay,
+            timeout=timeout,
+            retries=retries,
+            verbose=verbose,
+            concurrency=concurrency,
+            cache_dir=cache_dir,
+            async_fetch=async_fetch,
+            revalidate=revalidate,
+            parse_workers=parse_workers,
+        )
+    return page
@@ -0,0 +1,332 @@
+"""Prerequisite text -> boolean expression over course codes.
+
+Catalogue prerequisites are free text, e.g.::
+
+    CS2311 or CS2315 or CS1315
+    SDSC1001* & 1. CS2311 / CS2315 or 2. CS1315 or 3. CS2360 * Pre-requisite ...
+    Grade B or above in MA1201 ...; or Grade C- or above in MA1301 ; or ... both MA1508 and MA1503
+
+``parse_prereq`` turns such text into an AST: a course code string, or
+``("&", children)`` / ``("|", children)``. Reading rules:
+
+- "and" binds tighter than "or"; "/" and "and/or" mean or
+- ";" and "&" separate whole clauses; "; or" makes the clauses
+  alternatives, otherwise all clauses are required
+- commas take the operator that ends the list ("A, B or C" = any of three),
+  but a comma followed by "and"/"or" after an explicit operator closes the
+  clause like ";" ("either A or B, and C" = (A or B) and C)
+- codes with no operator between them are all required
+- words between codes ("Grade B or above in") are ignored, and so is a
+  footnote starting with " * "
+
+``dumps`` / ``loads`` convert the AST to the compact form stored in
+``prereq_expressions`` ("SDSC1001&(CS1315|CS2311|CS2315|CS2360)").
+``to_dnf`` expands it into alternatives (sets of codes); CourseIndex
+stores those as tuples of course IDs and a course is satisfied when every
+ID of one alternative is done, falling back to ``evaluate`` when the DNF
+is too large. ``compile_masks`` / ``satisfied`` are a bitmask form of the
+same check, used by the benchmark scripts; they are not exported.
+"""
+import re
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple, Union
+
+Expr = Union[str, Tuple[str, Tuple["Expr", ...]]]
+
+AND, OR = "&", "|"
+# Expansions beyond this many alternatives are not worth a DNF
+MAX_DNF_TERMS = 256
+
+_TOKEN_RE = re.compile(
+    r"(?P<code>[A-Z]{2,}\d{3,4})"
+    r"|(?P<or>(?i:\band\s*/\s*or\b|\bor\b)|/)"
+    r"|(?P<and>(?i:\band\b))"
+    r"|(?P<sep>[;&])"
+    r"|(?P<comma>,)"
+    r"|(?P<lp>\()|(?P<rp>\))"
+)
+_FOOTNOTE_RE = re.compile(r"\s\*\s")
+_SERIAL_RE = re.compile(r"[A-Z]{2,}\d{3,4}|[&|()]")
+
+
+def _tokens(text: str) -> List[Tuple[str, str]]:
+    text = _FOOTNOTE_RE.split(text, 1)[0]
+    return [(m.lastgroup, m.group()) for m in _TOKEN_RE.finditer(text)]
+
+
+def _make(op: str, children: Sequence[Expr]) -> Optional[Expr]:
+    """Flatten same-op children, drop duplicates and empty parts."""
+    flat: List[Expr] = []
+    for c in children:
+        if c is None:
+            continue
+        parts = c[1] if isinstance(c, tuple) and c[0] == op else (c,)
+        for p in parts:
+            if p not in flat:
+                flat.append(p)
+    if not flat:
+        return None
+    if len(flat) == 1:
+        return flat[0]
+    return (op, tuple(flat))
+
+
+def _group(items: List[Union[Expr, str]]) -> Optional[Expr]:
+    """Operands and operator runs of one clause -> expression.
+
+    ``items`` alternates freely between operand nodes (wrapped in a list
+    so they are not confused with operator names) and operator tokens.
+    """
+    operands: List[Expr] = []
+    ops: List[str] = []
+    run: List[str] = []
+    for item in items:
+        if isinstance(item, list):
+            if operands:
+                # Last explicit operator wins: "and/or", "MA1201 and ... or MA1301"
+                explicit = [t for t in run if t in ("and", "or")]
+                ops.append(explicit[-1] if explicit else ("comma" if "comma" in run else "and"))
+            operands.append(item[0])
+            run = []
+        else:
+            run.append(item)
+    if not operands:
+        return None
+    # A comma takes the operator that closes its list
+    for i in range(len(ops) - 1, -1, -1):
+        if ops[i] == "comma":
+            ops[i] = ops[i + 1] if i + 1 < len(ops) else "and"
+    # "and" binds tighter than "or"
+    alternatives: List[Expr] = []
+    current: List[Expr] = [operands[0]]
+    for op, operand in zip(ops, operands[1:]):
+        if op == "or":
+            alternatives.append(_make(AND, current))
+            current = [operand]
+        else:
+            current.append(operand)
+    alternatives.append(_make(AND, current))
+    return _make(OR, alternatives)
+
+
+def _parse(tokens: List[Tuple[str, str]], pos: int) -> Tuple[Optional[Expr], int]:
+    """Parse clauses up to the matching ")" (or the end)."""
+    clauses: List[Optional[Expr]] = []
+    joins: List[str] = []
+    items: List[Union[Expr, str]] = []
+    pending_sep: Optional[str] = None
+    while pos < len(tokens):
+        kind, value = tokens[pos]
+        pos += 1
+        if kind == "rp":
+            break
+        if kind == "lp":
+            node, pos = _parse(tokens, pos)
+            if node is not None:
+                items.append([node])
+        elif kind == "code":
+            items.append([value])
+        elif kind == "sep":
+            clauses.append(_group(items))
+            items = []
+            pending_sep = value
+            joins.append(value)
+        elif kind in ("and", "or") and items[-1:] == ["comma"] and ("and" in items or "or" in items):
+            # ", and" / ", or" after "A or B": the clause ends at the comma
+            clauses.append(_group(items))
+            items = []
+            pending_sep = None
+            joins.append(";" if kind == "and" else "; or")
+        else:
+            if pending_sep == ";" and not any(isinstance(i, list) for i in items) and kind == "or":
+                # "; or" - the clauses are alternatives
+                joins[-1] = "; or"
+            items.append(kind)
+    clauses.append(_group(items))
+
+    # "; or" separates alternatives; ";" and "&" join required clauses
+    alternatives: List[Expr] = []
+    current: List[Optional[Expr]] = [clauses[0]]
+    for join, clause in zip(joins, clauses[1:]):
+        if join == "; or":
+            alternatives.append(_make(AND, current))
+            current = [clause]
+        else:
+            current.append(clause)
+    alternatives.append(_make(AND, current))
+    return _make(OR, alternatives), pos
+
+
+def _without(node: Optional[Expr], code: str) -> Optional[Expr]:
+    if node is None or node == code:
+        return None
+    if isinstance(node, str):
+        return node
+    return _make(node[0], [_without(c, code) for c in node[1]])
+
+
+def _sorted(node: Expr) -> Expr:
+    if isinstance(node, str):
+        return node
+    return (node[0], tuple(sorted((_sorted(c) for c in node[1]), key=dumps)))
+
+
+def parse_prereq(text: Optional[str], course_code: Optional[str] = None) -> Optional[Expr]:
+    """Parse prerequisite text into an expression (None when it names no course).
+
+    Args:
+        text: prerequisite text from the course page
+        course_code: the course itself, dropped if the text mentions it
+    """
+    if not text:
+        return None
+    tokens = _tokens(text)
+    pos = 0
+    parts: List[Optional[Expr]] = []
+    # Stray ")" end _parse early; keep going so nothing after them is lost
+    while pos < len(tokens):
+        node, pos = _parse(tokens, pos)
+        parts.append(node)
+    node = _make(AND, parts)
+    if course_code:
+        node = _without(node, course_code)
+    return _sorted(node) if node is not None else None
+
+
+def dumps(node: Optional[Expr]) -> Optional[str]:
+    """Compact form: codes joined by & and |, parentheses only where needed."""
+    if node is None:
+        return None
+    if isinstance(node, str):
+        return node
+    op, children = node
+    parts = []
+    for c in children:
+        s = dumps(c)
+        parts.append(f"({s})" if isinstance(c, tuple) else s)
+    return op.join(parts)
+
+
+def loads(text: Optional[str]) -> Optional[Expr]:
+    """Inverse of dumps."""
+    if not text:
+        return None
+    tokens = _SERIAL_RE.findall(text)
+
+    def expr(pos: int) -> Tuple[Expr, int]:
+        alternatives = []
+        terms = []
+        while pos < len(tokens):
+            t = tokens[pos]
+            if t == ")":
+                pos += 1
+                break
+            if t == "(":
+                node, pos = expr(pos + 1)
+                terms.append(node)
+                continue
+            pos += 1
+            if t == "|":
+                alternatives.append(_make(AND, terms))
+                terms = []
+            elif t != "&":
+                terms.append(t)
+        alternatives.append(_make(AND, terms))
+        return _make(OR, alternatives), pos
+
+    return expr(0)[0]
+
+
+def codes(node: Optional[Expr]) -> List[str]:
+    """Course codes mentioned by an expression."""
+    if node is None:
+        return []
+    if isinstance(node, str):
+        return [node]
+    out: List[str] = []
+    for c in node[1]:
+        out.extend(x for x in codes(c) if x not in out)
+    return out
+
+
+def to_dnf(node: Optional[Expr], limit: int = MAX_DNF_TERMS) -> Optional[List[FrozenSet[str]]]:
+    """Expand into alternatives: satisfied when all codes of any one are done.
+
+    Supersets of another alternative are dropped. No expression gives
+    ``[frozenset()]`` (one empty alternative: nothing required); None
+    means the expansion would exceed ``limit`` alternatives.
+    """
+    if node is None:
+        return [frozenset()]
+    if isinstance(node, str):
+        return [frozenset((node,))]
+    op, children = node
+    parts = [to_dnf(c, limit) for c in children]
+    if any(p is None for p in parts):
+        return None
+    if op == OR:
+        terms = [t for p in parts for t in p]
+    else:
+        terms = [frozenset()]
+        for p in parts:
+            terms = [a | b for a in terms for b in p]
+            if len(terms) > limit * 4:
+                return None
+    # Absorption: A | (A & B) == A
+    terms = sorted(set(terms), key=lambda t: (len(t), sorted(t)))
+    kept: List[FrozenSet[str]] = []
+    for t in terms:
+        if not any(k <= t for k in kept):
+            kept.append(t)
+    return kept if len(kept) <= limit else None
+
+
+def evaluate(node: Optional[Expr], done) -> bool:
+    """Direct evaluation against a set of completed codes."""
+    if node is None:
+        return True
+    if isinstance(node, str):
+        return node in done
+    op, children = node
+    if op == AND:
+        return all(evaluate(c, done) for c in children)
+    return any(evaluate(c, done) for c in children)
+
+
+def compile_masks(node: Optional[Expr], bit_of: Dict[str, int]) -> Optional[List[int]]:
+    """DNF alternatives as integer bitmasks over ``bit_of`` (codes missing
+    from ``bit_of`` are assigned the next free bit).
+
+    Returns:
+        masks, or None when the DNF is too large (use ``evaluate``)
+    """
+    terms = to_dnf(node)
+    if terms is None:
+        return None
+    masks = []
+    for t in terms:
+        m = 0
+        for code in t:
+            if code not in bit_of:
+                bit_of[code] = len(bit_of)
+            m |= 1 << bit_of[code]
+        masks.append(m)
+    return masks
+
+
+def satisfied(masks: List[int], done_mask: int) -> bool:
+    """True when every code of at least one alternative is in ``done_mask``."""
+    for m in masks:
+        if m & done_mask == m:
+            return True
+    return False
+
+
+__all__ = [
+    "Expr",
+    "parse_prereq",
+    "dumps",
+    "loads",
+    "codes",
+    "to_dnf",
+    "evaluate",
+]
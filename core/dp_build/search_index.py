@@ -0,0 +1,73 @@
+"""FTS5 full-text index over course text.
+
+``courses_fts`` holds one row per course: code, title, aims and the
+special requirement text, tokenized with the Porter stemmer. It is
+derived from ``courses`` / ``special_requirements`` at the end of a
+build: full builds refill it, incremental builds replace only the rows of
+courses that changed or were removed.
+
+SQLite builds without FTS5 simply get no index; ``search_courses`` then
+falls back to LIKE matching.
+"""
+import sqlite3
+from typing import Iterable
+
+FTS_TABLE = "courses_fts"
+
+_SELECT_ROWS = (
+    "SELECT c.course_code, c.course_title, c.aims, s.requirement_text "
+    "FROM courses c LEFT JOIN special_requirements s ON s.course_code = c.course_code"
+)
+
+
+def create_search_index(cur: sqlite3.Cursor) -> bool:
+    """Create the FTS table if this SQLite has FTS5; returns whether it exists."""
+    try:
+        cur.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "course_code, course_title, aims, requirement_text, "
+            "tokenize = 'porter unicode61 remove_diacritics 2')"
+        )
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+
+def has_search_index(conn: sqlite3.Connection) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+    ).fetchone() is not None
+
+
+def rebuild_search_index(conn: sqlite3.Connection) -> int:
+    """Refill the index from the course tables; returns rows indexed."""
+    if not has_search_index(conn):
+        return 0
+    conn.execute(f"DELETE FROM {FTS_TABLE}")
+    cur = conn.execute(f"INSERT INTO {FTS_TABLE} {_SELECT_ROWS}")
+    return cur.rowcount
+
+
+def update_search_index(conn: sqlite3.Connection, changed: Iterable[str]) -> int:
+    """Re-index the given courses (dropping those no longer in ``courses``).
+
+    An empty index next to a non-empty courses table (a database built
+    before the index existed) is refilled completely.
+
+    Returns:
+        number of courses re-indexed
+    """
+    if not has_search_index(conn):
+        return 0
+    if conn.execute(f"SELECT 1 FROM {FTS_TABLE} LIMIT 1").fetchone() is None:
+        return rebuild_search_index(conn)
+    changed = sorted(set(changed))
+    for code in changed:
+        # course_code is an indexed column, so this is an index lookup
+        phrase = '"' + code.replace('"', '""') + '"'
+        conn.execute(f"DELETE FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?", ("course_code:" + phrase,))
+        conn.execute(f"INSERT INTO {FTS_TABLE} {_SELECT_ROWS} WHERE c.course_code = ?", (code,))
+    return len(changed)
+
+
+__all__ = ["FTS_TABLE", "create_search_index", "has_search_index", "rebuild_search_index", "update_search_index"]
@@ -4,11 +4,27 @@ Provides interactive Q&A interface for querying available courses
 based on completed prerequisites.
 """
 
-from .course_finder import find_available_courses, get_special_requirements
+from .course_finder import find_available_courses, what_if, get_special_requirements, get_dependents, get_all_prerequisites, get_unlocked_courses, list_programmes, get_programme_courses
+from .course_index import CourseIndex, open_index
+from .cohort import find_available_batch
+from .planner import plan_semesters, unlock_path
+from .search import search_courses
 from .interactive import interactive_course_query
 
 __all__ = [
     'find_available_courses',
+    'what_if',
     'get_special_requirements',
+    'get_dependents',
+    'get_all_prerequisites',
+    'get_unlocked_courses',
+    'list_programmes',
+    'get_programme_courses',
+    'CourseIndex',
+    'open_index',
+    'find_available_batch',
+    'plan_semesters',
+    'unlock_path',
+    'search_courses',
     'interactive_course_query',
 ]
@@ -0,0 +1,211 @@
+"""Eligibility for many students at once.
+
+``find_available_batch`` answers the ``find_available_courses`` question
+for a whole cohort. Students are taken in batches, and each batch becomes
+a NumPy bit matrix: one row per course, one bit per student (packed 64
+students to a uint64 word). Prerequisite structures are lists of rows:
+
+- a DNF alternative of a course ("MA1503 and MA1508") holds for the
+  students whose bit is set in all of its rows (``bitwise_and.reduceat``)
+- a course is available when any alternative holds
+  (``bitwise_or.reduceat`` over its alternatives)
+- a course is a follow-up when any listed prerequisite is done, the
+  course itself is not, and it passes the semester/programme filter
+
+So a batch costs a few word-wise array operations for the whole
+catalogue. Results are then unpacked and yielded one student at a time,
+in input order, in the same shape as ``CourseIndex.find_available``.
+"""
+
+import csv
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+
+from core.dp_build.db_writer import COURSE_CODE_RE
+from core.dp_build.prereq_expr import evaluate
+
+from .course_index import CourseIndex, open_index
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore
+
+# Students per bit matrix; small batches keep the rows in cache
+DEFAULT_BATCH_SIZE = 256
+
+
+def read_students(path: str) -> Iterator[Tuple[str, List[str]]]:
+    """Read a cohort file lazily.
+
+    One student per CSV row: an ID, then the completed course codes in
+    the remaining column(s), separated by spaces, commas or semicolons
+    (``s001,"CS1315 SDSC1001"`` or ``s001,CS1315,SDSC1001``). A first row
+    whose ID column is "student", "student_id" or "id" is a header.
+
+    Yields:
+        (student_id, course codes)
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        for n, row in enumerate(csv.reader(f)):
+            if not row or not row[0].strip() or row[0].startswith("#"):
+                continue
+            if n == 0 and row[0].strip().lower() in ("student", "student_id", "id"):
+                continue
+            yield row[0].strip(), COURSE_CODE_RE.findall(" ".join(row[1:]).upper())
+
+
+def _compile(snap) -> dict:
+    """Row lists for the courses that have prerequisites (cached per snapshot)."""
+    compiled = snap.derived.get("cohort")
+    if compiled is not None:
+        return compiled
+    pre_ptr = np.asarray(snap.pre_ptr, dtype=np.intp)
+    pre_ids = np.asarray(snap.pre_ids, dtype=np.intp)
+    # Courses with prerequisites, in ID (= code) order; their prerequisite
+    # slices are contiguous in pre_ids, so pre_ptr gives reduceat offsets
+    cols = np.flatnonzero(pre_ptr[1:] > pre_ptr[:-1])
+
+    term_lits: List[int] = []
+    term_starts: List[int] = []
+    course_starts: List[int] = []
+    with_terms: List[int] = []
+    slow: List[int] = []
+    for j, i in enumerate(cols):
+        terms = snap.dnf.get(int(i), False)
+        if terms is False:
+            # No stored expression: every listed prerequisite is required
+            terms = [tuple(pre_ids[pre_ptr[i]:pre_ptr[i + 1]])]
+        elif terms is None:
+            slow.append(j)
+            continue
+        with_terms.append(j)
+        course_starts.append(len(term_starts))
+        for t in terms:
+            term_starts.append(len(term_lits))
+            term_lits.extend(t)
+
+    pairs = [(snap.codes[i], snap.titles[i]) for i in cols]
+    compiled = {
+        "cols": cols,
+        "pairs": pairs,
+        # completed_children entries are shared between results: do not modify
+        "entries": [
+            pair + ([snap.codes[p] for p in pre_ids[pre_ptr[i]:pre_ptr[i + 1]]],) for pair, i in zip(pairs, cols)
+        ],
+        "pre_lits": pre_ids,
+        "pre_starts": pre_ptr[cols],
+        "term_lits": np.asarray(term_lits, dtype=np.intp),
+        "term_starts": np.asarray(term_starts, dtype=np.intp),
+        "course_starts": np.asarray(course_starts, dtype=np.intp),
+        "with_terms": np.asarray(with_terms, dtype=np.intp),
+        "slow": slow,
+        "is_course": np.frombuffer(bytes(snap.is_course), dtype=np.uint8).astype(bool),
+        "semesters": np.frombuffer(bytes(snap.semesters), dtype=np.uint8),
+    }
+    snap.derived["cohort"] = compiled
+    return compiled
+
+
+def _scope_mask(snap, compiled: dict, semester_filter: str, programme: str):
+    """Boolean vector over ``cols``: course passes the semester/programme filters."""
+    sem_bit, members = snap.scope(semester_filter, programme)
+    cols = compiled["cols"]
+    mask = compiled["is_course"][cols].copy()
+    if sem_bit:
+        mask &= (compiled["semesters"][cols] & sem_bit) > 0
+    if members is not None:
+        member = np.zeros(len(snap.codes), dtype=bool)
+        member[list(members)] = True
+        mask &= member[cols]
+    return mask
+
+
+def find_available_batch(
+    db: Union[str, CourseIndex],
+    students: Iterable[List[str]],
+    semester_filter: str = None,
+    programme: str = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[Dict[str, list]]:
+    """Available, root and follow-up courses for many students.
+
+    Args:
+        db: Path to SQLite database, or a CourseIndex
+        students: completed course codes per student (consumed lazily)
+        semester_filter: Semester to filter ('A', 'B', or None for all)
+        programme: Programme code to restrict results to
+        batch_size: students evaluated per matrix
+
+    Yields:
+        One dict per student, in input order, identical to
+        ``find_available_courses`` for that student
+
+    Example:
+        >>> for r in find_available_batch('courses.db', [['CS2311'], ['MA1503', 'MA1508']]):
+        ...     print(r['available'])
+        [('CS2334', 'Data Structures for Data Science')]
+        [('MA2510', 'Probability and Statistics')]
+    """
+    if np is None:
+        raise RuntimeError("numpy is required for batch queries. Install: pip install numpy")
+    index = db if isinstance(db, CourseIndex) else open_index(db)
+    students = iter(students)
+    while True:
+        batch = [set(c.strip().upper() for c in s) for s in islice(students, batch_size)]
+        if not batch:
+            return
+        # One snapshot per batch: a reload between batches is picked up
+        snap = index.snapshot()
+        compiled = _compile(snap)
+        scope = _scope_mask(snap, compiled, semester_filter, programme)
+        yield from _evaluate(snap, compiled, scope, batch, semester_filter, programme)
+
+
+def _evaluate(snap, compiled: dict, scope, batch: List[set], semester_filter: str, programme: str) -> Iterator[Dict[str, list]]:
+    cols = compiled["cols"]
+    n_students = len(batch)
+    done_ids = [[snap.id_of[c] for c in completed if c in snap.id_of] for completed in batch]
+
+    # Bit matrix: row = course, bit r of the row = student r has done it
+    padded = -(-n_students // 64) * 64
+    flags = np.zeros((len(snap.codes), padded), dtype=bool)
+    students_col = np.repeat(np.arange(n_students), [len(d) for d in done_ids])
+    flags[np.fromiter((i for d in done_ids for i in d), dtype=np.intp, count=len(students_col)), students_col] = True
+    done = np.packbits(flags, axis=1, bitorder="little").view(np.uint64)
+
+    # AND over the codes of each DNF alternative, OR over a course's alternatives
+    ok = np.zeros((len(cols), done.shape[1]), dtype=np.uint64)
+    if len(compiled["term_lits"]):
+        held = np.bitwise_and.reduceat(done[compiled["term_lits"]], compiled["term_starts"], axis=0)
+        ok[compiled["with_terms"]] = np.bitwise_or.reduceat(held, compiled["course_starts"], axis=0)
+    for j in compiled["slow"]:
+        expr = snap.expressions[int(cols[j])]
+        bits = np.array([evaluate(expr, completed) for completed in batch] + [False] * (padded - n_students))
+        ok[j] = np.packbits(bits, bitorder="little").view(np.uint64)
+
+    # Follow-ups: any listed prerequisite done, course itself not done, in scope
+    if len(cols):
+        follow = np.bitwise_or.reduceat(done[compiled["pre_lits"]], compiled["pre_starts"], axis=0)
+    else:
+        follow = np.zeros((0, done.shape[1]), dtype=np.uint64)
+    follow &= ~done[cols]
+    follow[~scope] = 0
+    ok &= follow
+
+    def unpack(bits):
+        # (courses x words) -> (students x courses) booleans
+        return np.unpackbits(bits.view(np.uint8), axis=1, bitorder="little", count=n_students).T.astype(bool)
+
+    follow_rows, ok_rows = unpack(follow), unpack(ok)
+    entries = compiled["entries"]
+    pairs = compiled["pairs"]
+    for r in range(n_students):
+        yield {
+            'available': [pairs[j] for j in np.flatnonzero(ok_rows[r])],
+            'no_prereq': snap.roots_excluding(set(done_ids[r]), semester_filter, programme),
+            'completed_children': [entries[j] for j in np.flatnonzero(follow_rows[r])],
+        }
+
+
+__all__ = ["find_available_batch", "read_students", "DEFAULT_BATCH_SIZE"]
@@ -9,18 +9,34 @@ This module provides functions to query the course database and find:
 import sqlite3
 from typing import List, Dict, Tuple
 
+from .course_index import open_index
 
-def find_available_courses(db_path: str, completed_courses: List[str], semester_filter: str = None) -> Dict[str, list]:
+
+def _connect(db) -> Tuple[sqlite3.Connection, bool]:
+    """(connection, opened here) for a DB path or an already open connection."""
+    if isinstance(db, sqlite3.Connection):
+        return db, False
+    return sqlite3.connect(db), True
+
+
+def _has_table(cursor: sqlite3.Cursor, name: str) -> bool:
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,))
+    return cursor.fetchone() is not None
+
+
+def find_available_courses(db_path: str, completed_courses: List[str], semester_filter: str = None, programme: str = None) -> Dict[str, list]:
     """Find courses that can be taken based on completed courses.
     
     Args:
         db_path: Path to SQLite database
         completed_courses: List of completed course codes
         semester_filter: Semester to filter ('A', 'B', or None for all)
+        programme: Programme code to restrict results to (None for all courses)
         
     Returns:
         Dictionary with:
-        - 'available': courses with all prerequisites met
+        - 'available': courses whose prerequisites are met (AND/OR
+          expression when the DB has one, otherwise all listed prerequisites)
         - 'no_prereq': courses with no prerequisites (root courses)
         - 'completed_children': direct children of completed courses
         
@@ -28,79 +44,50 @@ def find_available_courses(db_path: str, completed_courses: List[str], semester_
         >>> results = find_available_courses('courses.db', ['CS1315', 'SDSC1001'], 'A')
         >>> print(results['available'])
         [('SDSC2003', 'Human Contexts and Ethics in Data Science')]
-    """
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
     
-    # Normalize completed courses to uppercase
-    completed = set(c.strip().upper() for c in completed_courses)
-    
-    # Get all courses, optionally filtered by semester
-    if semester_filter and semester_filter.upper() in ['A', 'B']:
-        cursor.execute("SELECT course_code, course_title, semester FROM courses WHERE semester LIKE ?", 
-                      (f'%{semester_filter.upper()}%',))
-    else:
-        cursor.execute("SELECT course_code, course_title, semester FROM courses")
-    
-    all_courses = {row[0]: row[1] for row in cursor.fetchall()}
-    
-    # Get all prerequisite relationships
-    cursor.execute("SELECT course_code, prereq_code FROM prerequisites")
-    prereqs = {}
-    for course, prereq in cursor.fetchall():
-        if course not in prereqs:
-            prereqs[course] = []
-        prereqs[course].append(prereq)
-    
-    # Find root courses (no prerequisites)
-    no_prereq = []
-    for course in all_courses:
-        if course not in prereqs and course not in completed:
-            no_prereq.append((course, all_courses[course]))
-    
-    # Find available courses (all prerequisites met)
-    available = []
-    for course in all_courses:
-        if course in completed:
-            continue
-        if course in prereqs:
-            # Check if all prerequisites are in completed
-            if all(p in completed for p in prereqs[course]):
-                available.append((course, all_courses[course]))
-        else:
-            # No prerequisites, already in no_prereq
-            pass
-    
-    # Find children of completed courses (courses that have completed courses as prerequisites)
-    completed_children = []
-    for course in all_courses:
-        if course in completed:
-            continue
-        if course in prereqs:
-            # Check if any prerequisite is in completed (direct children)
-            if any(p in completed for p in prereqs[course]):
-                completed_children.append((course, all_courses[course], prereqs[course]))
+    The database is read once into a shared CourseIndex and re-read only
+    when the file changes.
+    """
+    return open_index(db_path).find_available(completed_courses, semester_filter, programme)
+
+
+def what_if(db_path: str, completed_courses: List[str], added_courses: List[str], semester_filter: str = None, programme: str = None) -> Dict[str, list]:
+    """Courses that taking ``added_courses`` would unlock.
     
-    conn.close()
+    Args:
+        db_path: Path to SQLite database
+        completed_courses: List of completed course codes
+        added_courses: Course codes the student is considering
+        semester_filter: Semester to filter ('A', 'B', or None for all)
+        programme: Programme code to restrict results to (None for all courses)
+        
+    Returns:
+        Dictionary with:
+        - 'unlocked': courses available with the added courses but not without
+        - 'still_blocked': other direct dependents of the added courses, with
+          the prerequisite codes they still miss
+        
+    Example:
+        >>> what_if('courses.db', ['CS1315'], ['SDSC1001'])['unlocked']
+        [('SDSC2001', 'Python for Data Science')]
     
-    return {
-        'available': sorted(available),
-        'no_prereq': sorted(no_prereq),
-        'completed_children': sorted(completed_children, key=lambda x: x[0])
-    }
+    Answered from the shared CourseIndex by visiting only the dependents
+    of the added courses.
+    """
+    return open_index(db_path).what_if(completed_courses, added_courses, semester_filter, programme)
 
 
 def get_course_info(db_path: str, course_code: str) -> Dict[str, any]:
     """Get detailed information about a specific course.
     
     Args:
-        db_path: Path to SQLite database
+        db_path: Path to SQLite database (or an open connection, left open)
         course_code: Course code to query
         
     Returns:
         Dictionary with course information or None if not found
     """
-    conn = sqlite3.connect(db_path)
+    conn, owned = _connect(db_path)
     cursor = conn.cursor()
     
     course_code = course_code.strip().upper()
@@ -112,7 +99,8 @@ def get_course_info(db_path: str, course_code: str) -> Dict[str, any]:
     row = cursor.fetchone()
     
     if not row:
-        conn.close()
+        if owned:
+            conn.close()
         return None
     
     # Get prerequisites
@@ -123,7 +111,15 @@ def get_course_info(db_path: str, course_code: str) -> Dict[str, any]:
     cursor.execute("SELECT excluded_code FROM exclusions WHERE course_code = ?", (course_code,))
     exclusions = [r[0] for r in cursor.fetchall()]
     
-    conn.close()
+    # AND/OR structure, e.g. "SDSC1001&(CS1315|CS2311)"
+    expression = None
+    if _has_table(cursor, "prereq_expressions"):
+        cursor.execute("SELECT expression FROM prereq_expressions WHERE course_code = ?", (course_code,))
+        r = cursor.fetchone()
+        expression = r[0] if r else None
+    
+    if owned:
+        conn.close()
     
     return {
         'code': row[0],
@@ -131,10 +127,86 @@ def get_course_info(db_path: str, course_code: str) -> Dict[str, any]:
         'unit': row[2],
         'credits': row[3],
         'prerequisites': prereqs,
+        'prerequisite_expression': expression,
         'exclusions': exclusions,
     }
 
 
+def get_dependents(db_path: str, course_code: str) -> List[Tuple[str, str]]:
+    """Courses that list ``course_code`` as a direct prerequisite.
+    
+    Args:
+        db_path: Path to SQLite database
+        course_code: Prerequisite course code
+        
+    Returns:
+        Sorted list of (course_code, course_title) tuples; the title is
+        None for dependents outside the database
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT p.course_code, c.course_title FROM prerequisites p "
+        "LEFT JOIN courses c ON c.course_code = p.course_code "
+        "WHERE p.prereq_code = ? ORDER BY p.course_code",
+        (course_code.strip().upper(),)
+    )
+    rows = cursor.fetchall()
+    conn.close()
+    return rows
+
+
+def get_all_prerequisites(db_path: str, course_code: str, max_depth: int = None) -> List[Tuple[str, int]]:
+    """Every direct or indirect prerequisite of a course.
+    
+    Args:
+        db_path: Path to SQLite database (or an open connection)
+        course_code: Course code to query
+        max_depth: Only ancestors at most this many prerequisite links away
+            (1 = direct prerequisites; None for all)
+        
+    Returns:
+        List of (prereq_code, depth) tuples, nearest first
+    """
+    return _closure_query(
+        db_path,
+        "SELECT ancestor_code, depth FROM prereq_closure WHERE course_code = ?",
+        course_code,
+        max_depth,
+    )
+
+
+def get_unlocked_courses(db_path: str, course_code: str, max_depth: int = None) -> List[Tuple[str, int]]:
+    """Every course that needs ``course_code`` directly or indirectly.
+    
+    Args:
+        db_path: Path to SQLite database (or an open connection)
+        course_code: Prerequisite course code
+        max_depth: Only courses at most this many prerequisite links away
+        
+    Returns:
+        List of (course_code, depth) tuples, nearest first
+    """
+    return _closure_query(
+        db_path,
+        "SELECT course_code, depth FROM prereq_closure WHERE ancestor_code = ?",
+        course_code,
+        max_depth,
+    )
+
+
+def _closure_query(db_path: str, sql: str, course_code: str, max_depth: int = None) -> List[Tuple[str, int]]:
+    params = [course_code.strip().upper()]
+    if max_depth is not None:
+        sql += " AND depth <= ?"
+        params.append(max_depth)
+    conn, owned = _connect(db_path)
+    rows = conn.execute(sql + " ORDER BY depth, 1", params).fetchall()
+    if owned:
+        conn.close()
+    return rows
+
+
 def get_special_requirements(db_path: str) -> Dict[str, str]:
     """Get all courses with special (text-based) requirements.
     
@@ -158,3 +230,50 @@ def get_special_requirements(db_path: str) -> Dict[str, str]:
     conn.close()
     
     return requirements
+
+
+def list_programmes(db_path: str) -> List[Tuple[str, str, int]]:
+    """List the programmes stored in the database.
+    
+    Args:
+        db_path: Path to SQLite database
+        
+    Returns:
+        List of (programme_code, title, course_count) tuples; empty for
+        databases built before programmes were recorded
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT p.programme_code, p.title, COUNT(DISTINCT pc.course_code) "
+            "FROM programmes p LEFT JOIN programme_courses pc ON pc.programme_code = p.programme_code "
+            "GROUP BY p.programme_code ORDER BY p.programme_code"
+        ).fetchall()
+    except sqlite3.OperationalError:
+        rows = []
+    finally:
+        conn.close()
+    return rows
+
+
+def get_programme_courses(db_path: str, programme: str) -> List[Tuple[str, str, str, str]]:
+    """Courses listed by a programme with their structure section.
+    
+    Args:
+        db_path: Path to SQLite database
+        programme: Programme code
+        
+    Returns:
+        List of (course_code, course_title, section, category) tuples
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT pc.course_code, c.course_title, pc.section, pc.category "
+        "FROM programme_courses pc LEFT JOIN courses c ON c.course_code = pc.course_code "
+        "WHERE pc.programme_code = ? ORDER BY pc.section, pc.course_code",
+        (programme,)
+    )
+    rows = cursor.fetchall()
+    conn.close()
+    return rows
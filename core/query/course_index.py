@@ -0,0 +1,412 @@
+"""In-memory prerequisite graph for repeated queries.
+
+``find_available_courses`` used to read the whole ``courses`` and
+``prerequisites`` tables on every call. ``CourseIndex`` reads them once
+into integer-ID arrays:
+
+- course codes are numbered in sorted order, so walking IDs in order
+  gives results already sorted by code
+- prerequisites and dependents are CSR adjacency lists (``array`` of
+  offsets + ``array`` of IDs): the prerequisites of course ``i`` are
+  ``pre_ids[pre_ptr[i]:pre_ptr[i + 1]]``
+- offering semesters are a bitmask per course (A=1, B=2, SUMMER=4)
+- AND/OR expressions are kept as DNF alternatives (tuples of IDs)
+- credit units are parsed to numbers; exclusions are kept both ways
+
+A query then only touches the dependents of the completed courses plus
+the root list. The index checks the database file (and its WAL) before
+each query and reloads itself when either has been modified, so a
+long-running session picks up a new build without restarting.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from core.dp_build.db_writer import credit_value, semester_codes
+from core.dp_build.prereq_expr import Expr, evaluate, loads, to_dnf
+
+SEMESTER_BITS = {"A": 1, "B": 2, "SUMMER": 4}
+
+
+def _has_table(conn: sqlite3.Connection, name: str) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone() is not None
+
+
+def _csr(n: int, edges: List[Tuple[int, int]]) -> Tuple[array, array]:
+    """Group (source, target) pairs by source into offset/target arrays."""
+    ptr = array("l", [0]) * (n + 1)
+    for src, _ in edges:
+        ptr[src + 1] += 1
+    for i in range(n):
+        ptr[i + 1] += ptr[i]
+    ids = array("l", [0]) * len(edges)
+    fill = array("l", ptr[:n])
+    for src, dst in sorted(edges):
+        ids[fill[src]] = dst
+        fill[src] += 1
+    return ptr, ids
+
+
+class _Snapshot:
+    """One load of the database; replaced as a whole on reload."""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        course_rows = conn.execute("SELECT course_code, course_title, semester, credit_units FROM courses").fetchall()
+        edges = conn.execute("SELECT course_code, prereq_code FROM prerequisites").fetchall()
+
+        # Prerequisites outside the DB get IDs too, so edges stay integer-only
+        self.codes: List[str] = sorted({r[0] for r in course_rows} | {c for e in edges for c in e})
+        self.id_of: Dict[str, int] = {code: i for i, code in enumerate(self.codes)}
+        n = len(self.codes)
+        self.is_course = bytearray(n)
+        self.titles: List[Optional[str]] = [None] * n
+        self.credits: List[Optional[float]] = [None] * n
+        for code, title, _, credits in course_rows:
+            i = self.id_of[code]
+            self.is_course[i] = 1
+            self.titles[i] = title
+            self.credits[i] = credit_value(credits)
+
+        pairs = [(self.id_of[c], self.id_of[p]) for c, p in edges]
+        self.pre_ptr, self.pre_ids = _csr(n, pairs)
+        self.dep_ptr, self.dep_ids = _csr(n, [(p, c) for c, p in pairs])
+
+        self.semesters = bytearray(n)
+        if _has_table(conn, "course_semesters"):
+            sem_rows = conn.execute("SELECT course_code, semester FROM course_semesters").fetchall()
+        else:
+            # Databases built before course_semesters existed
+            sem_rows = [(code, s) for code, _, text, _ in course_rows for s in semester_codes(text)]
+        for code, sem in sem_rows:
+            if code in self.id_of:
+                self.semesters[self.id_of[code]] |= SEMESTER_BITS.get(sem, 0)
+
+        self.programmes: Dict[str, FrozenSet[int]] = {}
+        if _has_table(conn, "programme_courses"):
+            members: Dict[str, Set[int]] = {}
+            for prog, code in conn.execute("SELECT programme_code, course_code FROM programme_courses"):
+                if code in self.id_of:
+                    members.setdefault(prog, set()).add(self.id_of[code])
+            self.programmes = {prog: frozenset(ids) for prog, ids in members.items()}
+
+        # DNF alternatives per course; a course is missing here when it has no
+        # expression (all listed prerequisites required) and maps to None
+        # when the expansion is too large (evaluated directly)
+        self.dnf: Dict[int, Optional[List[Tuple[int, ...]]]] = {}
+        self.expressions: Dict[int, Expr] = {}
+        if _has_table(conn, "prereq_expressions"):
+            for code, text in conn.execute("SELECT course_code, expression FROM prereq_expressions"):
+                expr = loads(text)
+                if code not in self.id_of or expr is None:
+                    continue
+                i = self.id_of[code]
+                terms = to_dnf(expr)
+                if terms is not None and all(c in self.id_of for t in terms for c in t):
+                    self.dnf[i] = [tuple(self.id_of[c] for c in t) for t in terms]
+                else:
+                    self.dnf[i] = None
+                    self.expressions[i] = expr
+
+        # Course ID -> codes it excludes or is excluded by (either direction
+        # rules out taking both); excluded codes need not be in the DB
+        excluded: Dict[int, Set[str]] = {}
+        for code, other in conn.execute("SELECT course_code, excluded_code FROM exclusions"):
+            for a, b in ((code, other), (other, code)):
+                if a in self.id_of:
+                    excluded.setdefault(self.id_of[a], set()).add(b)
+        self.exclusions: Dict[int, FrozenSet[str]] = {i: frozenset(codes) for i, codes in excluded.items()}
+
+        self.roots = array("l", (i for i in range(n) if self.is_course[i] and self.pre_ptr[i] == self.pre_ptr[i + 1]))
+        self.scoped_roots: Dict[tuple, Tuple[Dict[int, int], List[Tuple[str, str]]]] = {}
+
+        self.special: Dict[str, str] = dict(
+            conn.execute("SELECT course_code, requirement_text FROM special_requirements").fetchall()
+        )
+        # Structures other query modules derive from this snapshot
+        self.derived: Dict[str, object] = {}
+
+    def scope(self, semester_filter: str = None, programme: str = None) -> Tuple[int, Optional[FrozenSet[int]]]:
+        """Query filters as (semester bit, programme member IDs); 0 / None = no filter."""
+        sem_bit = 0
+        if semester_filter and semester_filter.upper() in ("A", "B"):
+            sem_bit = SEMESTER_BITS[semester_filter.upper()]
+        members = self.programmes.get(programme, frozenset()) if programme else None
+        return sem_bit, members
+
+    def satisfied(self, i: int, done: Set[int], completed: Set[str]) -> bool:
+        """Whether the prerequisites of course ``i`` are met.
+
+        ``done`` holds the IDs of ``completed`` (codes, for expressions
+        too large for DNF).
+        """
+        if i not in self.dnf:
+            return all(p in done for p in self.pre_ids[self.pre_ptr[i]:self.pre_ptr[i + 1]])
+        if self.dnf[i] is None:
+            return evaluate(self.expressions[i], completed)
+        return any(all(p in done for p in term) for term in self.dnf[i])
+
+    def missing(self, i: int, done: Set[int]) -> List[str]:
+        """Fewest prerequisite codes of course ``i`` still to take (one alternative).
+
+        Between alternatives missing as many, the one already partly done wins.
+        """
+        listed = self.pre_ids[self.pre_ptr[i]:self.pre_ptr[i + 1]]
+        terms = self.dnf.get(i) or [listed]
+        best = min(terms, key=lambda term: (sum(p not in done for p in term), -len(term)))
+        return [self.codes[p] for p in best if p not in done]
+
+    def roots_excluding(self, done: Set[int], semester_filter: str = None, programme: str = None) -> List[Tuple[str, str]]:
+        """Sorted (code, title) of in-scope courses without prerequisites, minus ``done``.
+
+        The list per filter is built once per snapshot; completed courses
+        are cut out of a copy.
+        """
+        sem_bit, members = self.scope(semester_filter, programme)
+        key = (sem_bit, programme or None)
+        scoped = self.scoped_roots.get(key)
+        if scoped is None:
+            ids = [
+                i for i in self.roots
+                if (not sem_bit or self.semesters[i] & sem_bit) and (members is None or i in members)
+            ]
+            scoped = self.scoped_roots[key] = (
+                {i: n for n, i in enumerate(ids)},
+                [(self.codes[i], self.titles[i]) for i in ids],
+            )
+        pos, pairs = scoped
+        out = pairs[:]
+        for n in sorted((pos[d] for d in done if d in pos), reverse=True):
+            del out[n]
+        return out
+
+
+class CourseIndex:
+    """Prerequisite graph of a course database, held in memory.
+
+    Args:
+        db_path: Path to SQLite database
+        check_interval: seconds between checks of the file's mtime
+            (0 = before every query)
+
+    Example:
+        >>> index = CourseIndex('courses.db')
+        >>> index.find_available(['CS1315', 'SDSC1001'], 'A')['available'][:1]
+        [('SDSC2003', 'Human Contexts and Ethics in Data Science')]
+    """
+
+    def __init__(self, db_path: str, check_interval: float = 0.0) -> None:
+        self.db_path = db_path
+        self.check_interval = check_interval
+        self.loads = 0
+        self._lock = threading.Lock()
+        self._signature = None
+        self._checked = 0.0
+        self._snap: Optional[_Snapshot] = None
+        self.reload()
+
+    def file_signature(self) -> tuple:
+        """(mtime, size) of the DB file and its WAL; compared to detect rebuilds."""
+        sig = []
+        for path in (self.db_path, self.db_path + "-wal"):
+            try:
+                st = os.stat(path)
+            except OSError:
+                sig.append(None)
+                continue
+            # Opening a WAL database may leave an empty -wal file behind;
+            # only a non-empty one holds changes
+            sig.append((st.st_mtime_ns, st.st_size) if st.st_size or path == self.db_path else None)
+        return tuple(sig)
+
+    def reload(self) -> None:
+        """Read the database again (normally done automatically)."""
+        with self._lock:
+            signature = self.file_signature()
+            if signature[0] is None:
+                raise FileNotFoundError(f"Course database not found: {self.db_path}")
+            uri = Path(self.db_path).resolve().as_uri() + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True)
+            try:
+                # One read transaction: every table from the same commit
+                conn.execute("BEGIN")
+                snap = _Snapshot(conn)
+            finally:
+                conn.close()
+            self._snap = snap
+            self._signature = signature
+            self._checked = time.monotonic()
+            self.loads += 1
+
+    def changed(self) -> bool:
+        """True when the DB file differs from what was loaded."""
+        return self.file_signature() != self._signature
+
+    def _current(self) -> _Snapshot:
+        if self.check_interval <= 0 or time.monotonic() - self._checked >= self.check_interval:
+            self._checked = time.monotonic()
+            if self.changed():
+                self.reload()
+        return self._snap
+
+    def snapshot(self) -> _Snapshot:
+        """Current in-memory data (reloaded first if the DB changed)."""
+        return self._current()
+
+    # -- queries -------------------------------------------------------
+    def __len__(self) -> int:
+        snap = self._current()
+        return sum(snap.is_course)
+
+    def __contains__(self, course_code: str) -> bool:
+        snap = self._current()
+        i = snap.id_of.get(course_code.strip().upper())
+        return i is not None and bool(snap.is_course[i])
+
+    def title(self, course_code: str) -> Optional[str]:
+        snap = self._current()
+        i = snap.id_of.get(course_code.strip().upper())
+        return snap.titles[i] if i is not None else None
+
+    def prerequisites(self, course_code: str) -> List[str]:
+        """Direct prerequisite codes of a course (every code its text mentions)."""
+        snap = self._current()
+        i = snap.id_of.get(course_code.strip().upper())
+        if i is None:
+            return []
+        return [snap.codes[p] for p in snap.pre_ids[snap.pre_ptr[i]:snap.pre_ptr[i + 1]]]
+
+    def children(self, course_code: str) -> List[Tuple[str, str]]:
+        """Courses that list ``course_code`` as a direct prerequisite, sorted."""
+        snap = self._current()
+        i = snap.id_of.get(course_code.strip().upper())
+        if i is None:
+            return []
+        return [(snap.codes[c], snap.titles[c]) for c in snap.dep_ids[snap.dep_ptr[i]:snap.dep_ptr[i + 1]]]
+
+    def roots(self, semester_filter: str = None, programme: str = None) -> List[Tuple[str, str]]:
+        """Courses without prerequisites, sorted."""
+        return self.find_available([], semester_filter, programme)["no_prereq"]
+
+    @property
+    def special_requirements(self) -> Dict[str, str]:
+        """Course code -> special (text-only) requirement."""
+        return self._current().special
+
+    def find_available(
+        self,
+        completed_courses: List[str],
+        semester_filter: str = None,
+        programme: str = None,
+    ) -> Dict[str, list]:
+        """Same result as ``find_available_courses`` without touching the DB.
+
+        Only dependents of the completed courses can become available or
+        be follow-ups, so those and the root list are the only courses
+        visited.
+        """
+        snap = self._current()
+        completed = set(c.strip().upper() for c in completed_courses)
+        done = {snap.id_of[c] for c in completed if c in snap.id_of}
+
+        sem_bit, members = snap.scope(semester_filter, programme)
+
+        def in_scope(i: int) -> bool:
+            return (
+                snap.is_course[i]
+                and (not sem_bit or snap.semesters[i] & sem_bit)
+                and (members is None or i in members)
+            )
+
+        dep_ptr, dep_ids = snap.dep_ptr, snap.dep_ids
+        candidates = set()
+        for d in done:
+            candidates.update(dep_ids[dep_ptr[d]:dep_ptr[d + 1]])
+
+        available = []
+        completed_children = []
+        pre_ptr, pre_ids = snap.pre_ptr, snap.pre_ids
+        for i in sorted(candidates - done):
+            if not in_scope(i):
+                continue
+            pre = pre_ids[pre_ptr[i]:pre_ptr[i + 1]]
+            code, title = snap.codes[i], snap.titles[i]
+            completed_children.append((code, title, [snap.codes[p] for p in pre]))
+            if snap.satisfied(i, done, completed):
+                available.append((code, title))
+
+        return {
+            'available': available,
+            'no_prereq': snap.roots_excluding(done, semester_filter, programme),
+            'completed_children': completed_children,
+        }
+
+    def what_if(
+        self,
+        completed_courses: List[str],
+        added_courses: List[str],
+        semester_filter: str = None,
+        programme: str = None,
+    ) -> Dict[str, list]:
+        """Courses that taking ``added_courses`` on top of ``completed_courses`` unlocks.
+
+        Only direct dependents of the added courses can change, so those
+        are the only courses visited.
+
+        Returns:
+            Dictionary with:
+            - 'unlocked': (code, title) of courses that become available
+            - 'still_blocked': (code, title, missing codes) of dependents of
+              the added courses that still need more (the alternative with
+              fewest courses missing)
+        """
+        snap = self._current()
+        before = set(c.strip().upper() for c in completed_courses)
+        after = before | set(c.strip().upper() for c in added_courses)
+        done_before = {snap.id_of[c] for c in before if c in snap.id_of}
+        done_after = {snap.id_of[c] for c in after if c in snap.id_of}
+        added = done_after - done_before
+
+        sem_bit, members = snap.scope(semester_filter, programme)
+        candidates = set()
+        for a in added:
+            candidates.update(snap.dep_ids[snap.dep_ptr[a]:snap.dep_ptr[a + 1]])
+
+        unlocked = []
+        still_blocked = []
+        for i in sorted(candidates - done_after):
+            if not (
+                snap.is_course[i]
+                and (not sem_bit or snap.semesters[i] & sem_bit)
+                and (members is None or i in members)
+            ):
+                continue
+            if snap.satisfied(i, done_after, after):
+                if not snap.satisfied(i, done_before, before):
+                    unlocked.append((snap.codes[i], snap.titles[i]))
+            else:
+                still_blocked.append((snap.codes[i], snap.titles[i], snap.missing(i, done_after)))
+        return {'unlocked': unlocked, 'still_blocked': still_blocked}
+
+
+_indexes: Dict[str, CourseIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def open_index(db_path: str) -> CourseIndex:
+    """Shared CourseIndex for a database file (created on first use)."""
+    key = os.path.abspath(db_path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = CourseIndex(db_path)
+    return index
+
+
+__all__ = ["CourseIndex", "open_index", "SEMESTER_BITS"]
@@ -5,7 +5,9 @@ available courses based on their completed prerequisites.
 """
 
 from typing import List, Tuple, Dict
-from .course_finder import find_available_courses, get_special_requirements
+from .course_finder import find_available_courses, list_programmes, what_if
+from .course_index import open_index
+from .planner import unlock_path
 
 
 def format_prerequisite_status(prereqs: List[str], completed: List[str]) -> str:
@@ -48,7 +50,8 @@ def display_results(results: dict, completed: List[str], db_path: str = None) ->
     special_reqs = {}
     if db_path:
         try:
-            special_reqs = get_special_requirements(db_path)
+            # Loaded by find_available_courses already; no second DB read
+            special_reqs = open_index(db_path).special_requirements
         except Exception:
             pass
     
@@ -70,7 +73,7 @@ def display_results(results: dict, completed: List[str], db_path: str = None) ->
         regular_courses = []
         
         for code, title in results['no_prereq']:
-            if 'internship' in title.lower() or 'internship' in code.lower():
+            if 'internship' in (title or '').lower() or 'internship' in code.lower():
                 internship_courses.append((code, title))
             elif code in special_reqs:
                 special_req_courses.append((code, title, special_reqs[code]))
@@ -131,18 +134,112 @@ def parse_course_input(user_input: str) -> List[str]:
     return completed
 
 
-def interactive_course_query(db_path: str, verbose: bool = False) -> None:
+def display_unlock_path(route: dict) -> None:
+    """Display the quickest route to a course (from unlock_path())."""
+    if route['reason']:
+        print(f"\n⚠️  {route['target']}: {route['reason']}")
+        return
+    count = len(route['prerequisites'])
+    print(f"\n🧭 到 {route['target']} 的最短路径：还需 {count} 门课程")
+    print(f"   Quickest route to {route['target']}: {count} course(s) first\n")
+    for n, step in enumerate(route['steps'], 1):
+        for code, title in step:
+            print(f"   {n:2d}. {code:12s} {title or ''}")
+    if route['external']:
+        print(f"\n   外系课程，请查阅其课程目录 / Taken from another department: {', '.join(route['external'])}")
+    if not route['optimal']:
+        print("\n   (搜索已达上限，可能不是最短 / search budget reached; may not be the shortest)")
+
+
+def display_what_if(result: dict, added: List[str]) -> None:
+    """Display the courses taking ``added`` would unlock (from what_if())."""
+    print(f"\n🔓 选修 {', '.join(added)} 后新解锁的课程 ({len(result['unlocked'])} 门)")
+    print(f"   Unlocked by taking {', '.join(added)}:\n")
+    for code, title in result['unlocked']:
+        print(f"   • {code:12s} {title or ''}")
+    if result['still_blocked']:
+        print(f"\n🔒 仍需其他前置课程 / Still need more:\n")
+        for code, title, missing in result['still_blocked']:
+            print(f"   • {code:12s} {title or ''}")
+            print(f"     还缺 / Missing: {', '.join(missing)}")
+
+
+def explore(db_path: str, completed: List[str], semester_filter: str = None, programme: str = None) -> bool:
+    """Follow-up questions about one set of completed courses.
+
+    Commands: ``path CODE`` (quickest route to a course), ``if CODES``
+    (what taking them would unlock), ``add CODES`` (count them as
+    completed and show the results again). Answers come from the
+    in-memory index, so they are instant.
+
+    Returns:
+        False when the user asked to quit
+    """
+    while True:
+        print("\n继续探索：'path 课程代码' 查看最短路径，'if 课程代码' 查看选修后解锁的课程，")
+        print("'add 课程代码' 加入已修课程，回车重新输入，'q' 退出")
+        print("Explore: 'path CODE' quickest route, 'if CODES' what taking them unlocks,")
+        print("'add CODES' mark as completed, Enter to start over, 'q' to quit")
+        command = input("> ").strip()
+        if not command:
+            return True
+        if command.lower() == 'q':
+            return False
+        word, _, rest = command.partition(' ')
+        codes = parse_course_input(rest)
+        word = word.lower()
+        if word == 'path' and codes:
+            display_unlock_path(unlock_path(db_path, completed, codes[0]))
+        elif word in ('if', 'what-if') and codes:
+            display_what_if(what_if(db_path, completed, codes, semester_filter, programme), codes)
+        elif word == 'add' and codes:
+            completed.extend(c for c in codes if c.upper() not in {d.upper() for d in completed})
+            print(f"\n🔍 已完成课程 / Completed: {', '.join(completed)}")
+            display_results(find_available_courses(db_path, completed, semester_filter, programme), completed, db_path)
+        else:
+            print("⚠️  无法识别的命令 / Unknown command")
+
+
+def choose_programme(db_path: str) -> str:
+    """Ask which programme to scope queries to when the DB holds several.
+    
+    Returns:
+        Programme code, or None for all courses
+    """
+    programmes = list_programmes(db_path)
+    if len(programmes) <= 1:
+        return None
+    print("\n数据库包含多个专业，请选择 (输入编号或代码，直接回车查看全部):")
+    print("The database holds several programmes; choose one (number or code, Enter for all):")
+    for i, (code, title, n) in enumerate(programmes, 1):
+        print(f"   {i:2d}. {code:14s} {title or ''} ({n} courses)")
+    choice = input("> ").strip()
+    if not choice:
+        return None
+    if choice.isdigit() and 1 <= int(choice) <= len(programmes):
+        return programmes[int(choice) - 1][0]
+    for code, _, _ in programmes:
+        if code.upper() == choice.upper():
+            return code
+    print("⚠️  未找到该专业，显示全部课程 / Programme not found, showing all courses")
+    return None
+
+
+def interactive_course_query(db_path: str, verbose: bool = False, programme: str = None) -> None:
     """Interactive session for querying available courses based on completed courses.
     
     Args:
         db_path: Path to SQLite database
         verbose: Enable verbose error messages
+        programme: Programme code to scope results to (asked for when the
+            database holds several programmes and none is given)
         
     This function starts an interactive loop where users can:
     - Enter completed course codes
     - View available courses based on prerequisites
     - See related follow-up courses
     - Browse root courses (no prerequisites)
+    - Ask for the quickest route to a course and what taking courses unlocks
     """
     print("\n" + "=" * 70)
     print("📚 交互式课程查询 / Interactive Course Query")
@@ -155,6 +252,11 @@ def interactive_course_query(db_path: str, verbose: bool = False) -> None:
     print("  • Or tell me which courses you've completed, and I'll find available courses for you")
     print("\n" + "-" * 70)
     
+    if programme is None:
+        programme = choose_programme(db_path)
+    if programme:
+        print(f"\n🎓 专业 / Programme: {programme}")
+    
     while True:
         print("\n请输入已完成的课程代码 (多个课程用空格或逗号分隔，输入 'q' 退出):")
         print("Enter completed course codes (separate with spaces/commas, 'q' to quit):")
@@ -189,8 +291,11 @@ def interactive_course_query(db_path: str, verbose: bool = False) -> None:
             print(f"   Showing courses from all semesters\n")
         
         try:
-            results = find_available_courses(db_path, completed, semester_filter)
+            results = find_available_courses(db_path, completed, semester_filter, programme)
             display_results(results, completed, db_path)
+            if not explore(db_path, completed, semester_filter, programme):
+                print("\n感谢使用！Goodbye! 👋\n")
+                break
             
         except Exception as e:
             print(f"\n❌ 查询出错 / Error occurred: {e}")
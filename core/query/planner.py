@@ -0,0 +1,644 @@
+"""Semester-by-semester study plans.
+
+``plan_semesters`` lays out the courses a student still needs over the
+coming semesters, with as few semesters as possible, under a credit cap
+per semester. It works in two steps:
+
+1. Requirements: the target courses (or a programme's required courses)
+   plus every prerequisite not yet completed. Where a prerequisite is an
+   OR, the alternative needing the fewest extra courses is chosen,
+   skipping courses ruled out by an exclusion with a completed or already
+   planned course.
+2. Scheduling: a depth-first branch-and-bound over semesters. Each
+   semester takes a maximal set of ready courses that fits under the cap
+   (taking a course earlier never makes a plan longer, so smaller sets
+   need not be tried); courses that are interchangeable (same credits,
+   offering and follow-ups) are counted rather than enumerated. Each
+   choice gets a lower bound on the semesters still needed: the longest
+   remaining prerequisite chain with offering gaps, and for every set of
+   semester types the credits, course count and over-half-cap courses
+   that only those semesters can take. Choices are tried lowest bound
+   first; a branch is cut when it cannot beat the best plan so far, or
+   when the same set of courses was already done at the same point of
+   the year no later. The first descent already gives a complete plan,
+   so the node budget only limits how hard the search tries to improve
+   it.
+
+Courses whose credit units cannot be parsed count as DEFAULT_CREDITS;
+courses without offering information are assumed to run in both
+semesters A and B. Prerequisites without a page in the database (other
+departments' courses) are planned the same way and listed under
+'external', so the student knows to look them up.
+"""
+
+import math
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from core.dp_build.prereq_expr import to_dnf
+
+from .course_finder import get_programme_courses
+from .course_index import SEMESTER_BITS, CourseIndex, open_index
+
+DEFAULT_CREDIT_CAP = 18.0
+# Credits assumed when a course's credit units are missing or unparsable
+DEFAULT_CREDITS = 3.0
+# Search nodes before the best plan so far is returned as not proven optimal
+DEFAULT_MAX_NODES = 2000
+# Programme rows that list a pool to choose from rather than a required course
+ELECTIVE_RE = re.compile(r"elective|must earn|stream only", re.IGNORECASE)
+
+_INF = float("inf")
+
+
+def _bits(mask: int) -> Iterable[int]:
+    """Positions of the set bits of ``mask``, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def programme_requirements(db_path: str, programme: str) -> List[str]:
+    """Required courses of a programme, sorted.
+
+    Rows in elective pools ("Optional Electives", "Must earn at least 12
+    credit units from ...") and stream-only rows are left out; pass the
+    electives you choose as targets.
+    """
+    return sorted({
+        code for code, _, section, category in get_programme_courses(db_path, programme)
+        if not ELECTIVE_RE.search(f"{section or ''} {category or ''}")
+    })
+
+
+def semester_cycle(start_semester: str = "A", summer: bool = False) -> List[str]:
+    """Semester types of one academic year, starting at ``start_semester``."""
+    cycle = ["A", "B", "SUMMER"] if summer else ["A", "B"]
+    start = start_semester.strip().upper()
+    if start not in cycle:
+        raise ValueError(f"start semester must be one of {', '.join(cycle)}")
+    k = cycle.index(start)
+    return cycle[k:] + cycle[:k]
+
+
+class _Requirements:
+    """Step 1: which courses to take, and which prerequisites each waits for."""
+
+    def __init__(self, snap, completed: Set[str], credit_cap: float, offered_bits: int) -> None:
+        self.snap = snap
+        self.completed = completed
+        self.done = {snap.id_of[c] for c in completed if c in snap.id_of}
+        self.credit_cap = credit_cap
+        self.offered_bits = offered_bits
+        self.needed: Dict[int, List[int]] = {}
+        self._cost: Dict[int, float] = {}
+        self._visiting: Set[int] = set()
+
+    def credits(self, i: int) -> float:
+        c = self.snap.credits[i]
+        return DEFAULT_CREDITS if c is None else c
+
+    def offer(self, i: int) -> int:
+        return self.snap.semesters[i] or SEMESTER_BITS["A"] | SEMESTER_BITS["B"]
+
+    def alternatives(self, i: int) -> List[Tuple[int, ...]]:
+        snap = self.snap
+        listed = tuple(snap.pre_ids[snap.pre_ptr[i]:snap.pre_ptr[i + 1]])
+        if i not in snap.dnf:
+            return [listed]
+        if snap.dnf[i] is None:
+            terms = to_dnf(snap.expressions[i])
+            # Too many alternatives to expand: all listed courses satisfy it
+            if terms is None or any(c not in snap.id_of for t in terms for c in t):
+                return [listed]
+            return [tuple(snap.id_of[c] for c in t) for t in terms]
+        return snap.dnf[i]
+
+    def excluded_by(self, i: int) -> Optional[str]:
+        """A completed or planned course that rules out ``i``."""
+        for code in sorted(self.snap.exclusions.get(i, ())):
+            if code in self.completed:
+                return code
+            j = self.snap.id_of.get(code)
+            if j is not None and j in self.needed:
+                return code
+        return None
+
+    def unavailable(self, i: int) -> Optional[str]:
+        """Why ``i`` can never be planned, if so (ignoring prerequisites)."""
+        if self.credits(i) > self.credit_cap:
+            return f"{self.credits(i):g} credit units exceed the cap"
+        if not self.offer(i) & self.offered_bits:
+            return "not offered in the planned semesters"
+        return None
+
+    def cost(self, i: int) -> float:
+        """Courses to take for ``i`` (completed ones are free), inf if impossible."""
+        if i in self.done:
+            return 0
+        if i in self._cost:
+            return self._cost[i]
+        if i in self._visiting:
+            return _INF
+        if self.unavailable(i) or any(c in self.completed for c in self.snap.exclusions.get(i, ())):
+            self._cost[i] = _INF
+            return _INF
+        self._visiting.add(i)
+        best = min(sum(self.cost(p) for p in term) for term in self.alternatives(i))
+        self._visiting.discard(i)
+        self._cost[i] = 1 + best
+        return self._cost[i]
+
+    def require(self, i: int) -> Optional[str]:
+        """Add ``i`` and its missing prerequisites to the plan; reason on failure."""
+        if i in self.done or i in self.needed:
+            return None
+        reason = self.unavailable(i)
+        if reason:
+            return reason
+        other = self.excluded_by(i)
+        if other:
+            return f"excluded by {other}"
+        best, choice = _INF, None
+        for term in self.alternatives(i):
+            if any(p not in self.done and p not in self.needed and self.excluded_by(p) for p in term):
+                continue
+            extra = sum(0 if p in self.needed else self.cost(p) for p in term)
+            if extra < best:
+                best, choice = extra, term
+        if choice is None or best == _INF:
+            return "prerequisites cannot be met"
+        saved = dict(self.needed)
+        self.needed[i] = []
+        for p in choice:
+            if p in self.done:
+                continue
+            if self.require(p):
+                self.needed = saved
+                return "prerequisites cannot be met"
+            self.needed[i].append(p)
+        return None
+
+
+class _Search:
+    """Step 2: fewest semesters for the required courses."""
+
+    def __init__(self, req: _Requirements, cycle: List[str], credit_cap: float, max_nodes: int) -> None:
+        self.ids = sorted(req.needed)
+        local = {i: k for k, i in enumerate(self.ids)}
+        m = len(self.ids)
+        self.cap = credit_cap
+        self.cycle_bits = [SEMESTER_BITS[s] for s in cycle]
+        self.L = len(cycle)
+        self.credits = [req.credits(i) for i in self.ids]
+        self.offer = [req.offer(i) for i in self.ids]
+        self.pred_mask = [0] * m
+        self.succ: List[List[int]] = [[] for _ in range(m)]
+        self.succ_mask = [0] * m
+        for k, i in enumerate(self.ids):
+            for p in req.needed[i]:
+                self.pred_mask[k] |= 1 << local[p]
+                self.succ[local[p]].append(k)
+                self.succ_mask[local[p]] |= 1 << k
+        self.full = (1 << m) - 1
+        self.max_nodes = max_nodes
+        self.nodes = 0
+        self.best: Optional[List[int]] = None
+        self.best_len = _INF
+        self.seen: Dict[Tuple[int, int], int] = {}
+        self.root_bound = 0
+
+        # tail[k][ph]: semesters from taking k in a semester of phase ph to
+        # the end of its longest chain of follow-ups, waiting for offerings
+        self.tail = [[0] * self.L for _ in range(m)]
+        for k in self._topological(reverse=True):
+            for ph in range(self.L):
+                if not self.offer[k] & self.cycle_bits[ph]:
+                    continue
+                longest = 0
+                for s in self.succ[k]:
+                    gap = self.wait(s, ph + 1)
+                    longest = max(longest, 1 + gap + self.tail[s][(ph + 1 + gap) % self.L])
+                self.tail[k][ph] = longest
+        # head[k][ph]: semesters needed from a semester of phase ph once k is ready
+        self.head = [
+            [self.wait(k, ph) + 1 + self.tail[k][(ph + self.wait(k, ph)) % self.L] for ph in range(self.L)]
+            for k in range(m)
+        ]
+        self.big = [1 if c > credit_cap / 2 else 0 for c in self.credits]
+        self.per_semester = int((credit_cap + 1e-9) // min(self.credits, default=credit_cap))
+        # Offering pattern of k: bit ph set when phase ph offers it
+        self.pattern = [
+            sum(1 << ph for ph, b in enumerate(self.cycle_bits) if self.offer[k] & b) for k in range(m)
+        ]
+        # Credits offered only within a set of phases S need enough semesters
+        # of S: (patterns within S, offsets of S's phases counted from each phase)
+        self.subsets = [
+            (
+                [P for P in range(1, 1 << self.L) if P & S == P],
+                [[d for d in range(self.L) if S >> ((ph + d) % self.L) & 1] for ph in range(self.L)],
+            )
+            for S in range(1, 1 << self.L)
+        ]
+
+    def _topological(self, reverse: bool = False) -> List[int]:
+        order, indegree = [], [bin(p).count("1") for p in self.pred_mask]
+        ready = [k for k, d in enumerate(indegree) if d == 0]
+        while ready:
+            k = ready.pop()
+            order.append(k)
+            for s in self.succ[k]:
+                indegree[s] -= 1
+                if indegree[s] == 0:
+                    ready.append(s)
+        return order[::-1] if reverse else order
+
+    def wait(self, k: int, t: int) -> int:
+        """Semesters from semester ``t`` until one that offers ``k``."""
+        for d in range(self.L):
+            if self.offer[k] & self.cycle_bits[(t + d) % self.L]:
+                return d
+        return _INF  # unreachable: unavailable courses are never required
+
+    def _units(self, credits: float) -> int:
+        return math.ceil(credits / self.cap - 1e-9)
+
+    def _totals(self, rest: int) -> List[float]:
+        """Per offering pattern P of the courses in ``rest``: credits, course
+        count and courses over half the cap, at ``3 * P + 0, 1, 2``."""
+        totals = [0.0] * (3 << self.L)
+        for k in _bits(rest):
+            j = 3 * self.pattern[k]
+            totals[j] += self.credits[k]
+            totals[j + 1] += 1
+            totals[j + 2] += self.big[k]
+        return totals
+
+    def _combine(self, chain: int, totals: List[float], ph: int) -> int:
+        bound = chain
+        for within, reach in self.subsets:
+            credits = count = big = 0.0
+            for P in within:
+                credits += totals[3 * P]
+                count += totals[3 * P + 1]
+                big += totals[3 * P + 2]
+            # Semesters of S needed: by credits, by course count, and one
+            # per course too big to share a semester with another big one
+            n = int(max(self._units(credits), -(-count // self.per_semester), big))
+            if n:
+                offsets = reach[ph]
+                q, r = divmod(n - 1, len(offsets))
+                bound = max(bound, q * self.L + offsets[r] + 1)
+        return bound
+
+    def lower_bound(self, done: int, t: int) -> int:
+        """Semesters still needed from semester ``t``, at least."""
+        ph = t % self.L
+        rest = self.full & ~done
+        chain = max((self.head[k][ph] for k in _bits(rest) if self.pred_mask[k] & ~done == 0), default=0)
+        return self._combine(chain, self._totals(rest), ph)
+
+    def _children(self, done: int, t: int) -> List[Tuple[int, float, int, int]]:
+        """(lower bound after, -credits, order, courses) per choice for semester ``t``.
+
+        The bound of each child is derived from the parent's ready list and
+        totals instead of a full ``lower_bound`` pass.
+        """
+        ph = (t + 1) % self.L
+        rest = self.full & ~done
+        totals = self._totals(rest)
+        ready = sorted((k for k in _bits(rest) if self.pred_mask[k] & ~done == 0), key=lambda k: -self.head[k][ph])
+        children = []
+        for n, chosen in enumerate(self._choices(done, t)):
+            after = done | chosen
+            chain = next((self.head[k][ph] for k in ready if not chosen >> k & 1), 0)
+            credits = 0.0
+            left = totals[:]
+            for k in _bits(chosen):
+                credits += self.credits[k]
+                j = 3 * self.pattern[k]
+                left[j] -= self.credits[k]
+                left[j + 1] -= 1
+                left[j + 2] -= self.big[k]
+                for s in self.succ[k]:
+                    if self.pred_mask[s] & ~after == 0 and self.head[s][ph] > chain:
+                        chain = self.head[s][ph]
+            children.append((self._combine(chain, left, ph), -credits, n, chosen))
+        return children
+
+    def _choices(self, done: int, t: int) -> Iterable[int]:
+        """Maximal sets of ready courses under the cap, as bit masks (greedy first)."""
+        bit = self.cycle_bits[t % self.L]
+        ph = t % self.L
+        groups: Dict[tuple, List[int]] = {}
+        for k in range(len(self.ids)):
+            if not done >> k & 1 and self.offer[k] & bit and self.pred_mask[k] & ~done == 0:
+                key = (self.credits[k], self.offer[k], self.succ_mask[k])
+                groups.setdefault(key, []).append(k)
+        if not groups:
+            yield 0
+            return
+        classes = sorted(groups.values(), key=lambda ks: (-self.tail[ks[0]][ph], -self.credits[ks[0]], ks[0]))
+
+        # prefixes[c][n]: mask of the first n courses of class c
+        prefixes = []
+        for ks in classes:
+            masks = [0]
+            for k in ks:
+                masks.append(masks[-1] | 1 << k)
+            prefixes.append(masks)
+
+        def pick(c: int, room: float, chosen: int, left_out: float):
+            # left_out: credits of the smallest class with courses not taken
+            if c == len(classes):
+                # Maximal: nothing left over still fits
+                if left_out > room + 1e-9:
+                    yield chosen
+                return
+            ks = classes[c]
+            credits = self.credits[ks[0]]
+            most = min(len(ks), int((room + 1e-9) // credits))
+            for n in range(most, -1, -1):
+                yield from pick(
+                    c + 1, room - n * credits, chosen | prefixes[c][n], left_out if n == len(ks) else min(left_out, credits)
+                )
+
+        yield from pick(0, self.cap, 0, _INF)
+
+    def run(self) -> bool:
+        """Search; True when the plan found is proven to have fewest semesters."""
+        self.root_bound = self.lower_bound(0, 0)
+        complete = self._dfs(0, 0, [], self.root_bound)
+        return complete or self.best_len <= self.root_bound
+
+    def _dfs(self, done: int, t: int, taken: List[int], bound: int) -> bool:
+        """Returns False when the node budget ran out below this node.
+
+        ``bound`` is ``lower_bound(done, t)``, computed by the parent.
+        """
+        if done == self.full:
+            if t < self.best_len:
+                self.best_len, self.best = t, taken[:]
+            return True
+        if t + bound >= self.best_len:
+            return True
+        key = (done, t % self.L)
+        if self.seen.get(key, _INF) <= t:
+            return True
+        self.seen[key] = t
+        self.nodes += 1
+        if self.nodes > self.max_nodes and self.best is not None:
+            return False
+        # Most promising semester first: lowest bound after it, then most credits
+        children = sorted(self._children(done, t))
+        for child_bound, _, _, chosen in children:
+            if t + 1 + child_bound >= self.best_len:
+                break
+            taken.append(chosen)
+            ok = self._dfs(done | chosen, t + 1, taken, child_bound)
+            taken.pop()
+            if not ok:
+                return False
+            if self.best_len <= self.root_bound:
+                break
+        return True
+
+
+def plan_semesters(
+    db: Union[str, CourseIndex],
+    completed: List[str],
+    targets: List[str] = None,
+    programme: str = None,
+    credit_cap: float = DEFAULT_CREDIT_CAP,
+    start_semester: str = "A",
+    summer: bool = False,
+    max_nodes: int = DEFAULT_MAX_NODES,
+) -> Dict[str, object]:
+    """Plan the remaining courses over as few semesters as possible.
+
+    Args:
+        db: Path to SQLite database, or a CourseIndex
+        completed: Course codes already completed
+        targets: Course codes to reach (their prerequisites are added)
+        programme: Programme code whose required courses are targets too
+        credit_cap: Maximum credit units per semester
+        start_semester: Semester the plan starts in ('A', 'B' or 'SUMMER')
+        summer: Also plan courses in summer terms
+        max_nodes: Search budget; the best plan found so far is returned
+            when it runs out
+
+    Returns:
+        Dictionary with:
+        - 'semesters': one dict per semester in order, with 'number'
+          (1-based), 'term' ('A', 'B', 'SUMMER'), 'courses' (list of
+          (code, title, credits)) and 'credits'; a semester may be empty
+          when courses wait for their offering semester
+        - 'unscheduled': (code, reason) for targets that cannot be planned
+        - 'external': planned prerequisites with no page in the database
+          (credits and offering assumed)
+        - 'optimal': whether no plan with fewer semesters exists
+        - 'lower_bound': fewest semesters any plan could need
+
+    Example:
+        >>> plan = plan_semesters('courses.db', ['CS1315'], ['SDSC2001'])
+        >>> [(s['term'], [c for c, _, _ in s['courses']]) for s in plan['semesters']]
+        [('A', ['SDSC1001']), ('B', []), ('A', ['SDSC2001'])]
+    """
+    index = db if isinstance(db, CourseIndex) else open_index(db)
+    snap = index.snapshot()
+    if credit_cap <= 0:
+        raise ValueError("credit cap must be positive")
+    if programme and programme not in snap.programmes:
+        raise ValueError(f"Unknown programme: {programme}")
+    wanted = [c.strip().upper() for c in targets or []]
+    if programme:
+        wanted += programme_requirements(index.db_path, programme)
+    if not wanted:
+        raise ValueError("give target courses or a programme")
+
+    cycle = semester_cycle(start_semester, summer)
+    req = _Requirements(snap, {c.strip().upper() for c in completed}, credit_cap, sum(SEMESTER_BITS[s] for s in cycle))
+    unscheduled = []
+    for code in dict.fromkeys(wanted):
+        i = snap.id_of.get(code)
+        reason = "not in the database" if i is None or not snap.is_course[i] else req.require(i)
+        if reason:
+            unscheduled.append((code, reason))
+
+    search = _Search(req, cycle, credit_cap, max_nodes)
+    optimal = search.run()
+    semesters, external = [], []
+    for n, chosen in enumerate(search.best or []):
+        ids = [search.ids[k] for k in range(len(search.ids)) if chosen >> k & 1]
+        courses = [(snap.codes[i], snap.titles[i], req.credits(i)) for i in ids]
+        external += [snap.codes[i] for i in ids if not snap.is_course[i]]
+        semesters.append({
+            'number': n + 1,
+            'term': cycle[n % len(cycle)],
+            'courses': courses,
+            'credits': sum(c for _, _, c in courses),
+        })
+    return {
+        'semesters': semesters,
+        'unscheduled': unscheduled,
+        'external': external,
+        'optimal': optimal,
+        'lower_bound': search.root_bound,
+    }
+
+
+class _PathSearch:
+    """Fewest courses (then fewest credits) that make a target takeable.
+
+    Depth-first over the OR choices of the courses picked so far, cheapest
+    alternative first (by ``_Requirements.cost``). A branch is cut when
+    the courses picked, plus the most any single pending course still
+    needs, cannot beat the best set found.
+    """
+
+    def __init__(self, req: _Requirements, max_nodes: int) -> None:
+        self.req = req
+        self.snap = req.snap
+        self.max_nodes = max_nodes
+        self.nodes = 0
+        self.seen: Set[Tuple[frozenset, frozenset]] = set()
+        self.best: Optional[Dict[int, Tuple[int, ...]]] = None
+        self.best_key = (_INF, _INF)
+
+    def clashes(self, p: int, taken: Dict[int, Optional[Tuple[int, ...]]]) -> bool:
+        for code in self.snap.exclusions.get(p, ()):
+            j = self.snap.id_of.get(code)
+            if code in self.req.completed or (j is not None and j in taken):
+                return True
+        return False
+
+    def options(self, i: int, taken: Dict[int, Optional[Tuple[int, ...]]]) -> List[Tuple[float, Tuple[int, ...], List[int]]]:
+        """(estimated cost, alternative, courses it adds) for course ``i``, cheapest first."""
+        out = []
+        for term in self.req.alternatives(i):
+            new = [p for p in dict.fromkeys(term) if p not in self.req.done and p not in taken]
+            if any(self.req.unavailable(p) or self.clashes(p, taken) for p in new):
+                continue
+            if any(self.snap.id_of.get(c) in new for p in new for c in self.snap.exclusions.get(p, ())):
+                continue
+            cost = sum(self.req.cost(p) for p in new)
+            if cost < _INF:
+                out.append((cost, term, new))
+        # Ties: fewer new courses, then fewer courses outside the database
+        out.sort(key=lambda o: (o[0], len(o[2]), sum(not self.snap.is_course[p] for p in o[2])))
+        return out
+
+    def run(self, target: int) -> bool:
+        """Search; True when the best set found is proven minimal."""
+        return self._dfs({target: None}, [target], self.req.credits(target))
+
+    def _dfs(self, taken: Dict[int, Optional[Tuple[int, ...]]], pending: List[int], credits: float) -> bool:
+        if not pending:
+            if (len(taken), credits) < self.best_key:
+                self.best_key = (len(taken), credits)
+                self.best = dict(taken)
+            return True
+        extra = max(min((len(o[2]) for o in self.options(i, taken)), default=_INF) for i in pending)
+        if (len(taken) + extra, credits) >= self.best_key:
+            return True
+        key = (frozenset(taken), frozenset(pending))
+        if key in self.seen:
+            return True
+        self.seen.add(key)
+        self.nodes += 1
+        if self.nodes > self.max_nodes and self.best is not None:
+            return False
+        i = pending[-1]
+        for _, term, new in self.options(i, taken):
+            taken[i] = term
+            for p in new:
+                taken[p] = None
+            ok = self._dfs(taken, pending[:-1] + new, credits + sum(self.req.credits(p) for p in new))
+            for p in new:
+                del taken[p]
+            taken[i] = None
+            if not ok:
+                return False
+        return True
+
+
+def unlock_path(
+    db: Union[str, CourseIndex],
+    completed: List[str],
+    target: str,
+    max_nodes: int = DEFAULT_MAX_NODES,
+) -> Dict[str, object]:
+    """Quickest route to a course: the fewest remaining courses to take first.
+
+    Where a prerequisite is an OR, the alternatives are searched for the
+    smallest total set (ties broken by credit units); courses excluded by
+    a completed or chosen course are avoided.
+
+    Args:
+        db: Path to SQLite database, or a CourseIndex
+        completed: Course codes already completed
+        target: Course code to reach
+        max_nodes: Search budget; the best route found so far is returned
+            when it runs out
+
+    Returns:
+        Dictionary with:
+        - 'target': target code
+        - 'steps': lists of (code, title) in the order they can be taken
+          (courses in one step do not depend on each other); the last
+          step is the target itself
+        - 'prerequisites': (code, title) of every course before the target
+        - 'external': prerequisites on the route with no page in the
+          database (taken from another department's catalogue)
+        - 'reason': why there is no route, or None
+        - 'optimal': whether no shorter route exists
+
+    Example:
+        >>> route = unlock_path('courses.db', ['CS1315'], 'SDSC2001')
+        >>> [[c for c, _ in step] for step in route['steps']]
+        [['SDSC1001'], ['SDSC2001']]
+    """
+    index = db if isinstance(db, CourseIndex) else open_index(db)
+    snap = index.snapshot()
+    code = target.strip().upper()
+    result = {'target': code, 'steps': [], 'prerequisites': [], 'external': [], 'reason': None, 'optimal': True}
+    req = _Requirements(snap, {c.strip().upper() for c in completed}, _INF, sum(SEMESTER_BITS.values()))
+    i = snap.id_of.get(code)
+    if i is None or not snap.is_course[i]:
+        result['reason'] = "not in the database"
+        return result
+    if i in req.done:
+        result['reason'] = "already completed"
+        return result
+    reason = req.unavailable(i) or (f"excluded by {req.excluded_by(i)}" if req.excluded_by(i) else None)
+    if reason:
+        result['reason'] = reason
+        return result
+
+    search = _PathSearch(req, max_nodes)
+    result['optimal'] = search.run(i)
+    if search.best is None:
+        result['reason'] = "prerequisites cannot be met"
+        return result
+
+    level: Dict[int, int] = {}
+
+    def depth(k: int) -> int:
+        if k not in level:
+            level[k] = 0  # guards against prerequisite cycles
+            level[k] = 1 + max((depth(p) for p in search.best[k] or () if p in search.best), default=-1)
+        return level[k]
+
+    for k in search.best:
+        depth(k)
+    steps: List[List[Tuple[str, str]]] = [[] for _ in range(max(level.values()) + 1)]
+    for k in sorted(search.best):
+        steps[level[k]].append((snap.codes[k], snap.titles[k]))
+    result['steps'] = steps
+    result['prerequisites'] = [pair for step in steps for pair in step if pair[0] != code]
+    result['external'] = [snap.codes[k] for k in sorted(search.best) if not snap.is_course[k]]
+    return result
+
+
+__all__ = ["plan_semesters", "unlock_path", "programme_requirements", "semester_cycle", "DEFAULT_CREDIT_CAP"]
@@ -0,0 +1,88 @@
+"""Keyword search over course codes, titles, aims and requirement text.
+
+Uses the ``courses_fts`` FTS5 index written by the builder, ranked with
+BM25 (matches in the code and title weigh more than matches in the aims).
+Databases without the index are searched with LIKE instead.
+"""
+
+import re
+import sqlite3
+from typing import List, Tuple
+
+# bm25() column weights: course_code, course_title, aims, requirement_text
+BM25_WEIGHTS = (10.0, 5.0, 1.0, 1.0)
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query: every word must match, as a prefix.
+
+    Example:
+        >>> fts_query("machine learn")
+        '"machine"* "learn"*'
+    """
+    return " ".join(f'"{w}"*' for w in _WORD_RE.findall(text))
+
+
+def search_courses(db_path: str, query: str, limit: int = 20, programme: str = None) -> List[Tuple[str, str, str]]:
+    """Search courses by keyword.
+
+    Args:
+        db_path: Path to SQLite database (or an open connection, left open)
+        query: Free text; every word must appear (prefixes match, and
+            the index stems English words, so "learn" finds "learning")
+        limit: Maximum number of results
+        programme: Only courses listed by this programme code
+
+    Returns:
+        List of (course_code, course_title, snippet) tuples, best match first.
+        The snippet is an excerpt of the aims or requirement text with
+        matches in [brackets].
+
+    Example:
+        >>> search_courses('courses.db', 'machine learning')[0][:2]
+        ('CS3334', 'Machine Learning')
+    """
+    match = fts_query(query)
+    if not match:
+        return []
+    owned = not isinstance(db_path, sqlite3.Connection)
+    conn = sqlite3.connect(db_path) if owned else db_path
+    try:
+        has_fts = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'courses_fts'"
+        ).fetchone() is not None
+        scope = ""
+        params: list = []
+        if programme:
+            scope = " AND course_code IN (SELECT course_code FROM programme_courses WHERE programme_code = ?)"
+            params.append(programme)
+        if has_fts:
+            weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+            rows = conn.execute(
+                "SELECT course_code, course_title, "
+                "coalesce(snippet(courses_fts, 2, '[', ']', '…', 12), '') || "
+                "coalesce(' ' || snippet(courses_fts, 3, '[', ']', '…', 8), '') "
+                f"FROM courses_fts WHERE courses_fts MATCH ?{scope} "
+                f"ORDER BY bm25(courses_fts, {weights}) LIMIT ?",
+                [match] + params + [limit],
+            ).fetchall()
+        else:
+            # Databases built before courses_fts: scan with LIKE
+            words = _WORD_RE.findall(query)
+            where = " AND ".join(
+                "(course_code LIKE ? OR course_title LIKE ? OR aims LIKE ?)" for _ in words
+            )
+            like = [f"%{w}%" for w in words for _ in range(3)]
+            rows = conn.execute(
+                f"SELECT course_code, course_title, '' FROM courses WHERE {where}{scope} "
+                "ORDER BY course_code LIMIT ?",
+                like + params + [limit],
+            ).fetchall()
+    finally:
+        if owned:
+            conn.close()
+    return [(code, title, snippet.strip()) for code, title, snippet in rows]
+
+
+__all__ = ["search_courses", "fts_query"]
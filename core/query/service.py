@@ -0,0 +1,463 @@
+"""Local HTTP/JSON query service.
+
+``serve`` answers course queries over HTTP from one process that keeps
+the database warm:
+
+- availability and the course graph come from a ``CourseIndex`` held in
+  memory (no SQLite access per request)
+- course details, keyword search and prerequisite chains use SQL, run on
+  a small pool of read-only connections in worker threads so the event
+  loop never blocks on the DB
+- availability responses are cached (LRU) under the normalized
+  completed set + semester + programme; the cache is dropped on reload
+- a watcher polls the DB file and reloads the index and the pool once a
+  rebuild has settled (the file unchanged for one poll interval) and
+  build-db has marked it complete (``build_state`` in schema_meta); a
+  build in progress or interrupted keeps the previous data in service
+
+Endpoints (GET, JSON responses)::
+
+    /available?completed=CS1315,SDSC1001&semester=A&programme=BSC1_DSC
+    /course/CS2334
+    /search?q=machine+learning&limit=20&programme=BSC1_DSC
+    /prerequisites/CS3334?max_depth=2
+    /unlocks/CS1315?max_depth=1
+    /path/CS3334?completed=CS1315
+    /what-if?completed=CS1315&add=SDSC1001,MA1503&semester=A
+    /health
+
+The HTTP layer is a minimal HTTP/1.1 implementation on asyncio streams
+with keep-alive, so the service has no dependencies beyond the stdlib.
+"""
+
+import asyncio
+import json
+import queue
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from core.dp_build.migrations import build_state, schema_version
+
+from .course_finder import get_all_prerequisites, get_course_info, get_unlocked_courses
+from .course_index import CourseIndex
+from .planner import unlock_path
+from .search import search_courses
+
+DEFAULT_PORT = 8765
+# Requests whose line + headers exceed this are rejected
+MAX_HEADER_BYTES = 16 * 1024
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class ConnectionPool:
+    """Read-only SQLite connections shared by worker threads.
+
+    Args:
+        db_path: database file
+        size: number of connections (and worker threads using them)
+    """
+
+    def __init__(self, db_path: str, size: int = 4) -> None:
+        self.db_path = db_path
+        self.size = size
+        self._idle: "queue.Queue[Tuple[int, sqlite3.Connection]]" = queue.Queue()
+        self._generation = 0
+        self.reset()
+
+    def _open(self) -> sqlite3.Connection:
+        uri = Path(self.db_path).resolve().as_uri() + "?mode=ro"
+        return sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+    def reset(self) -> None:
+        """Replace every connection (after the DB file was rebuilt or replaced)."""
+        self._generation += 1
+        self.close()
+        for _ in range(self.size):
+            self._idle.put((self._generation, self._open()))
+
+    def run(self, fn: Callable, *args):
+        """Call ``fn(conn, *args)`` with a pooled connection (blocking)."""
+        generation, conn = self._idle.get()
+        try:
+            return fn(conn, *args)
+        finally:
+            if generation == self._generation:
+                self._idle.put((generation, conn))
+            else:
+                # Checked out across a reset: retire it
+                conn.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait()[1].close()
+            except queue.Empty:
+                break
+
+
+class ResponseCache:
+    """Bounded LRU map of cache key -> encoded response body."""
+
+    def __init__(self, max_entries: int = 4096) -> None:
+        self.max_entries = max_entries
+        self._data: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Optional[bytes]:
+        body = self._data.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, key: tuple, body: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        self._data[key] = body
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def _encode(payload) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _course_fragments(snap) -> Dict[str, str]:
+    """'{"code":...,"title":...}' per course, encoded once per index snapshot.
+
+    Availability responses list hundreds of courses (every root course);
+    joining pre-encoded fragments is several times faster than encoding
+    the same dicts on every cache miss.
+    """
+    fragments = snap.derived.get("json")
+    if fragments is None:
+        fragments = snap.derived["json"] = {
+            code: _encode({"code": code, "title": title}).decode()
+            for code, title in zip(snap.codes, snap.titles)
+        }
+    return fragments
+
+
+def _codes(value: str):
+    return sorted({c.strip().upper() for c in value.replace(";", ",").replace(" ", ",").split(",") if c.strip()})
+
+
+class CourseService:
+    """Request handling on top of a warm CourseIndex.
+
+    Args:
+        db_path: database file
+        pool_size: read-only connections / worker threads for SQL queries
+        cache_size: cached availability responses (0 disables the cache)
+        reload_interval: seconds between checks of the DB file
+    """
+
+    def __init__(self, db_path: str, pool_size: int = 4, cache_size: int = 4096, reload_interval: float = 1.0) -> None:
+        self.db_path = db_path
+        # The watcher reloads; requests never stat the file
+        self.index = CourseIndex(db_path, check_interval=float("inf"))
+        self.pool = ConnectionPool(db_path, pool_size)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="course-db")
+        self.cache = ResponseCache(cache_size)
+        self.reload_interval = reload_interval
+        self.requests = 0
+        self.started = time.time()
+        self._routes: Dict[str, Callable] = {
+            "available": self.available,
+            "course": self.course,
+            "search": self.search,
+            "prerequisites": self.prerequisites,
+            "unlocks": self.unlocks,
+            "path": self.path,
+            "what-if": self.what_if,
+            "health": self.health,
+        }
+
+    # -- endpoints -----------------------------------------------------
+    async def available(self, arg: str, params: Dict[str, str]) -> bytes:
+        completed = tuple(_codes(params.get("completed", "")))
+        semester = params.get("semester", "").upper()
+        semester = semester if semester in ("A", "B") else None
+        programme = params.get("programme") or None
+        key = (completed, semester, programme)
+        body = self.cache.get(key)
+        if body is None:
+            snap = self.index.snapshot()
+            r = self.index.find_available(list(completed), semester, programme)
+            course_json = _course_fragments(snap)
+
+            def items(pairs):
+                return "[" + ",".join(course_json.get(c) or _encode({"code": c, "title": t}).decode() for c, t, *_ in pairs) + "]"
+
+            children = ",".join(
+                (course_json.get(c) or _encode({"code": c, "title": t}).decode())[:-1] + ',"prerequisites":' + json.dumps(p) + "}"
+                for c, t, p in r["completed_children"]
+            )
+            head = _encode({"completed": list(completed), "semester": semester, "programme": programme}).decode()
+            body = (
+                f'{head[:-1]},"available":{items(r["available"])},"no_prereq":{items(r["no_prereq"])},'
+                f'"completed_children":[{children}]}}'
+            ).encode("utf-8")
+            self.cache.put(key, body)
+        return body
+
+    async def course(self, arg: str, params: Dict[str, str]) -> bytes:
+        if not arg:
+            raise HttpError(400, "usage: /course/<code>")
+        info = await self._sql(get_course_info, arg)
+        if info is None:
+            raise HttpError(404, f"unknown course {arg.upper()}")
+        info["dependents"] = [{"code": c, "title": t} for c, t in self.index.children(arg)]
+        info["special_requirement"] = self.index.special_requirements.get(info["code"])
+        return _encode(info)
+
+    async def search(self, arg: str, params: Dict[str, str]) -> bytes:
+        q = params.get("q", "")
+        if not q.strip():
+            raise HttpError(400, "usage: /search?q=<words>")
+        limit = self._int(params, "limit", 20)
+        rows = await self._sql(search_courses, q, limit, params.get("programme") or None)
+        return _encode({"query": q, "results": [{"code": c, "title": t, "snippet": s} for c, t, s in rows]})
+
+    async def prerequisites(self, arg: str, params: Dict[str, str]) -> bytes:
+        return await self._chain(get_all_prerequisites, arg, params)
+
+    async def unlocks(self, arg: str, params: Dict[str, str]) -> bytes:
+        return await self._chain(get_unlocked_courses, arg, params)
+
+    async def path(self, arg: str, params: Dict[str, str]) -> bytes:
+        if not arg:
+            raise HttpError(400, "usage: /path/<code>?completed=...")
+        completed = _codes(params.get("completed", ""))
+        # CPU-bound search: keep the event loop free for other connections
+        loop = asyncio.get_running_loop()
+        route = await loop.run_in_executor(self.executor, unlock_path, self.index, completed, arg)
+        return _encode({
+            "target": route["target"],
+            "reason": route["reason"],
+            "optimal": route["optimal"],
+            "steps": [[{"code": c, "title": t} for c, t in step] for step in route["steps"]],
+        })
+
+    async def what_if(self, arg: str, params: Dict[str, str]) -> bytes:
+        added = _codes(params.get("add", ""))
+        if not added:
+            raise HttpError(400, "usage: /what-if?completed=...&add=...")
+        semester = params.get("semester", "").upper()
+        r = self.index.what_if(
+            _codes(params.get("completed", "")),
+            added,
+            semester if semester in ("A", "B") else None,
+            params.get("programme") or None,
+        )
+        return _encode({
+            "add": added,
+            "unlocked": [{"code": c, "title": t} for c, t in r["unlocked"]],
+            "still_blocked": [{"code": c, "title": t, "missing": m} for c, t, m in r["still_blocked"]],
+        })
+
+    async def health(self, arg: str, params: Dict[str, str]) -> bytes:
+        return _encode({
+            "status": "ok",
+            "db": self.db_path,
+            "schema_version": await self._sql(schema_version),
+            "courses": len(self.index),
+            "index_loads": self.index.loads,
+            "requests": self.requests,
+            "cache_entries": len(self.cache),
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+            "uptime_s": round(time.time() - self.started, 1),
+        })
+
+    async def _chain(self, fn: Callable, arg: str, params: Dict[str, str]) -> bytes:
+        if not arg:
+            raise HttpError(400, "usage: /prerequisites/<code> or /unlocks/<code>")
+        max_depth = self._int(params, "max_depth", None)
+        rows = await self._sql(fn, arg, max_depth)
+        return _encode({
+            "code": arg.upper(),
+            "courses": [{"code": c, "title": self.index.title(c), "depth": d} for c, d in rows],
+        })
+
+    @staticmethod
+    def _int(params: Dict[str, str], name: str, default):
+        value = params.get(name)
+        if value in (None, ""):
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            raise HttpError(400, f"{name} must be an integer")
+
+    async def _sql(self, fn: Callable, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.pool.run, fn, *args)
+
+    # -- dispatch ------------------------------------------------------
+    async def handle(self, method: str, target: str) -> Tuple[int, bytes]:
+        self.requests += 1
+        if method not in ("GET", "HEAD"):
+            return 405, _encode({"error": "only GET is supported"})
+        url = urlsplit(target)
+        parts = [unquote(p) for p in url.path.split("/") if p]
+        route = self._routes.get(parts[0] if parts else "health")
+        if route is None:
+            return 404, _encode({"error": f"no endpoint {url.path}", "endpoints": sorted(self._routes)})
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            return 200, await route(parts[1] if len(parts) > 1 else "", params)
+        except HttpError as e:
+            return e.status, _encode({"error": str(e)})
+        except Exception as e:  # pragma: no cover - reported to the client
+            return 500, _encode({"error": f"{type(e).__name__}: {e}"})
+
+    async def watch(self, verbose: bool = False) -> None:
+        """Reload the index and pool once a changed DB file stops changing
+        and no build-db run is still writing it."""
+        loop = asyncio.get_running_loop()
+        pending = None
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            if not self.index.changed():
+                pending = None
+                continue
+            signature = self.index.file_signature()
+            if signature != pending:
+                # Still being written; look again next interval
+                pending = signature
+                continue
+            try:
+                if await self._sql(build_state) == "building":
+                    # Batches are committed as the build goes (and a reset
+                    # starts from empty tables): wait for the complete mark
+                    continue
+                t0 = time.perf_counter()
+                await loop.run_in_executor(self.executor, self.index.reload)
+                self.pool.reset()
+                self.cache.clear()
+                if verbose:
+                    print(f"[serve] reloaded {self.db_path} ({len(self.index)} courses, {time.perf_counter() - t0:.2f}s)")
+            except Exception as e:
+                # Mid-rebuild or temporarily missing: keep serving the old data
+                print(f"[serve] reload failed, keeping previous data: {e}")
+            pending = None
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False)
+        self.pool.close()
+
+
+async def _serve_connection(service: CourseService, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except asyncio.LimitOverrunError:
+                writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                break
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            lines = head.decode("latin-1").split("\r\n")
+            try:
+                method, target, version = lines[0].split(" ", 2)
+            except ValueError:
+                writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                break
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(":")
+                if name:
+                    headers[name.strip().lower()] = value.strip()
+            try:
+                length = int(headers.get("content-length") or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                break
+            if length:
+                # Bodies are not used by any endpoint; drain them
+                await reader.readexactly(length)
+            conn_header = headers.get("connection", "").lower()
+            keep_alive = conn_header != "close" if version == "HTTP/1.1" else conn_header == "keep-alive"
+
+            status, body = await service.handle(method, target)
+            head_out = (
+                f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                "Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+            ).encode("latin-1")
+            writer.write(head_out if method == "HEAD" else head_out + body)
+            await writer.drain()
+            if not keep_alive:
+                break
+    finally:
+        try:
+            writer.close()
+            await writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+
+async def serve(
+    db_path: str,
+    host: str = "127.0.0.1",
+    port: int = DEFAULT_PORT,
+    pool_size: int = 4,
+    cache_size: int = 4096,
+    reload_interval: float = 1.0,
+    verbose: bool = False,
+    ready: Optional[Callable[[Tuple[str, int]], None]] = None,
+) -> None:
+    """Run the query service until cancelled.
+
+    Args:
+        db_path: database file
+        host, port: listen address (port 0 picks a free port)
+        pool_size: read-only connections / worker threads for SQL queries
+        cache_size: cached availability responses
+        reload_interval: seconds between checks of the DB file
+        verbose: log reloads
+        ready: called with the bound (host, port) once listening
+    """
+    service = CourseService(db_path, pool_size=pool_size, cache_size=cache_size, reload_interval=reload_interval)
+    server = await asyncio.start_server(
+        lambda r, w: _serve_connection(service, r, w), host, port, limit=MAX_HEADER_BYTES, backlog=1024
+    )
+    address = server.sockets[0].getsockname()[:2]
+    print(f"[serve] {len(service.index)} courses from {db_path} on http://{address[0]}:{address[1]}/")
+    if ready:
+        ready(address)
+    watcher = asyncio.create_task(service.watch(verbose))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        watcher.cancel()
+        service.close()
+
+
+__all__ = ["serve", "CourseService", "ConnectionPool", "ResponseCache", "DEFAULT_PORT"]
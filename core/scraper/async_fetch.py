@@ -0,0 +1,216 @@
+"""Asyncio-based HTML fetch engine.
+
+One event loop drives many course-page downloads over a single pooled
+keep-alive client instead of one thread (and one TCP/TLS handshake) per page.
+Retry and timeout semantics mirror ``core.scraper.http.fetch_html``.
+
+aiohttp is used when installed; otherwise requests are issued on a shared
+``requests.Session`` from a thread pool sized to ``concurrency`` (with a
+RuntimeWarning), so behaviour is the same, just thread-based instead of
+non-blocking sockets.
+"""
+import asyncio
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import requests
+
+from core.scraper.cache import (
+    conditional_headers,
+    maybe_read_cache,
+    read_cache_meta,
+    validators_from_headers,
+    write_cache,
+    write_cache_meta,
+)
+from core.scraper.http import DEFAULT_HEADERS, POOL_STATS, new_session
+from core.scraper.ratelimit import (
+    acquire_slot_async,
+    rate_limited,
+    release_slot,
+    retry_after_from_exception,
+    retry_after_seconds,
+    status_from_exception,
+)
+
+try:
+    import aiohttp  # type: ignore
+except ImportError:  # pragma: no cover
+    aiohttp = None  # type: ignore
+
+
+class AsyncFetcher:
+    """Fetch many URLs concurrently with a bounded number of in-flight requests.
+
+    Usage:
+        async with AsyncFetcher(concurrency=32) as fetcher:
+            html = await fetcher.fetch(url)
+
+    Args:
+        concurrency: maximum number of requests in flight at once
+        timeout: per-request timeout (seconds)
+        retries: attempts per URL before giving up
+        delay: polite delay after each successful request
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency: int = 8,
+        timeout: float = 15.0,
+        retries: int = 3,
+        delay: float = 0.0,
+    ) -> None:
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.retries = max(1, retries)
+        self.delay = delay
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._client = None
+        self._session: Optional[requests.Session] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def __aenter__(self) -> "AsyncFetcher":
+        self._sem = asyncio.Semaphore(self.concurrency)
+        if aiohttp is not None:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=30)
+            self._client = aiohttp.ClientSession(
+                headers=DEFAULT_HEADERS,
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        else:
+            warnings.warn(
+                "aiohttp is not installed; --async-fetch falls back to a thread pool "
+                f"of {self.concurrency} blocking requests",
+                RuntimeWarning,
+                stacklevel=2,
+            )
+            self._session = new_session(self.concurrency)
+            # The loop's default executor has min(32, cpus + 4) threads,
+            # which would cap in-flight requests below ``concurrency``
+            self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="async-fetch")
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def _get_once(self, url: str, headers: Optional[Dict[str, str]] = None) -> Tuple[int, str, Dict[str, str]]:
+        if self._client is not None:
+            async with self._client.get(url, headers=headers) as resp:
+                resp.raise_for_status()
+                text = "" if resp.status == 304 else await resp.text()
+                return resp.status, text, dict(resp.headers)
+        loop = asyncio.get_running_loop()
+        req_headers = dict(DEFAULT_HEADERS)
+        if headers:
+            req_headers.update(headers)
+
+        def _blocking_get() -> Tuple[int, str, Dict[str, str]]:
+            resp = self._session.get(url, headers=req_headers, timeout=self.timeout)
+            resp.raise_for_status()
+            return resp.status_code, resp.text, dict(resp.headers)
+
+        return await loop.run_in_executor(self._executor, _blocking_get)
+
+    async def fetch_response(self, url: str, headers: Optional[Dict[str, str]] = None) -> Tuple[int, str, Dict[str, str]]:
+        """Fetch one URL, retrying with the same backoff as ``fetch_html``.
+
+        Returns:
+            (status, text, response headers); 304 yields an empty text
+        """
+        if self._sem is None:
+            raise RuntimeError("AsyncFetcher must be used as 'async with AsyncFetcher(...)'")
+        for attempt in range(1, self.retries + 1):
+            try:
+                async with self._sem:
+                    started = await acquire_slot_async()
+                    try:
+                        result = await self._get_once(url, headers)
+                    except Exception as e:
+                        release_slot(started, status_from_exception(e), retry_after_from_exception(e))
+                        raise
+                    release_slot(started, result[0], result[2].get("Retry-After"))
+                if self.delay and not rate_limited():
+                    await asyncio.sleep(self.delay)
+                return result
+            except Exception as e:
+                if attempt < self.retries:
+                    pause = retry_after_seconds(status_from_exception(e), retry_after_from_exception(e))
+                    await asyncio.sleep(max(min(1.0 * attempt, 3.0), pause or 0.0))
+                else:
+                    raise
+        raise RuntimeError(f"unreachable: {url}")  # pragma: no cover
+
+    async def fetch(self, url: str) -> str:
+        """Fetch one URL and return its text."""
+        _, text, _ = await self.fetch_response(url)
+        return text
+
+    async def fetch_cached(self, url: str, cache_dir: Optional[str], revalidate: bool = False) -> str:
+        """Async counterpart of ``core.scraper.http.fetch_html_cached``."""
+        cached = maybe_read_cache(cache_dir, url, stale=revalidate)
+        if cached is not None and not revalidate:
+            return cached
+        meta = read_cache_meta(cache_dir, url) if cached is not None else {}
+        status, text, headers = await self.fetch_response(url, conditional_headers(meta))
+        if status == 304 and cached is not None:
+            POOL_STATS.record_not_modified()
+            write_cache_meta(cache_dir, url, {**meta, **validators_from_headers(headers)})
+            return cached
+        if status == 304:
+            # Nothing to serve it from; never cache the empty body
+            raise requests.HTTPError(f"304 Not Modified without a cached copy: {url}")
+        write_cache(cache_dir, url, text, validators_from_headers(headers))
+        return text
+
+    async def fetch_many(
+        self,
+        urls: Iterable[str],
+        cache_dir: Optional[str] = None,
+        revalidate: bool = False,
+    ) -> Dict[str, Union[str, Exception]]:
+        """Fetch all URLs (through the cache when cache_dir is set).
+
+        Failures are returned as the exception instead of raised.
+        """
+        url_list: List[str] = list(dict.fromkeys(urls))
+        results = await asyncio.gather(
+            *(self.fetch_cached(u, cache_dir, revalidate) for u in url_list),
+            return_exceptions=True,
+        )
+        return dict(zip(url_list, results))
+
+
+def fetch_many(
+    urls: Iterable[str],
+    *,
+    concurrency: int = 8,
+    timeout: float = 15.0,
+    retries: int = 3,
+    delay: float = 0.0,
+    cache_dir: Optional[str] = None,
+    revalidate: bool = False,
+) -> Dict[str, Union[str, Exception]]:
+    """Synchronous entry point: fetch all URLs on a private event loop.
+
+    Returns:
+        mapping url -> HTML text, or the exception raised for that URL
+    """
+    async def _run() -> Dict[str, Union[str, Exception]]:
+        async with AsyncFetcher(concurrency=concurrency, timeout=timeout, retries=retries, delay=delay) as fetcher:
+            return await fetcher.fetch_many(urls, cache_dir=cache_dir, revalidate=revalidate)
+
+    return asyncio.run(_run())
+
+
+__all__ = ["AsyncFetcher", "fetch_many"]
@@ -1,47 +1,430 @@
-"""HTML caching utilities for scraper."""
+"""HTML caching utilities for scraper.
+
+Pages are stored in a content-addressed, compressed object store under
+``cache_dir``:
+
+    cache_dir/index.jsonl            one JSON line per write (last line wins)
+    cache_dir/objects/ab/<sha>.gz    compressed bodies named by content hash
+
+The index maps a hash of the normalized URL to the body hash, size, fetch
+time, status and response validators, so identical bodies are stored once
+and cache-wide operations (stats, warm checks) never scan the object
+directory. Several processes may share a cache directory: index appends,
+compaction and pruning hold ``cache_dir/index.lock``, and pruning leaves
+temporary files and recently written objects alone, since a writer stores
+the object before its index line. zstd is used when the ``zstandard`` package is installed,
+gzip otherwise. Pages cached by the older one-``.html``-file-per-URL layout
+are still read and migrated into the store on first access.
+
+If ``cache_dir`` names a ``.sqlite`` / ``.sqlite3`` / ``.db`` file, the
+single-file backend in ``core.scraper.sqlite_cache`` is used instead.
+"""
+import gzip
+import hashlib
+import json
 import os
-from typing import Optional
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import formatdate
+from typing import Dict, Iterable, Mapping, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+try:
+    import zstandard  # type: ignore
+except ImportError:  # pragma: no cover
+    zstandard = None  # type: ignore
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore
+    import msvcrt
+
+INDEX_FILE = "index.jsonl"
+LOCK_FILE = "index.lock"
+OBJECTS_DIR = "objects"
+# Objects younger than this are never pruned: a writer may not have
+# appended their index line yet
+PRUNE_GRACE = 60.0
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form used for cache keys (lower-case scheme/host, no fragment)."""
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", parts.query, ""))
+
+
+def url_key(url: str) -> str:
+    return hashlib.sha1(normalize_url(url).encode("utf-8")).hexdigest()
+
+
+def _compress(data: bytes) -> bytes:
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress(path: str, data: bytes) -> bytes:
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read " + path)
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+class HtmlStore:
+    """Content-addressed, compressed HTML store with an append-only index."""
+
+    def __init__(self, cache_dir: str, *, ttl: Optional[float] = None) -> None:
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.index_path = os.path.join(cache_dir, INDEX_FILE)
+        self.objects_dir = os.path.join(cache_dir, OBJECTS_DIR)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._lock_fd = os.open(os.path.join(cache_dir, LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+        with self._lock, self._file_lock():
+            self._load_index()
+
+    # -- index ---------------------------------------------------------
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock on the index shared with other processes (hold ``_lock`` first)."""
+        if fcntl is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        else:  # pragma: no cover
+            os.lseek(self._lock_fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._lock_fd, msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+            else:  # pragma: no cover
+                os.lseek(self._lock_fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._lock_fd, msvcrt.LK_UNLCK, 1)
+
+    def _load_index(self) -> None:
+        """Read the index file (last line wins); called with the file lock held."""
+        lines = 0
+        entries: Dict[str, Dict] = {}
+        if os.path.isfile(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue
+                    if rec.get("key"):
+                        entries[rec["key"]] = rec
+        self._entries = entries
+        if lines > 2 * len(self._entries) + 100:
+            self._compact()
+
+    def _append(self, rec: Dict) -> None:
+        with self._file_lock(), open(self.index_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def _compact(self) -> None:
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for rec in self._entries.values():
+                f.write(json.dumps(rec, ensure_ascii=False, separators=(",", ":")) + "\n")
+        os.replace(tmp, self.index_path)
+
+    # -- objects -------------------------------------------------------
+    def _object_path(self, sha: str, codec: str) -> str:
+        return os.path.join(self.objects_dir, sha[:2], f"{sha}.{codec}")
+
+    def _legacy_path(self, url: str) -> str:
+        key = url.replace("https://", "").replace("http://", "").replace("/", "_")
+        return os.path.join(self.cache_dir, key + ".html")
+
+    # -- public API ----------------------------------------------------
+    def get_entry(self, url: str) -> Optional[Dict]:
+        """Index record for a URL (sha, size, fetched_at, status, validators)."""
+        return self._entries.get(url_key(url))
+
+    def contains(self, url: str) -> bool:
+        return url_key(url) in self._entries
+
+    def _live(self, entry: Optional[Dict]) -> bool:
+        if entry is None:
+            return False
+        return not self.ttl or time.time() - entry.get("fetched_at", 0) <= self.ttl
+
+    def get(self, url: str, *, stale: bool = False) -> Optional[str]:
+        """Cached HTML for a URL; ``stale`` also returns entries past the TTL."""
+        entry = self.get_entry(url)
+        if entry is not None and not stale and not self._live(entry):
+            return None
+        if entry is None:
+            legacy = self._legacy_path(url)
+            if os.path.isfile(legacy):
+                try:
+                    with open(legacy, "r", encoding="utf-8") as f:
+                        html = f.read()
+                except Exception:
+                    return None
+                self.put(url, html)
+                return html
+            return None
+        path = self._object_path(entry["sha"], entry.get("codec", "gz"))
+        try:
+            with open(path, "rb") as f:
+                return _decompress(path, f.read()).decode("utf-8")
+        except Exception:
+            return None
+
+    def put(self, url: str, html: str, *, status: int = 200, validators: Optional[Mapping[str, str]] = None) -> Dict:
+        raw = html.encode("utf-8")
+        sha = hashlib.sha256(raw).hexdigest()
+        codec = "zst" if zstandard is not None else "gz"
+        existing = next(
+            (p for p in (self._object_path(sha, c) for c in ("zst", "gz")) if os.path.isfile(p)),
+            None,
+        )
+        if existing is None:
+            path = self._object_path(sha, codec)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            blob = _compress(raw)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(blob)
+            os.replace(tmp, path)
+            stored = len(blob)
+        else:
+            codec = existing.rsplit(".", 1)[1]
+            stored = os.path.getsize(existing)
+            try:
+                # Fresh mtime keeps a concurrent prune from deleting it before the index line lands
+                os.utime(existing)
+            except OSError:
+                pass
+        with self._lock:
+            rec = {
+                "key": url_key(url),
+                "url": url,
+                "sha": sha,
+                "codec": codec,
+                "size": len(raw),
+                "stored": stored,
+                "fetched_at": time.time(),
+                "status": status,
+            }
+            rec.update({k: v for k, v in (validators or {}).items() if k in ("etag", "last_modified") and v})
+            self._entries[rec["key"]] = rec
+            self._append(rec)
+            return rec
+
+    def touch(self, url: str, *, status: int = 304, validators: Optional[Mapping[str, str]] = None) -> None:
+        """Refresh fetch time (and validators) of an entry after a revalidation."""
+        with self._lock:
+            entry = self._entries.get(url_key(url))
+            if entry is None:
+                return
+            rec = dict(entry)
+            rec["fetched_at"] = time.time()
+            rec["status"] = status
+            rec.update({k: v for k, v in (validators or {}).items() if k in ("etag", "last_modified") and v})
+            self._entries[rec["key"]] = rec
+            self._append(rec)
+
+    def get_many(self, urls: Iterable[str]) -> Dict[str, str]:
+        """Return {url: html} for every given URL that is cached."""
+        out: Dict[str, str] = {}
+        for u in urls:
+            html = self.get(u)
+            if html is not None:
+                out[u] = html
+        return out
+
+    def warm(self, urls: Iterable[str]) -> Dict[str, bool]:
+        """Which of the given URLs are already cached (index lookup only)."""
+        return {u: self._live(self._entries.get(url_key(u))) for u in urls}
+
+    def stats(self) -> Dict[str, int]:
+        shas = {e["sha"]: e.get("stored", 0) for e in self._entries.values()}
+        return {
+            "entries": len(self._entries),
+            "objects": len(shas),
+            "raw_bytes": sum(e.get("size", 0) for e in self._entries.values()),
+            "stored_bytes": sum(shas.values()),
+        }
+
+    def prune(self, max_age: Optional[float] = None) -> int:
+        """Drop entries older than max_age seconds and delete unreferenced objects.
 
+        The index is re-read under the file lock first, so entries other
+        processes appended are kept. Temporary files and objects modified
+        less than PRUNE_GRACE seconds before the prune started are skipped.
 
-def maybe_read_cache(cache_dir: Optional[str], url: str) -> Optional[str]:
+        Returns:
+            number of index entries removed
+        """
+        now = time.time()
+        with self._lock, self._file_lock():
+            self._load_index()
+            removed = [
+                k for k, e in self._entries.items()
+                if max_age is not None and now - e.get("fetched_at", 0) > max_age
+            ]
+            for k in removed:
+                self._entries.pop(k, None)
+            live = {(e["sha"], e.get("codec", "gz")) for e in self._entries.values()}
+            for sub in os.listdir(self.objects_dir):
+                sub_dir = os.path.join(self.objects_dir, sub)
+                if not os.path.isdir(sub_dir):
+                    continue
+                for name in os.listdir(sub_dir):
+                    sha, _, codec = name.partition(".")
+                    if (sha, codec) in live or name.endswith(".tmp"):
+                        continue
+                    path = os.path.join(sub_dir, name)
+                    try:
+                        if os.path.getmtime(path) >= now - PRUNE_GRACE:
+                            continue
+                        os.remove(path)
+                    except OSError:
+                        pass
+            self._compact()
+            return len(removed)
+
+
+_stores: Dict[str, object] = {}
+_stores_lock = threading.Lock()
+_cache_ttl: Optional[float] = None
+_cache_max_bytes: Optional[int] = None
+
+
+def configure_cache(ttl: Optional[float] = None, max_bytes: Optional[int] = None) -> None:
+    """Set entry TTL (seconds) and, for SQLite caches, the stored-bytes cap.
+
+    Applies to caches opened after the call; 0 or None disables each limit.
+    """
+    global _cache_ttl, _cache_max_bytes
+    _cache_ttl = ttl or None
+    _cache_max_bytes = int(max_bytes) if max_bytes else None
+
+
+def open_cache(cache_dir: str):
+    """Return the shared store for a cache path (one instance per path).
+
+    Returns:
+        SqliteHtmlCache for *.sqlite / *.sqlite3 / *.db paths, else HtmlStore
+    """
+    from core.scraper.sqlite_cache import SQLITE_SUFFIXES, SqliteHtmlCache
+
+    path = os.path.abspath(cache_dir)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            if path.lower().endswith(SQLITE_SUFFIXES):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                store = SqliteHtmlCache(path, ttl=_cache_ttl, max_bytes=_cache_max_bytes)
+            else:
+                store = HtmlStore(path, ttl=_cache_ttl)
+            _stores[path] = store
+        return store
+
+
+def prefetch_cache(cache_dir: Optional[str], urls: Iterable[str]) -> Dict[str, str]:
+    """Bulk cache lookup: {url: html} for all given URLs that are cached."""
+    if not cache_dir:
+        return {}
+    return open_cache(cache_dir).get_many(urls)
+
+
+def maybe_read_cache(cache_dir: Optional[str], url: str, *, stale: bool = False) -> Optional[str]:
     """Try to read cached HTML for a URL.
-    
+
     Args:
         cache_dir: directory for HTML cache
         url: URL to look up
-        
+        stale: also return an entry past the cache TTL (for revalidation,
+            where the server decides whether it is still current)
+
     Returns:
         Cached HTML content or None if not found
     """
     if not cache_dir:
         return None
-    os.makedirs(cache_dir, exist_ok=True)
-    key = url.replace("https://", "").replace("http://", "").replace("/", "_")
-    path = os.path.join(cache_dir, key + ".html")
-    if os.path.isfile(path):
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                return f.read()
-        except Exception:
-            return None
-    return None
+    return open_cache(cache_dir).get(url, stale=stale)
 
 
-def write_cache(cache_dir: Optional[str], url: str, html: str) -> None:
+def write_cache(
+    cache_dir: Optional[str],
+    url: str,
+    html: str,
+    validators: Optional[Mapping[str, str]] = None,
+    status: int = 200,
+) -> None:
     """Write HTML content to cache.
-    
+
     Args:
         cache_dir: directory for HTML cache
         url: URL key
         html: HTML content to cache
+        validators: response validators (etag / last_modified) to store
+            alongside the page for later conditional requests
+        status: HTTP status the body was received with
+    """
+    if not cache_dir:
+        return
+    try:
+        open_cache(cache_dir).put(url, html, status=status, validators=validators)
+    except Exception:
+        pass
+
+
+def read_cache_meta(cache_dir: Optional[str], url: str) -> Dict[str, str]:
+    """Read stored validators for a cached URL.
+
+    Returns:
+        dict with optional keys etag, last_modified, fetched_at (empty if none)
     """
+    if not cache_dir:
+        return {}
+    entry = open_cache(cache_dir).get_entry(url)
+    if not entry:
+        return {}
+    meta = {k: entry[k] for k in ("etag", "last_modified") if entry.get(k)}
+    meta["fetched_at"] = formatdate(entry.get("fetched_at", 0), usegmt=True)
+    return meta
+
+
+def write_cache_meta(cache_dir: Optional[str], url: str, validators: Mapping[str, str]) -> None:
+    """Store validators for a cached URL and stamp the fetch time."""
     if not cache_dir:
         return
-    os.makedirs(cache_dir, exist_ok=True)
-    key = url.replace("https://", "").replace("http://", "").replace("/", "_")
-    path = os.path.join(cache_dir, key + ".html")
     try:
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(html)
+        open_cache(cache_dir).touch(url, validators=validators)
     except Exception:
         pass
+
+
+def validators_from_headers(headers: Mapping[str, str]) -> Dict[str, str]:
+    """Extract ETag / Last-Modified from response headers (any name case)."""
+    out: Dict[str, str] = {}
+    # aiohttp headers copied into a dict keep the server's spelling ("Etag")
+    lower = {k.lower(): v for k, v in headers.items()}
+    etag = lower.get("etag")
+    last_modified = lower.get("last-modified")
+    if etag:
+        out["etag"] = etag
+    if last_modified:
+        out["last_modified"] = last_modified
+    return out
+
+
+def conditional_headers(meta: Mapping[str, str]) -> Dict[str, str]:
+    """Build If-None-Match / If-Modified-Since headers from stored validators."""
+    headers: Dict[str, str] = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    return headers
@@ -1,26 +1,228 @@
+import threading
 import time
-from typing import Optional
+from typing import Dict, Optional
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from core.scraper.ratelimit import acquire_slot, rate_limited, release_slot, retry_after_seconds
+from core.scraper.cache import (
+    conditional_headers,
+    maybe_read_cache,
+    read_cache_meta,
+    validators_from_headers,
+    write_cache,
+    write_cache_meta,
+)
+
+try:  # brotli decoding is only advertised when urllib3 can decode it
+    import brotli  # type: ignore  # noqa: F401
+    _ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:  # pragma: no cover
+    try:
+        import brotlicffi  # type: ignore  # noqa: F401
+        _ACCEPT_ENCODING = "gzip, deflate, br"
+    except ImportError:
+        _ACCEPT_ENCODING = "gzip, deflate"
 
 DEFAULT_HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
     "Accept-Language": "en-US,en;q=0.9,zh-CN;q=0.8,zh;q=0.7",
+    "Accept-Encoding": _ACCEPT_ENCODING,
+    "Connection": "keep-alive",
 }
 
-def fetch_html(url: str, *, timeout: float = 15.0, retries: int = 3, delay: float = 0.0, session: Optional[requests.Session] = None) -> str:
-    sess = session or requests.Session()
+
+class ConnectionStats:
+    """Thread-safe counters for requests sent vs TCP connections opened."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.opened = 0
+        self.not_modified = 0
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def record_open(self) -> None:
+        with self._lock:
+            self.opened += 1
+
+    def record_not_modified(self) -> None:
+        with self._lock:
+            self.not_modified += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.opened = 0
+            self.not_modified = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "connections_opened": self.opened,
+                "connections_reused": max(0, self.requests - self.opened),
+                "not_modified": self.not_modified,
+            }
+
+
+POOL_STATS = ConnectionStats()
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        POOL_STATS.record_open()
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        POOL_STATS.record_open()
+        return super()._new_conn()
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools report into POOL_STATS."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        POOL_STATS.record_request()
+        return super().send(request, **kwargs)
+
+
+_pool_size = 4
+_local = threading.local()
+
+
+def configure_session_pool(pool_size: int) -> None:
+    """Size the per-thread adapters (usually to the configured concurrency).
+
+    Sessions created before this call keep their old size; it is meant to be
+    called once at the start of a scrape.
+    """
+    global _pool_size
+    _pool_size = max(1, int(pool_size))
+
+
+def new_session(pool_size: Optional[int] = None) -> requests.Session:
+    """Create a keep-alive session with a PooledAdapter mounted for http/https."""
+    size = pool_size or _pool_size
+    sess = requests.Session()
+    sess.headers.update(DEFAULT_HEADERS)
+    adapter = PooledAdapter(pool_connections=size, pool_maxsize=size)
+    sess.mount("http://", adapter)
+    sess.mount("https://", adapter)
+    return sess
+
+
+def get_session() -> requests.Session:
+    """Return the calling thread's long-lived session, creating it on first use."""
+    sess = getattr(_local, "session", None)
+    if sess is None:
+        sess = new_session()
+        _local.session = sess
+    return sess
+
+
+def get_pool_stats() -> Dict[str, int]:
+    """Counters for requests sent, connections opened and connections reused."""
+    return POOL_STATS.snapshot()
+
+
+def fetch_response(
+    url: str,
+    *,
+    timeout: float = 15.0,
+    retries: int = 3,
+    delay: float = 0.0,
+    session: Optional[requests.Session] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> requests.Response:
+    """GET with retries; 2xx and 304 Not Modified count as success.
+
+    Requests go through the shared limiter in core.scraper.ratelimit; when a
+    global rate is configured it replaces the fixed post-request ``delay``.
+    A 429/503 with Retry-After waits at least that long before the retry.
+    """
+    sess = session or get_session()
+    req_headers = dict(DEFAULT_HEADERS)
+    if headers:
+        req_headers.update(headers)
     last_exc = None
     for attempt in range(1, retries + 1):
+        status = None
+        retry_after = None
         try:
-            resp = sess.get(url, headers=DEFAULT_HEADERS, timeout=timeout)
+            started = acquire_slot()
+            try:
+                resp = sess.get(url, headers=req_headers, timeout=timeout)
+                status = resp.status_code
+                retry_after = resp.headers.get("Retry-After")
+            finally:
+                release_slot(started, status, retry_after)
             resp.raise_for_status()
-            if delay:
+            if delay and not rate_limited():
                 time.sleep(delay)
-            return resp.text
+            return resp
         except Exception as e:
             last_exc = e
             if attempt < retries:
-                time.sleep(min(1.0 * attempt, 3.0))
+                time.sleep(max(min(1.0 * attempt, 3.0), retry_after_seconds(status, retry_after) or 0.0))
             else:
                 raise
     raise last_exc  # type: ignore
+
+
+def fetch_html(url: str, *, timeout: float = 15.0, retries: int = 3, delay: float = 0.0, session: Optional[requests.Session] = None) -> str:
+    return fetch_response(url, timeout=timeout, retries=retries, delay=delay, session=session).text
+
+
+def fetch_html_cached(
+    url: str,
+    cache_dir: Optional[str],
+    *,
+    revalidate: bool = False,
+    timeout: float = 15.0,
+    retries: int = 3,
+    delay: float = 0.0,
+    session: Optional[requests.Session] = None,
+) -> str:
+    """Return HTML for a URL, going through the on-disk cache.
+
+    Without ``revalidate`` a cached page is returned as-is. With it, the
+    stored ETag / Last-Modified are sent as If-None-Match / If-Modified-Since
+    and a 304 response is served from the cache; a 200 replaces the entry.
+    Entries past the cache TTL are revalidated too rather than refetched.
+    """
+    cached = maybe_read_cache(cache_dir, url, stale=revalidate)
+    if cached is not None and not revalidate:
+        return cached
+    meta = read_cache_meta(cache_dir, url) if cached is not None else {}
+    resp = fetch_response(
+        url,
+        timeout=timeout,
+        retries=retries,
+        delay=delay,
+        session=session,
+        headers=conditional_headers(meta),
+    )
+    if resp.status_code == 304 and cached is not None:
+        POOL_STATS.record_not_modified()
+        write_cache_meta(cache_dir, url, {**meta, **validators_from_headers(resp.headers)})
+        return cached
+    if resp.status_code == 304:
+        # Nothing to serve it from; never cache the empty body
+        raise requests.HTTPError(f"304 Not Modified without a cached copy: {url}", response=resp)
+    html = resp.text
+    write_cache(cache_dir, url, html, validators_from_headers(resp.headers))
+    return html
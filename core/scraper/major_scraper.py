@@ -1,13 +1,11 @@
 """Scraping orchestration for major pages."""
-import os
 import sys
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
 
-import requests
-
-from core.scraper.http import fetch_html
-from core.scraper.cache import maybe_read_cache, write_cache
-from core.dp_build.parsers import parse_major_page
+from core.scraper.ratelimit import configure_rate_limit, current_limit
+from core.scraper.http import configure_session_pool, fetch_html_cached, get_pool_stats
+from core.dp_build.parsers import collect_course_codes, fetch_courses, parse_major_page
 from core.dp_build.models import MajorPage
 
 
@@ -20,10 +18,21 @@ def scrape_major_pages(
     verbose: bool = False,
     include_courses: bool = False,
     concurrency: int = 1,
-    cache_dir: Optional[str] = None
+    cache_dir: Optional[str] = None,
+    async_fetch: bool = False,
+    revalidate: bool = False,
+    rate_limit: Optional[float] = None,
+    burst: int = 1,
+    adaptive: bool = False,
+    parse_workers: int = 1
 ) -> List[MajorPage]:
     """Scrape one or more major curriculum pages.
     
+    Major pages are fetched and parsed in parallel first; with
+    include_courses the course codes of all majors are then unioned so
+    each course page is fetched and parsed exactly once and the same
+    record is attached to every major that lists it.
+    
     Args:
         urls: list of major page URLs to scrape
         delay: delay between requests
@@ -33,40 +42,68 @@ def scrape_major_pages(
         include_courses: also fetch course detail pages
         concurrency: number of concurrent workers for course fetching
         cache_dir: directory for HTML cache
+        async_fetch: fetch course pages on an asyncio event loop (AsyncFetcher)
+        revalidate: revalidate cached pages with If-None-Match / If-Modified-Since
+        rate_limit: aggregate requests/sec across all workers (replaces delay)
+        burst: requests allowed back-to-back under rate_limit
+        adaptive: shrink/grow in-flight requests on 429/5xx and latency
+        parse_workers: processes for parsing course pages (1 = in-process, 0 = all cores)
         
     Returns:
         List of MajorPage objects
     """
-    session = requests.Session()
-    results: List[MajorPage] = []
+    configure_session_pool(concurrency)
+    configure_rate_limit(rate_limit, burst, adaptive=adaptive, concurrency=concurrency)
+    
+    def scrape_one(u: str) -> MajorPage:
+        html = fetch_html_cached(u, cache_dir, revalidate=revalidate, timeout=timeout, retries=retries, delay=delay)
+        return parse_major_page(u, html, cache_dir=cache_dir)
     
-    for i, u in enumerate(urls, 1):
+    # Stage 1: fetch and parse every major page (in parallel)
+    pages: Dict[str, MajorPage] = {}
+    workers = max(1, min(concurrency, len(urls)))
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        future_map = {ex.submit(scrape_one, u): u for u in urls}
+        for fut in as_completed(future_map):
+            u = future_map[fut]
+            try:
+                pages[u] = fut.result()
+                if verbose:
+                    print(f"[{len(pages)}/{len(urls)}] Parsed {u}")
+            except Exception as e:
+                print(f"Error {u}: {e}", file=sys.stderr)
+    results: List[MajorPage] = [pages[u] for u in urls if u in pages]
+    
+    # Stage 2: fetch and parse each course once, shared by every major listing it
+    if include_courses and results:
+        codes_by_major = {mp.url: collect_course_codes(mp.structure_tables) for mp in results}
+        all_codes = sorted({c for codes in codes_by_major.values() for c in codes})
         if verbose:
-            print(f"[{i}/{len(urls)}] Fetching {u}")
-        
-        try:
-            html = maybe_read_cache(cache_dir, u)
-            if html is None:
-                html = fetch_html(u, timeout=timeout, retries=retries, delay=delay, session=session)
-                write_cache(cache_dir, u, html)
-            
-            mp = parse_major_page(
-                u,
-                html,
-                include_courses=include_courses,
-                session=session,
+            total = sum(len(codes) for codes in codes_by_major.values())
+            print(f"[courses] {len(all_codes)} unique courses across {len(results)} majors ({total} listed)")
+        by_code = {
+            c["course_code"]: c
+            for c in fetch_courses(
+                all_codes,
                 delay=delay,
                 timeout=timeout,
                 retries=retries,
                 verbose=verbose,
                 concurrency=concurrency,
                 cache_dir=cache_dir,
+                async_fetch=async_fetch,
+                revalidate=revalidate,
+                parse_workers=parse_workers,
             )
-            results.append(mp)
-            
-            if verbose:
-                print(f"  -> {mp.program_title or 'N/A'} tables={len(mp.structure_tables)} courses={len(mp.courses)}")
-        except Exception as e:
-            print(f"Error {u}: {e}", file=sys.stderr)
+        }
+        for mp in results:
+            mp.courses = [by_code[c] for c in codes_by_major[mp.url] if c in by_code]
     
+    if verbose:
+        for mp in results:
+            print(f"  -> {mp.program_title or 'N/A'} tables={len(mp.structure_tables)} courses={len(mp.courses)}")
+        stats = get_pool_stats()
+        print(f"[http] requests={stats['requests']} connections opened={stats['connections_opened']} reused={stats['connections_reused']} not_modified={stats['not_modified']}")
+        if adaptive:
+            print(f"[http] adaptive concurrency settled at {current_limit()}")
     return results
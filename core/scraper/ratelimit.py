@@ -0,0 +1,241 @@
+"""Request pacing shared by every fetch path.
+
+``TokenBucket`` caps the aggregate request rate (requests/sec plus burst)
+across all worker threads and the asyncio fetcher. ``AdaptiveConcurrency``
+is an AIMD controller on the number of requests in flight: it halves the
+limit on 429/5xx/errors or when latency climbs well above the best seen,
+and adds one slot after each window of healthy responses.
+
+Both are installed process-wide with ``configure_rate_limit`` and used via
+``acquire_slot`` / ``release_slot`` (or their async variants). A 429/503
+Retry-After (seconds or HTTP date, see ``retry_after_seconds``) pauses the
+bucket when one is installed; the fetchers also wait for it before
+retrying, limiter or not.
+"""
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Mapping, Optional
+
+# Longest Retry-After honoured (seconds)
+MAX_RETRY_AFTER = 60.0
+
+
+class TokenBucket:
+    """Thread-safe token bucket.
+
+    Args:
+        rate: tokens added per second
+        burst: bucket capacity (requests allowed back-to-back)
+    """
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token and return how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1.0
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def pause(self, seconds: float) -> None:
+        """Hold all requests for the given time (e.g. a Retry-After header)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def acquire(self) -> None:
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class AdaptiveConcurrency:
+    """AIMD limit on in-flight requests.
+
+    Args:
+        initial: starting limit
+        minimum / maximum: bounds for the limit
+        latency_factor: shrink when smoothed latency exceeds this multiple
+            of the best smoothed latency observed
+    """
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: Optional[int] = None, latency_factor: float = 2.0) -> None:
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum or initial)
+        self.limit = min(self.maximum, max(self.minimum, initial))
+        self.latency_factor = latency_factor
+        self.in_flight = 0
+        self._ewma: Optional[float] = None
+        self._best: Optional[float] = None
+        self._healthy = 0
+        self._cond = threading.Condition()
+
+    def try_acquire(self) -> bool:
+        with self._cond:
+            if self.in_flight < self.limit:
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+
+    async def acquire_async(self) -> None:
+        while not self.try_acquire():
+            await asyncio.sleep(0.01)
+
+    def release(self, status: Optional[int], latency: float) -> None:
+        """Return a slot and adjust the limit from the response outcome.
+
+        Args:
+            status: HTTP status, or None when the request raised
+            latency: seconds the request took
+        """
+        with self._cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            self._ewma = latency if self._ewma is None else 0.8 * self._ewma + 0.2 * latency
+            self._best = self._ewma if self._best is None else min(self._best, self._ewma)
+            overloaded = status is None or status == 429 or status >= 500
+            slow = self._ewma > self._best * self.latency_factor
+            if overloaded or slow:
+                self.limit = max(self.minimum, self.limit // 2)
+                self._healthy = 0
+                if slow:
+                    # re-anchor so one slow period does not pin the limit down forever
+                    self._best = self._ewma / self.latency_factor
+            else:
+                self._healthy += 1
+                if self._healthy >= self.limit:
+                    self.limit = min(self.maximum, self.limit + 1)
+                    self._healthy = 0
+            self._cond.notify_all()
+
+
+_bucket: Optional[TokenBucket] = None
+_controller: Optional[AdaptiveConcurrency] = None
+
+
+def configure_rate_limit(
+    rate: Optional[float] = None,
+    burst: int = 1,
+    *,
+    adaptive: bool = False,
+    concurrency: int = 1,
+) -> None:
+    """Install (or clear) the process-wide limiter.
+
+    Args:
+        rate: aggregate requests per second across all workers (None/0 = off)
+        burst: requests allowed back-to-back before pacing kicks in
+        adaptive: enable the AIMD in-flight controller
+        concurrency: upper bound for the adaptive limit
+    """
+    global _bucket, _controller
+    _bucket = TokenBucket(rate, burst) if rate else None
+    _controller = AdaptiveConcurrency(concurrency, maximum=concurrency) if adaptive else None
+
+
+def rate_limited() -> bool:
+    """True when a global token bucket paces requests (fixed delays are skipped)."""
+    return _bucket is not None
+
+
+def current_limit() -> Optional[int]:
+    """Current adaptive in-flight limit, or None when adaptive mode is off."""
+    return _controller.limit if _controller is not None else None
+
+
+def acquire_slot() -> float:
+    """Block until a request may be sent; returns a start timestamp for release_slot."""
+    if _controller is not None:
+        _controller.acquire()
+    if _bucket is not None:
+        _bucket.acquire()
+    return time.monotonic()
+
+
+async def acquire_slot_async() -> float:
+    if _controller is not None:
+        await _controller.acquire_async()
+    if _bucket is not None:
+        await _bucket.acquire_async()
+    return time.monotonic()
+
+
+def retry_after_seconds(status: Optional[int], retry_after: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a 429/503 Retry-After header, capped at MAX_RETRY_AFTER.
+
+    Accepts delta-seconds ("120") and HTTP dates ("Wed, 21 Oct 2015 07:28:00 GMT");
+    None for other statuses or a missing/unparsable header.
+    """
+    if status not in (429, 503) or not retry_after:
+        return None
+    try:
+        seconds = float(retry_after)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(retry_after).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    if seconds != seconds:  # "nan"
+        return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+def release_slot(started: float, status: Optional[int], retry_after: Optional[str] = None) -> None:
+    """Report the outcome of a request started with acquire_slot."""
+    if _controller is not None:
+        _controller.release(status, time.monotonic() - started)
+    pause = retry_after_seconds(status, retry_after)
+    if _bucket is not None and pause:
+        _bucket.pause(pause)
+
+
+def status_from_exception(exc: BaseException) -> Optional[int]:
+    """HTTP status carried by a requests/aiohttp error, if any."""
+    status = getattr(exc, "status", None)
+    if status is None:
+        resp = getattr(exc, "response", None)
+        status = getattr(resp, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def retry_after_from_exception(exc: BaseException) -> Optional[str]:
+    """Retry-After header carried by a requests/aiohttp error, if any."""
+    headers: Optional[Mapping[str, str]] = getattr(exc, "headers", None)
+    if headers is None:
+        headers = getattr(getattr(exc, "response", None), "headers", None)
+    return headers.get("Retry-After") if headers is not None else None
+
+
+__all__ = [
+    "TokenBucket",
+    "AdaptiveConcurrency",
+    "configure_rate_limit",
+    "rate_limited",
+    "current_limit",
+    "acquire_slot",
+    "acquire_slot_async",
+    "release_slot",
+    "retry_after_seconds",
+    "status_from_exception",
+    "retry_after_from_exception",
+]
@@ -0,0 +1,205 @@
+"""Single-file SQLite backend for the HTML cache.
+
+Selected by pointing ``cache_dir`` at a file ending in ``.sqlite``,
+``.sqlite3`` or ``.db`` instead of a directory. All pages live in one WAL
+database with a per-entry TTL and an optional byte cap enforced by
+least-recently-used eviction. It exposes the same methods as
+``core.scraper.cache.HtmlStore`` plus ``get_many`` for bulk lookups.
+"""
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Mapping, Optional
+
+from core.scraper.cache import _compress, _decompress, url_key, zstandard
+
+SQLITE_SUFFIXES = (".sqlite", ".sqlite3", ".db")
+
+# SQLite's default limit on bound parameters is 999 on older builds
+_CHUNK = 500
+
+
+class SqliteHtmlCache:
+    """HTML cache stored in one SQLite file.
+
+    Args:
+        path: database file
+        ttl: seconds an entry stays valid (None = forever)
+        max_bytes: cap on stored (compressed) bytes; least recently used
+            entries are evicted past it (None = unbounded)
+    """
+
+    def __init__(self, path: str, *, ttl: Optional[float] = None, max_bytes: Optional[int] = None) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "key TEXT PRIMARY KEY, "
+            "url TEXT, "
+            "body BLOB, "
+            "codec TEXT, "
+            "size INTEGER, "
+            "stored INTEGER, "
+            "status INTEGER, "
+            "etag TEXT, "
+            "last_modified TEXT, "
+            "fetched_at REAL, "
+            "expires_at REAL, "
+            "last_access REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_last_access ON pages(last_access)")
+        row = self._conn.execute("SELECT COALESCE(SUM(stored), 0) FROM pages").fetchone()
+        self._stored_total = int(row[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _expiry(self, now: float) -> Optional[float]:
+        return now + self.ttl if self.ttl else None
+
+    # -- lookups -------------------------------------------------------
+    def get_entry(self, url: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, size, stored, status, etag, last_modified, fetched_at, expires_at "
+                "FROM pages WHERE key = ?",
+                (url_key(url),),
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ("url", "size", "stored", "status", "etag", "last_modified", "fetched_at", "expires_at")
+        return {k: v for k, v in zip(keys, row) if v is not None}
+
+    def contains(self, url: str) -> bool:
+        return self.warm([url])[url]
+
+    def get(self, url: str, *, stale: bool = False) -> Optional[str]:
+        return self.get_many([url], stale=stale).get(url)
+
+    def get_many(self, urls: Iterable[str], *, stale: bool = False) -> Dict[str, str]:
+        """Bulk lookup: returns {url: html} for every URL with a live entry
+        (or any entry, expired included, when ``stale``)."""
+        by_key = {url_key(u): u for u in urls}
+        if not by_key:
+            return {}
+        now = time.time()
+        out: Dict[str, str] = {}
+        hits: List[str] = []
+        keys = list(by_key)
+        with self._lock:
+            for i in range(0, len(keys), _CHUNK):
+                chunk = keys[i:i + _CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT key, body, codec FROM pages WHERE key IN ({','.join('?' * len(chunk))}) "
+                    "AND (? OR expires_at IS NULL OR expires_at > ?)",
+                    (*chunk, stale, now),
+                ).fetchall()
+                for key, body, codec in rows:
+                    try:
+                        out[by_key[key]] = _decompress("." + codec, body).decode("utf-8")
+                        hits.append(key)
+                    except Exception:
+                        continue
+            if hits:
+                self._conn.executemany("UPDATE pages SET last_access = ? WHERE key = ?", [(now, k) for k in hits])
+        return out
+
+    def warm(self, urls: Iterable[str]) -> Dict[str, bool]:
+        """Which of the given URLs have a live entry, checked in bulk."""
+        url_list = list(urls)
+        by_key = {url_key(u): u for u in url_list}
+        found = set()
+        keys = list(by_key)
+        now = time.time()
+        with self._lock:
+            for i in range(0, len(keys), _CHUNK):
+                chunk = keys[i:i + _CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT key FROM pages WHERE key IN ({','.join('?' * len(chunk))}) "
+                    "AND (expires_at IS NULL OR expires_at > ?)",
+                    (*chunk, now),
+                ).fetchall()
+                found.update(by_key[r[0]] for r in rows)
+        return {u: u in found for u in url_list}
+
+    # -- writes --------------------------------------------------------
+    def put(self, url: str, html: str, *, status: int = 200, validators: Optional[Mapping[str, str]] = None) -> Dict:
+        raw = html.encode("utf-8")
+        blob = _compress(raw)
+        codec = "zst" if zstandard is not None else "gz"
+        now = time.time()
+        validators = validators or {}
+        key = url_key(url)
+        with self._lock:
+            old = self._conn.execute("SELECT stored FROM pages WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?,?,?,?,?,?,?,?,?,?,?,?)",
+                (
+                    key, url, blob, codec, len(raw), len(blob), status,
+                    validators.get("etag"), validators.get("last_modified"),
+                    now, self._expiry(now), now,
+                ),
+            )
+            self._stored_total += len(blob) - (old[0] if old else 0)
+            self._evict()
+        return {"key": key, "url": url, "size": len(raw), "stored": len(blob), "fetched_at": now, "status": status}
+
+    def touch(self, url: str, *, status: int = 304, validators: Optional[Mapping[str, str]] = None) -> None:
+        now = time.time()
+        validators = validators or {}
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET fetched_at = ?, expires_at = ?, last_access = ?, status = ?, "
+                "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE key = ?",
+                (now, self._expiry(now), now, status, validators.get("etag"), validators.get("last_modified"), url_key(url)),
+            )
+
+    def _evict(self) -> None:
+        if not self.max_bytes:
+            return
+        while self._stored_total > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, stored FROM pages ORDER BY last_access LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self._stored_total = 0
+                return
+            freed = 0
+            victims = []
+            for key, stored in rows:
+                victims.append((key,))
+                freed += stored or 0
+                if self._stored_total - freed <= self.max_bytes:
+                    break
+            self._conn.executemany("DELETE FROM pages WHERE key = ?", victims)
+            self._stored_total -= freed
+
+    # -- maintenance ---------------------------------------------------
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            n, raw, stored = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored), 0) FROM pages"
+            ).fetchone()
+        return {"entries": n, "objects": n, "raw_bytes": raw, "stored_bytes": stored}
+
+    def prune(self, max_age: Optional[float] = None) -> int:
+        """Delete expired entries (and those older than max_age seconds)."""
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM pages WHERE (expires_at IS NOT NULL AND expires_at <= ?) OR fetched_at < ?",
+                (now, now - max_age if max_age is not None else float("-inf")),
+            )
+            removed = cur.rowcount
+            row = self._conn.execute("SELECT COALESCE(SUM(stored), 0) FROM pages").fetchone()
+            self._stored_total = int(row[0])
+        return removed
+
+
+__all__ = ["SqliteHtmlCache", "SQLITE_SUFFIXES"]
@@ -7,7 +7,7 @@ from __future__ import annotations
 
 import os
 import sqlite3
-from typing import Dict, Set, Tuple, List
+from typing import Dict, Set, Tuple, List, Optional
 
 try:
     import networkx as nx  # type: ignore
@@ -15,9 +15,13 @@ except ImportError as e:  # pragma: no cover
     raise RuntimeError("networkx is required. Install: pip install networkx matplotlib") from e
 
 
-def load_relations(db_path: str) -> Tuple[Dict[str, Dict], List[Tuple[str, str]]]:
+def load_relations(db_path: str, programme: Optional[str] = None) -> Tuple[Dict[str, Dict], List[Tuple[str, str]]]:
     """Load courses and prerequisite pairs from SQLite.
 
+    Args:
+        db_path: path to SQLite DB
+        programme: only courses listed by this programme code (None = all)
+
     Returns:
         courses: mapping code -> {title, offering_unit, credit_units}
         edges: list of (prereq -> course) pairs
@@ -26,7 +30,14 @@ def load_relations(db_path: str) -> Tuple[Dict[str, Dict], List[Tuple[str, str]]
         raise FileNotFoundError(db_path)
     conn = sqlite3.connect(db_path)
     cur = conn.cursor()
-    cur.execute("SELECT course_code, course_title, offering_unit, credit_units FROM courses")
+    if programme:
+        cur.execute(
+            "SELECT course_code, course_title, offering_unit, credit_units FROM courses "
+            "WHERE course_code IN (SELECT course_code FROM programme_courses WHERE programme_code = ?)",
+            (programme,),
+        )
+    else:
+        cur.execute("SELECT course_code, course_title, offering_unit, credit_units FROM courses")
     courses: Dict[str, Dict] = {}
     for code, title, unit, cu in cur.fetchall():
         courses[code] = {"title": title, "unit": unit, "credits": cu}
@@ -36,6 +47,50 @@ def load_relations(db_path: str) -> Tuple[Dict[str, Dict], List[Tuple[str, str]]
     return courses, edges
 
 
+def load_reduced_edges(db_path: str, courses: Dict[str, Dict]) -> Optional[List[Tuple[str, str]]]:
+    """Transitively reduced (prereq -> course) pairs stored by the builder.
+
+    Returns:
+        edges between the given courses, or None when the DB has no
+        prereq_reduced table (or it was never filled)
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute("SELECT prereq_code, course_code FROM prereq_reduced").fetchall()
+        if not rows and conn.execute("SELECT 1 FROM prerequisites LIMIT 1").fetchone():
+            return None
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+    return [(pre, course) for pre, course in rows if pre in courses and course in courses]
+
+
+def load_ancestors(db_path: str, course_code: str, max_depth: Optional[int] = None) -> Optional[Set[str]]:
+    """All prerequisites of a course from the prereq_closure table.
+
+    Args:
+        max_depth: only ancestors at most this many prerequisite links away
+
+    Returns:
+        set of ancestor codes, or None when the DB has no closure table
+    """
+    sql = "SELECT ancestor_code FROM prereq_closure WHERE course_code = ?"
+    params: list = [course_code]
+    if max_depth is not None:
+        sql += " AND depth <= ?"
+        params.append(max_depth)
+    conn = sqlite3.connect(db_path)
+    try:
+        if conn.execute("SELECT 1 FROM prereq_closure LIMIT 1").fetchone() is None:
+            return None
+        return {r[0] for r in conn.execute(sql, params)}
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+
+
 def load_exclusions(db_path: str) -> Dict[str, Set[str]]:
     """Load course exclusions mapping from database.
     
@@ -72,6 +127,8 @@ def build_graph(courses: Dict[str, Dict], edges: List[Tuple[str, str]]):
 
 __all__ = [
     "load_relations",
+    "load_reduced_edges",
+    "load_ancestors",
     "load_exclusions",
     "build_graph",
 ]
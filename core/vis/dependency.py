@@ -18,7 +18,7 @@ try:
 except ImportError as e:  # pragma: no cover
     raise RuntimeError("networkx and matplotlib are required. Install: pip install networkx matplotlib") from e
 
-from .common import load_relations, load_exclusions, build_graph
+from .common import load_relations, load_reduced_edges, load_ancestors, load_exclusions, build_graph
 
 
 def remove_transitive_edges(g):
@@ -195,6 +195,7 @@ def render_dependency_tree(
     exclude_isolated: bool = True,
     straight_edges: bool = True,
     reduce_transitive: bool = True,
+    programme: Optional[str] = None,
 ) -> str:
     """Render the course dependency DAG as a PNG image.
 
@@ -204,24 +205,31 @@ def render_dependency_tree(
         highlight_cycles: color cycle edges red
         focus: if provided, only render the subgraph reachable from this course (its prerequisites chain)
         layered: use layered layout (vs spring layout) - default True for tree-like hierarchy
-        max_depth: limit depth (levels) from roots or focus
+        max_depth: limit depth (levels) from roots or focus; with focus, levels are
+            the shortest prerequisite chain stored in prereq_closure
         truncate_title: truncate course title to this length
         color_by_unit: color nodes by offering unit
         max_per_layer: wrap wide layers into multiple rows
         exclude_isolated: remove courses with no prerequisites and no dependents - default True
         straight_edges: draw straight edges (no curvature) - default True
         reduce_transitive: remove redundant transitive edges (e.g., A→B→C removes A→C) - default True
+        programme: only render courses listed by this programme code
         
     Returns:
         Path to written image file.
     """
-    courses, edges = load_relations(db_path)
+    courses, edges = load_relations(db_path, programme)
     excl_map = load_exclusions(db_path)
     g = build_graph(courses, edges)
     
-    # Remove transitive edges to simplify the graph
+    # Remove transitive edges to simplify the graph. The builder stores the
+    # reduction of the whole catalogue; a programme subset is reduced here.
     if reduce_transitive:
-        g = remove_transitive_edges(g)
+        reduced = None if programme else load_reduced_edges(db_path, courses)
+        if reduced is not None:
+            g = build_graph(courses, reduced)
+        else:
+            g = remove_transitive_edges(g)
     
     # Optionally remove isolated nodes (no incoming and no outgoing edges)
     if exclude_isolated:
@@ -231,7 +239,10 @@ def render_dependency_tree(
     
     if focus and focus in g.nodes:
         # Limit to prerequisites ancestors of focus
-        if max_depth is None:
+        closure = None if programme else load_ancestors(db_path, focus, max_depth)
+        if closure is not None:
+            sub_nodes = (closure & set(g.nodes)) | {focus}
+        elif max_depth is None:
             ancestors = nx.ancestors(g, focus)
             sub_nodes = ancestors | {focus}
         else:
@@ -402,6 +413,8 @@ def render_dependency_tree(
     nx.draw_networkx_labels(g, pos, labels=labels, font_size=8, horizontalalignment='center', verticalalignment='center')
     
     title = "Course Dependency Tree (Bottom: Prerequisites → Top: Dependents)"
+    if programme:
+        title += f" | Programme: {programme}"
     if focus:
         title += f" | Focus: {focus}"
     if cycle_edges:
@@ -6,7 +6,7 @@ Renders courses that have no prerequisites and no dependents (terminal courses).
 from __future__ import annotations
 
 import os
-from typing import Dict, Tuple, List
+from typing import Dict, Tuple, List, Optional
 
 try:
     import networkx as nx  # type: ignore
@@ -24,6 +24,7 @@ def render_root_courses(
     truncate_title: int = 40,
     color_by_unit: bool = True,
     max_per_row: int = 8,
+    programme: Optional[str] = None,
 ) -> str:
     """Render courses that have no prerequisites and no dependents.
 
@@ -36,11 +37,12 @@ def render_root_courses(
         truncate_title: truncate course title to this length
         color_by_unit: color nodes by offering unit
         max_per_row: maximum number of nodes per row in grid layout
+        programme: only include courses listed by this programme code
         
     Returns:
         Path to written image file.
     """
-    courses, edges = load_relations(db_path)
+    courses, edges = load_relations(db_path, programme)
     g = build_graph(courses, edges)
     
     # Select nodes that have NO prerequisites and NO dependents
@@ -1,7 +1,11 @@
 import argparse
+import asyncio
 import json
 import os
+import sqlite3
 import sys
+import time
+from collections import deque
 from pathlib import Path
 from typing import List
 
@@ -11,13 +15,19 @@ except ImportError:
     import tomli as tomllib  # fallback for older Python
 
 from core.scraper.major_scraper import scrape_major_pages
+from core.scraper.cache import configure_cache, open_cache
 from core.dp_build.export import save_json, save_csv
 from core.dp_build.db_builder import build_course_db
+from core.dp_build.migrations import SCHEMA_VERSION, migrate, schema_version
+from core.dp_build.parse_cache import configure_parse_cache
 from core.filter.check import load_allowed_codes, filter_db_by_allowed
 from core.vis.dependency import render_dependency_tree
 from core.vis.roots import render_root_courses
 from core.config import load_config as _load_config
-from core.query import interactive_course_query
+from core.query import interactive_course_query, search_courses, what_if
+from core.query.cohort import find_available_batch, read_students
+from core.query.planner import plan_semesters, unlock_path
+from core.query.service import DEFAULT_PORT, serve
 
 DEFAULT_OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "outputs")
 DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
@@ -44,6 +54,12 @@ def cmd_scrape_major(args: argparse.Namespace) -> int:
         include_courses=args.courses,
         concurrency=args.concurrency,
         cache_dir=args.cache_dir,
+        async_fetch=getattr(args, "async_fetch", False),
+        revalidate=getattr(args, "revalidate", False),
+        rate_limit=getattr(args, "rate_limit", None),
+        burst=getattr(args, "burst", 1),
+        adaptive=getattr(args, "adaptive", False),
+        parse_workers=getattr(args, "parse_workers", 1),
     )
 
     out_dir = args.out_dir or DEFAULT_OUTPUT_DIR
@@ -63,24 +79,33 @@ def build_db(args: argparse.Namespace) -> int:
     # Load scraper config if major_url not provided
     major_url = args.major_url
     reset = args.reset
+    incremental = getattr(args, "incremental", False)
     
     scraper_config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config", "scraper.toml")
     if os.path.exists(scraper_config_path):
         with open(scraper_config_path, "rb") as f:
             config = tomllib.load(f)
-            # Load URL if not provided via command line
+            # Load URLs if not provided via command line (all majors go into one DB)
             if not major_url:
                 urls = config.get("scraper", {}).get("urls", [])
                 if urls:
-                    major_url = urls[0]  # Use first URL from config
+                    major_url = urls[0] if len(urls) == 1 else list(urls)
                     if args.verbose:
-                        print(f"Using URL from config: {major_url}")
-            # Load reset setting if not provided via command line
-            if not args.reset:
+                        print(f"Using {len(urls)} URL(s) from config: {', '.join(urls)}")
+            # Load incremental setting if not provided via command line
+            if not incremental:
+                incremental = config.get("database", {}).get("incremental", False)
+            # Load reset setting if not provided via command line; an
+            # incremental build keeps the existing data to compare against
+            if not args.reset and not incremental:
                 reset = config.get("database", {}).get("reset", False)
                 if args.verbose and reset:
                     print(f"Database reset enabled from config")
     
+    if reset and incremental:
+        print("Error: --reset and --incremental cannot be combined (incremental compares against the existing data)", file=sys.stderr)
+        return 1
+    
     if not major_url:
         print("Error: --major-url not provided and no URLs found in config/scraper.toml", file=sys.stderr)
         return 1
@@ -100,6 +125,13 @@ def build_db(args: argparse.Namespace) -> int:
         reset=reset,
         cache_dir=args.cache_dir,
         out_dir=out_dir,
+        async_fetch=getattr(args, "async_fetch", False),
+        revalidate=getattr(args, "revalidate", False),
+        rate_limit=getattr(args, "rate_limit", None),
+        burst=getattr(args, "burst", 1),
+        adaptive=getattr(args, "adaptive", False),
+        parse_workers=getattr(args, "parse_workers", 1),
+        incremental=incremental,
     )
     
     return 0
@@ -110,24 +142,33 @@ def cmd_run_all(args: argparse.Namespace) -> int:
     # Load scraper config if major_url not provided
     major_url = args.major_url
     reset = args.reset
+    incremental = getattr(args, "incremental", False)
     
     scraper_config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config", "scraper.toml")
     if os.path.exists(scraper_config_path):
         with open(scraper_config_path, "rb") as f:
             config = tomllib.load(f)
-            # Load URL if not provided via command line
+            # Load URLs if not provided via command line (all majors go into one DB)
             if not major_url:
                 urls = config.get("scraper", {}).get("urls", [])
                 if urls:
-                    major_url = urls[0]  # Use first URL from config
+                    major_url = urls[0] if len(urls) == 1 else list(urls)
                     if args.verbose:
-                        print(f"Using URL from config: {major_url}")
-            # Load reset setting if not provided via command line
-            if not args.reset:
+                        print(f"Using {len(urls)} URL(s) from config: {', '.join(urls)}")
+            # Load incremental setting if not provided via command line
+            if not incremental:
+                incremental = config.get("database", {}).get("incremental", False)
+            # Load reset setting if not provided via command line; an
+            # incremental build keeps the existing data to compare against
+            if not args.reset and not incremental:
                 reset = config.get("database", {}).get("reset", False)
                 if args.verbose and reset:
                     print(f"Database reset enabled from config")
     
+    if reset and incremental:
+        print("Error: --reset and --incremental cannot be combined (incremental compares against the existing data)", file=sys.stderr)
+        return 1
+    
     if not major_url:
         print("Error: --major-url not provided and no URLs found in config/scraper.toml", file=sys.stderr)
         return 1
@@ -152,6 +193,13 @@ def cmd_run_all(args: argparse.Namespace) -> int:
         reset=reset,
         cache_dir=args.cache_dir,
         out_dir=out_dir,
+        async_fetch=getattr(args, "async_fetch", False),
+        revalidate=getattr(args, "revalidate", False),
+        rate_limit=getattr(args, "rate_limit", None),
+        burst=getattr(args, "burst", 1),
+        adaptive=getattr(args, "adaptive", False),
+        parse_workers=getattr(args, "parse_workers", 1),
+        incremental=incremental,
     )
     
     # Step 2: Ask if user wants to generate visualizations
@@ -203,6 +251,7 @@ def cmd_run_all(args: argparse.Namespace) -> int:
             exclude_isolated=dep_settings.get("exclude_isolated", True),
             straight_edges=dep_settings.get("straight_edges", True),
             reduce_transitive=dep_settings.get("reduce_transitive", True),
+            programme=dep_settings.get("programme") or None,
         )
         
         # Roots graph
@@ -220,6 +269,7 @@ def cmd_run_all(args: argparse.Namespace) -> int:
             truncate_title=roots_settings.get("truncate_title", 40),
             color_by_unit=roots_settings.get("color_by_unit", True),
             max_per_row=roots_settings.get("max_per_row", 1),
+            programme=roots_settings.get("programme") or None,
         )
         
         if args.verbose:
@@ -308,6 +358,7 @@ def cmd_visualize(args: argparse.Namespace) -> int:
             print("  exclude_isolated=", not getattr(args, "include_isolated", False))
             print("  straight_edges=", not getattr(args, "curved_edges", False))
             print("  reduce_transitive=", getattr(args, "reduce_transitive", True))
+            print("  programme=", getattr(args, "programme", None))
         base = Path(DEFAULT_OUTPUT_DIR)
         base.mkdir(parents=True, exist_ok=True)
         # find next vNNN
@@ -334,6 +385,7 @@ def cmd_visualize(args: argparse.Namespace) -> int:
             exclude_isolated=not getattr(args, "include_isolated", False),
             straight_edges=not getattr(args, "curved_edges", False),
             reduce_transitive=getattr(args, "reduce_transitive", True),
+            programme=getattr(args, "programme", None) or None,
         )
         # roots-only graph: load dedicated config if present (config/visualize_roots.toml)
         root_cfg_path = Path(__file__).parent / "config" / "visualize_roots.toml"
@@ -356,6 +408,7 @@ def cmd_visualize(args: argparse.Namespace) -> int:
                 truncate_title=r_trunc,
                 color_by_unit=r_color,
                 max_per_row=r_mpr,
+                programme=vsec.get("programme") or getattr(args, "programme", None) or None,
             )
         else:
             render_root_courses(
@@ -364,6 +417,7 @@ def cmd_visualize(args: argparse.Namespace) -> int:
                 truncate_title=getattr(args, "truncate_title", 40),
                 color_by_unit=not getattr(args, "no_unit_colors", False),
                 max_per_row=getattr(args, "max_per_layer", 16),
+                programme=getattr(args, "programme", None) or None,
             )
         if args.verbose:
             print("Graph images written:", dep_path, roots_path)
@@ -381,6 +435,7 @@ def cmd_visualize(args: argparse.Namespace) -> int:
             truncate_title=getattr(args, "truncate_title", 40),
             color_by_unit=not getattr(args, "no_unit_colors", False),
             max_per_row=getattr(args, "max_per_layer", 16),
+            programme=getattr(args, "programme", None) or None,
         )
     else:
         if getattr(args, "verbose", False):
@@ -396,6 +451,7 @@ def cmd_visualize(args: argparse.Namespace) -> int:
             print("  exclude_isolated=", not getattr(args, "include_isolated", False))
             print("  straight_edges=", not getattr(args, "curved_edges", False))
             print("  reduce_transitive=", getattr(args, "reduce_transitive", True))
+            print("  programme=", getattr(args, "programme", None))
         if args.verbose:
             print(f"Rendering graph from {args.db} -> {out_path}")
         render_dependency_tree(
@@ -411,12 +467,244 @@ def cmd_visualize(args: argparse.Namespace) -> int:
             exclude_isolated=not getattr(args, "include_isolated", False),
             straight_edges=not getattr(args, "curved_edges", False),
             reduce_transitive=getattr(args, "reduce_transitive", True),
+            programme=getattr(args, "programme", None) or None,
         )
     if args.verbose:
         print("Graph image written:", out_path)
     return 0
 
 
+def cmd_search(args: argparse.Namespace) -> int:
+    """CLI handler for search command: ranked keyword search over the courses DB."""
+    out_dir = args.out_dir or DEFAULT_OUTPUT_DIR
+    # A bare filename lives in outputs/, like build-db --db
+    db_path = args.db if os.path.dirname(args.db) else os.path.join(out_dir, args.db)
+    if not os.path.isfile(db_path):
+        print(f"search: database not found: {db_path}", file=sys.stderr)
+        return 1
+    query = " ".join(args.query)
+    results = search_courses(db_path, query, limit=args.limit, programme=getattr(args, "programme", None) or None)
+    if not results:
+        print(f"No courses match '{query}'")
+        return 0
+    for code, title, snippet in results:
+        print(f"{code:12s} {title or ''}")
+        if snippet:
+            print(f"             {snippet}")
+    return 0
+
+
+def cmd_cohort(args: argparse.Namespace) -> int:
+    """CLI handler for cohort command: eligibility report for a file of students (JSON lines)."""
+    out_dir = args.out_dir or DEFAULT_OUTPUT_DIR
+    db_path = args.db if os.path.dirname(args.db) else os.path.join(out_dir, args.db)
+    if not os.path.isfile(db_path):
+        print(f"cohort: database not found: {db_path}", file=sys.stderr)
+        return 1
+    if not os.path.isfile(args.students):
+        print(f"cohort: students file not found: {args.students}", file=sys.stderr)
+        return 1
+    ids: deque = deque()
+
+    def codes():
+        # IDs wait here until their result comes back (results keep input order)
+        for student_id, completed in read_students(args.students):
+            ids.append(student_id)
+            yield completed
+
+    results = find_available_batch(
+        db_path,
+        codes(),
+        semester_filter=getattr(args, "semester", None) or None,
+        programme=getattr(args, "programme", None) or None,
+        batch_size=args.batch_size,
+    )
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    t0 = time.perf_counter()
+    count = 0
+    try:
+        for r in results:
+            record = {
+                "student": ids.popleft(),
+                "available": [code for code, _ in r["available"]],
+                "follow_up": [code for code, _, _ in r["completed_children"]],
+            }
+            if args.roots:
+                record["roots"] = [code for code, _ in r["no_prereq"]]
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    finally:
+        if args.out:
+            out.close()
+    elapsed = time.perf_counter() - t0
+    if args.out:
+        print(f"cohort: {count} students in {elapsed:.2f}s -> {args.out}")
+    elif args.verbose:
+        print(f"cohort: {count} students in {elapsed:.2f}s", file=sys.stderr)
+    return 0
+
+
+def _code_list(values: List[str]) -> List[str]:
+    """Course codes given as separate arguments and/or comma-separated."""
+    return [code for value in values or [] for code in value.replace(",", " ").split()]
+
+
+def cmd_plan(args: argparse.Namespace) -> int:
+    """CLI handler for plan command: semester-by-semester plan to target courses / a programme."""
+    out_dir = args.out_dir or DEFAULT_OUTPUT_DIR
+    db_path = args.db if os.path.dirname(args.db) else os.path.join(out_dir, args.db)
+    if not os.path.isfile(db_path):
+        print(f"plan: database not found: {db_path}", file=sys.stderr)
+        return 1
+    t0 = time.perf_counter()
+    try:
+        plan = plan_semesters(
+            db_path,
+            _code_list(args.completed),
+            targets=_code_list(args.target),
+            programme=getattr(args, "programme", None) or None,
+            credit_cap=args.credit_cap,
+            start_semester=args.start,
+            summer=args.summer,
+            max_nodes=args.max_nodes,
+        )
+    except ValueError as e:
+        print(f"plan: {e}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - t0
+    if args.json:
+        print(json.dumps(plan, ensure_ascii=False, indent=2))
+        return 0
+    for sem in plan["semesters"]:
+        term = "Summer" if sem["term"] == "SUMMER" else f"Semester {sem['term']}"
+        print(f"{sem['number']:>2}. {term} ({sem['credits']:g} credits)")
+        for code, title, credits in sem["courses"]:
+            note = "(not in the database; credits assumed)" if code in plan["external"] else title or ''
+            print(f"      {code:12s} {credits:>4g}  {note}")
+    for code, reason in plan["unscheduled"]:
+        print(f"not planned: {code} ({reason})")
+    n = len(plan["semesters"])
+    quality = "fewest possible" if plan["optimal"] else f"at least {plan['lower_bound']} needed; search budget reached"
+    print(f"{n} semesters ({quality})")
+    if args.verbose:
+        print(f"plan: {elapsed * 1000:.1f} ms", file=sys.stderr)
+    return 0
+
+
+def cmd_path(args: argparse.Namespace) -> int:
+    """CLI handler for path command: fewest remaining courses before a target course."""
+    out_dir = args.out_dir or DEFAULT_OUTPUT_DIR
+    db_path = args.db if os.path.dirname(args.db) else os.path.join(out_dir, args.db)
+    if not os.path.isfile(db_path):
+        print(f"path: database not found: {db_path}", file=sys.stderr)
+        return 1
+    route = unlock_path(db_path, _code_list(args.completed), args.target, max_nodes=args.max_nodes)
+    if args.json:
+        print(json.dumps(route, ensure_ascii=False, indent=2))
+        return 0
+    if route["reason"]:
+        print(f"{route['target']}: {route['reason']}")
+        return 0
+    for n, step in enumerate(route["steps"], 1):
+        print(f"{n:>2}. " + ", ".join(code for code, _ in step))
+    count = len(route["prerequisites"])
+    note = "" if route["optimal"] else " (search budget reached; may not be the shortest)"
+    print(f"{count} course(s) before {route['target']}{note}")
+    if route["external"]:
+        print(f"needs external course(s): {', '.join(route['external'])}")
+    return 0
+
+
+def cmd_what_if(args: argparse.Namespace) -> int:
+    """CLI handler for what-if command: courses unlocked by taking the given courses."""
+    out_dir = args.out_dir or DEFAULT_OUTPUT_DIR
+    db_path = args.db if os.path.dirname(args.db) else os.path.join(out_dir, args.db)
+    if not os.path.isfile(db_path):
+        print(f"what-if: database not found: {db_path}", file=sys.stderr)
+        return 1
+    result = what_if(
+        db_path,
+        _code_list(args.completed),
+        _code_list(args.add),
+        semester_filter=getattr(args, "semester", None) or None,
+        programme=getattr(args, "programme", None) or None,
+    )
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return 0
+    print(f"Unlocked ({len(result['unlocked'])}):")
+    for code, title in result["unlocked"]:
+        print(f"  {code:12s} {title or ''}")
+    if result["still_blocked"]:
+        print(f"Still need more ({len(result['still_blocked'])}):")
+        for code, title, missing in result["still_blocked"]:
+            print(f"  {code:12s} {title or ''}  [missing: {', '.join(missing)}]")
+    return 0
+
+
+def cmd_serve(args: argparse.Namespace) -> int:
+    """CLI handler for serve command: HTTP/JSON query service over the courses DB."""
+    out_dir = args.out_dir or DEFAULT_OUTPUT_DIR
+    db_path = args.db if os.path.dirname(args.db) else os.path.join(out_dir, args.db)
+    if not os.path.isfile(db_path):
+        print(f"serve: database not found: {db_path}", file=sys.stderr)
+        return 1
+    try:
+        asyncio.run(serve(
+            db_path,
+            host=args.host,
+            port=args.port,
+            pool_size=args.pool_size,
+            cache_size=args.cache_size,
+            reload_interval=args.reload_interval,
+            verbose=args.verbose,
+        ))
+    except KeyboardInterrupt:
+        print("[serve] stopped")
+    return 0
+
+
+def cmd_migrate_db(args: argparse.Namespace) -> int:
+    """CLI handler for migrate-db command: upgrade a courses DB to the current schema in place."""
+    out_dir = args.out_dir or DEFAULT_OUTPUT_DIR
+    db_path = args.db if os.path.dirname(args.db) else os.path.join(out_dir, args.db)
+    if not os.path.isfile(db_path):
+        print(f"migrate-db: database not found: {db_path}", file=sys.stderr)
+        return 1
+    conn = sqlite3.connect(db_path)
+    try:
+        before = schema_version(conn)
+        try:
+            applied = migrate(conn, verbose=args.verbose)
+        except RuntimeError as e:
+            print(f"migrate-db: {e}", file=sys.stderr)
+            return 1
+    finally:
+        conn.close()
+    if applied:
+        print(f"{db_path}: schema {before} -> {SCHEMA_VERSION} ({len(applied)} migrations)")
+    else:
+        print(f"{db_path}: schema {before} is up to date")
+    return 0
+
+
+def cmd_cache(args: argparse.Namespace) -> int:
+    """CLI handler for cache command: show stats or prune the HTML cache."""
+    cache_dir = args.cache_dir or DEFAULT_CACHE_DIR
+    if not os.path.exists(cache_dir):
+        print(f"cache: no cache at {cache_dir}", file=sys.stderr)
+        return 1
+    store = open_cache(cache_dir)
+    if args.action == "prune":
+        max_age = args.max_age_days * 86400 if args.max_age_days is not None else None
+        removed = store.prune(max_age=max_age)
+        print(f"Pruned {removed} entries from {cache_dir}")
+    stats = store.stats()
+    ratio = stats["raw_bytes"] / stats["stored_bytes"] if stats["stored_bytes"] else 0.0
+    print(json.dumps({**stats, "cache_dir": cache_dir, "compression_ratio": round(ratio, 2)}, indent=2))
+    return 0
+
+
 def build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(description="CityU curriculum orchestrator")
     p.add_argument("--config", help="Path to TOML config file (defaults to config/cityu.toml if present)")
@@ -424,15 +712,23 @@ def build_parser() -> argparse.ArgumentParser:
 
     # run-all command: complete pipeline
     ra = sub.add_parser("run-all", help="Run complete pipeline: scrape + build DB + visualize")
-    ra.add_argument("--major-url", help="Major curriculum URL (can be set in config/scraper.toml)")
+    ra.add_argument("--major-url", help="Major curriculum URL (default: every URL in config/scraper.toml, one shared DB)")
     ra.add_argument("--db", default="courses.db", help="SQLite filename inside outputs dir")
     ra.add_argument("--delay", type=float, default=0.2)
     ra.add_argument("--retries", type=int, default=3)
     ra.add_argument("--timeout", type=float, default=15.0)
     ra.add_argument("--verbose", action="store_true")
     ra.add_argument("--concurrency", type=int, default=8, help="Workers to fetch course pages")
+    ra.add_argument("--incremental", action="store_true", default=argparse.SUPPRESS, help="Only rewrite changed courses; delete courses and edges no longer listed")
     ra.add_argument("--reset", action="store_true", help="Drop existing database tables first")
     ra.add_argument("--out-dir", help="Override output directory")
+    # SUPPRESS: without the flag the config value (or the handler's default) applies
+    ra.add_argument("--rate-limit", type=float, default=argparse.SUPPRESS, help="Aggregate requests/sec across all workers (replaces --delay)")
+    ra.add_argument("--burst", type=int, default=argparse.SUPPRESS, help="Requests allowed back-to-back under --rate-limit")
+    ra.add_argument("--adaptive", action="store_true", default=argparse.SUPPRESS, help="Adapt in-flight requests to 429/5xx and latency (up to --concurrency)")
+    ra.add_argument("--revalidate", action="store_true", default=argparse.SUPPRESS, help="Revalidate cached pages with ETag/Last-Modified (304 = cache hit)")
+    ra.add_argument("--parse-workers", type=int, default=argparse.SUPPRESS, help="Processes for parsing course pages (0 = one per CPU core)")
+    ra.add_argument("--async-fetch", action="store_true", default=argparse.SUPPRESS, help="Fetch course pages on an asyncio event loop with one pooled client")
     ra.add_argument("--cache-dir", help="Directory for HTML cache")
     ra.set_defaults(func=cmd_run_all)
 
@@ -449,27 +745,117 @@ def build_parser() -> argparse.ArgumentParser:
     pm.add_argument("--verbose", action="store_true")
     pm.add_argument("--concurrency", type=int, default=1, help="Number of workers to fetch course pages (when --courses)")
     pm.add_argument("--out-dir", help="Override output directory (default outputs/)")
+    pm.add_argument("--rate-limit", type=float, default=argparse.SUPPRESS, help="Aggregate requests/sec across all workers (replaces --delay)")
+    pm.add_argument("--burst", type=int, default=argparse.SUPPRESS, help="Requests allowed back-to-back under --rate-limit")
+    pm.add_argument("--adaptive", action="store_true", default=argparse.SUPPRESS, help="Adapt in-flight requests to 429/5xx and latency (up to --concurrency)")
+    pm.add_argument("--revalidate", action="store_true", default=argparse.SUPPRESS, help="Revalidate cached pages with ETag/Last-Modified (304 = cache hit)")
+    pm.add_argument("--parse-workers", type=int, default=argparse.SUPPRESS, help="Processes for parsing course pages (0 = one per CPU core)")
+    pm.add_argument("--async-fetch", action="store_true", default=argparse.SUPPRESS, help="Fetch course pages on an asyncio event loop with one pooled client")
     pm.add_argument("--cache-dir", help="Directory for HTML cache (default: none)")
     pm.set_defaults(func=cmd_scrape_major)
 
-    db = sub.add_parser("build-db", help="Create SQLite DB of courses for a major")
-    db.add_argument("--major-url", help="Major curriculum URL (can be set in config/scraper.toml)")
+    db = sub.add_parser("build-db", help="Create SQLite DB of courses for one or more majors")
+    db.add_argument("--major-url", help="Major curriculum URL (default: every URL in config/scraper.toml, one shared DB)")
     db.add_argument("--db", default="courses.db", help="SQLite filename inside outputs dir")
     db.add_argument("--delay", type=float, default=0.2)
     db.add_argument("--retries", type=int, default=3)
     db.add_argument("--timeout", type=float, default=15.0)
     db.add_argument("--verbose", action="store_true")
     db.add_argument("--concurrency", type=int, default=4, help="Workers to fetch course pages")
+    db.add_argument("--incremental", action="store_true", default=argparse.SUPPRESS, help="Only rewrite changed courses; delete courses and edges no longer listed")
     db.add_argument("--reset", action="store_true", help="Drop existing tables first")
     db.add_argument("--out-dir", help="Override output directory")
+    db.add_argument("--rate-limit", type=float, default=argparse.SUPPRESS, help="Aggregate requests/sec across all workers (replaces --delay)")
+    db.add_argument("--burst", type=int, default=argparse.SUPPRESS, help="Requests allowed back-to-back under --rate-limit")
+    db.add_argument("--adaptive", action="store_true", default=argparse.SUPPRESS, help="Adapt in-flight requests to 429/5xx and latency (up to --concurrency)")
+    db.add_argument("--revalidate", action="store_true", default=argparse.SUPPRESS, help="Revalidate cached pages with ETag/Last-Modified (304 = cache hit)")
+    db.add_argument("--parse-workers", type=int, default=argparse.SUPPRESS, help="Processes for parsing course pages (0 = one per CPU core)")
+    db.add_argument("--async-fetch", action="store_true", default=argparse.SUPPRESS, help="Fetch course pages on an asyncio event loop with one pooled client")
     db.add_argument("--cache-dir", help="Directory for HTML cache")
     db.set_defaults(func=build_db)
 
+    se = sub.add_parser("search", help="Keyword search over course codes, titles, aims and requirements")
+    se.add_argument("query", nargs="+", help="Words to search for (all must match; prefixes allowed)")
+    se.add_argument("--db", default="courses.db", help="SQLite DB (a bare filename is looked up in the outputs dir)")
+    se.add_argument("--limit", type=int, default=20, help="Maximum number of results")
+    se.add_argument("--programme", help="Only courses listed by this programme code")
+    se.add_argument("--out-dir", help="Override output directory")
+    se.set_defaults(func=cmd_search)
+
+    co = sub.add_parser("cohort", help="Available / follow-up courses for every student in a CSV file (JSON lines out)")
+    co.add_argument("students", help="CSV: student ID, then completed course codes")
+    co.add_argument("--db", default="courses.db", help="SQLite DB (a bare filename is looked up in the outputs dir)")
+    co.add_argument("--semester", choices=["A", "B"], help="Only courses offered in this semester")
+    co.add_argument("--programme", help="Only courses listed by this programme code")
+    co.add_argument("--out", help="Write JSON lines here instead of stdout")
+    co.add_argument("--roots", action="store_true", help="Also list the root courses (no prerequisites) per student")
+    co.add_argument("--batch-size", type=int, default=256, help="Students evaluated per bit matrix")
+    co.add_argument("--out-dir", help="Override output directory")
+    co.add_argument("--verbose", action="store_true", help="Print timing")
+    co.set_defaults(func=cmd_cohort)
+
+    pl = sub.add_parser("plan", help="Semester-by-semester plan to target courses or a programme's required courses")
+    pl.add_argument("--completed", nargs="*", default=[], help="Completed course codes (space or comma separated)")
+    pl.add_argument("--target", nargs="*", default=[], help="Course codes to reach (prerequisites are added)")
+    pl.add_argument("--programme", help="Plan this programme's required (non-elective) courses too")
+    pl.add_argument("--db", default="courses.db", help="SQLite DB (a bare filename is looked up in the outputs dir)")
+    pl.add_argument("--credit-cap", type=float, default=18, help="Maximum credit units per semester")
+    pl.add_argument("--start", choices=["A", "B", "SUMMER"], default="A", help="Semester the plan starts in")
+    pl.add_argument("--summer", action="store_true", help="Also take courses in summer terms")
+    pl.add_argument("--max-nodes", type=int, default=2000, help="Search budget before the best plan so far is returned")
+    pl.add_argument("--json", action="store_true", help="Print the plan as JSON")
+    pl.add_argument("--out-dir", help="Override output directory")
+    pl.add_argument("--verbose", action="store_true", help="Print timing")
+    pl.set_defaults(func=cmd_plan)
+
+    pa = sub.add_parser("path", help="Quickest route to a course: fewest remaining prerequisites, in order")
+    pa.add_argument("target", help="Course code to reach")
+    pa.add_argument("--completed", nargs="*", default=[], help="Completed course codes (space or comma separated)")
+    pa.add_argument("--db", default="courses.db", help="SQLite DB (a bare filename is looked up in the outputs dir)")
+    pa.add_argument("--max-nodes", type=int, default=2000, help="Search budget before the best route so far is returned")
+    pa.add_argument("--json", action="store_true", help="Print the route as JSON")
+    pa.add_argument("--out-dir", help="Override output directory")
+    pa.set_defaults(func=cmd_path)
+
+    wi = sub.add_parser("what-if", help="Courses that taking the given courses would unlock")
+    wi.add_argument("--add", nargs="+", required=True, help="Course codes to consider taking (space or comma separated)")
+    wi.add_argument("--completed", nargs="*", default=[], help="Completed course codes (space or comma separated)")
+    wi.add_argument("--db", default="courses.db", help="SQLite DB (a bare filename is looked up in the outputs dir)")
+    wi.add_argument("--semester", choices=["A", "B"], help="Only courses offered in this semester")
+    wi.add_argument("--programme", help="Only courses listed by this programme code")
+    wi.add_argument("--json", action="store_true", help="Print the result as JSON")
+    wi.add_argument("--out-dir", help="Override output directory")
+    wi.set_defaults(func=cmd_what_if)
+
+    sv = sub.add_parser("serve", help="Serve course queries over HTTP/JSON from an in-memory index")
+    sv.add_argument("--db", default="courses.db", help="SQLite DB (a bare filename is looked up in the outputs dir)")
+    sv.add_argument("--host", default="127.0.0.1", help="Listen address (0.0.0.0 for every interface)")
+    sv.add_argument("--port", type=int, default=DEFAULT_PORT, help="Listen port")
+    sv.add_argument("--pool-size", type=int, default=4, help="Read-only DB connections for course/search/chain queries")
+    sv.add_argument("--cache-size", type=int, default=4096, help="Cached availability responses (0 = no cache)")
+    sv.add_argument("--reload-interval", type=float, default=1.0, help="Seconds between checks for a rebuilt DB")
+    sv.add_argument("--out-dir", help="Override output directory")
+    sv.add_argument("--verbose", action="store_true", help="Log reloads")
+    sv.set_defaults(func=cmd_serve)
+
+    mg = sub.add_parser("migrate-db", help="Upgrade an existing courses DB to the current schema in place")
+    mg.add_argument("--db", default="courses.db", help="SQLite DB (a bare filename is looked up in the outputs dir)")
+    mg.add_argument("--out-dir", help="Override output directory")
+    mg.add_argument("--verbose", action="store_true", help="Print each migration step")
+    mg.set_defaults(func=cmd_migrate_db)
+
+    ca = sub.add_parser("cache", help="Show HTML cache statistics or prune old entries")
+    ca.add_argument("action", choices=["stats", "prune"])
+    ca.add_argument("--cache-dir", help="HTML cache directory or .sqlite file (default: cache/)")
+    ca.add_argument("--max-age-days", type=float, help="prune: drop entries fetched more than N days ago")
+    ca.set_defaults(func=cmd_cache)
+
     viz = sub.add_parser("visualize", help="Render dependency graph from courses DB")
     # db is no longer required on CLI; can be provided via config file
     viz.add_argument("--db", required=False, help="SQLite database with courses/prerequisites (can be set in config)")
     viz.add_argument("--out", required=False, help="Output image path (PNG). Optional when --bundle-version is used")
     viz.add_argument("--focus", help="Focus on a single course's prerequisite subtree")
+    viz.add_argument("--programme", help="Only render courses listed by this programme code (e.g. BSC1_DSC)")
     viz.add_argument("--highlight-cycles", action="store_true", help="Highlight cycles in red")
     viz.add_argument("--verbose", action="store_true")
     viz.add_argument("--no-layered", action="store_true", help="Disable layered (top-down) layout")
@@ -564,6 +950,13 @@ def main(argv: List[str]) -> int:
             parser.set_defaults(**defaults)
 
     args = parser.parse_args(argv)
+    # [common] cache_ttl (seconds) / cache_max_mb (SQLite caches only); 0 = unlimited
+    configure_cache(
+        ttl=getattr(args, "cache_ttl", None),
+        max_bytes=(getattr(args, "cache_max_mb", None) or 0) * 1024 * 1024,
+    )
+    # [common] parse_cache: reuse parse results of unchanged pages
+    configure_parse_cache(getattr(args, "parse_cache", True))
     return args.func(args)
 
 
@@ -0,0 +1,81 @@
+"""Benchmark cohort eligibility: one query per student vs find_available_batch.
+
+Usage:
+    python scripts/bench_cohort.py [--courses N] [--students K]
+
+Uses the synthetic catalogue of bench_course_index.py. Every batch
+result must equal CourseIndex.find_available for the same student. The
+per-student DB read (the old find_available_courses) is timed on a
+sample and extrapolated to the cohort.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.dp_build.db_writer import CourseWriter, create_schema  # noqa: E402
+from core.query.cohort import find_available_batch  # noqa: E402
+from core.query.course_index import CourseIndex  # noqa: E402
+from bench_course_index import legacy_find_available  # noqa: E402
+from bench_db_writer import synthetic_courses  # noqa: E402
+
+LEGACY_SAMPLE = 10
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--courses", type=int, default=5000)
+    ap.add_argument("--students", type=int, default=5000)
+    args = ap.parse_args()
+    rnd = random.Random(6)
+
+    courses = synthetic_courses(args.courses)
+    for c in courses:
+        if c.get("prerequisites") and " and " in c["prerequisites"] and rnd.random() < 0.5:
+            c["prerequisites"] = c["prerequisites"].replace(" and ", " or ", 1)
+    codes = [c["course_code"] for c in courses if not c.get("error")]
+    students = [rnd.sample(codes, rnd.randint(5, 40)) + ["XX0000"] for _ in range(args.students)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "courses.db")
+        conn = sqlite3.connect(db)
+        create_schema(conn.cursor(), reset=True)
+        writer = CourseWriter(conn)
+        writer.add_many(courses)
+        writer.write_programme("P1", "Programme 1", None, [(code, None, None) for code in codes[::2]])
+        writer.close()
+        conn.close()
+
+        t0 = time.perf_counter()
+        for s in students[:LEGACY_SAMPLE]:
+            legacy_find_available(db, s, "A")
+        t_legacy = (time.perf_counter() - t0) / LEGACY_SAMPLE * len(students)
+
+        index = CourseIndex(db)
+        for sem, prog in ((None, None), ("A", None), ("B", "P1")):
+            t0 = time.perf_counter()
+            single = [index.find_available(s, sem, prog) for s in students]
+            t_single = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            batch = list(find_available_batch(index, students, sem, prog, batch_size=1024))
+            t_batch = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            n_avail = sum(len(r["available"]) for r in find_available_batch(index, students, sem, prog, batch_size=256))
+            t_small = time.perf_counter() - t0
+
+            assert batch == single, f"batch results differ (semester={sem}, programme={prog})"
+            print(f"semester={sem or '-'} programme={prog or '-'}: CourseIndex loop {t_single:.3f} s, "
+                  f"batch of 1024 {t_batch:.3f} s, batch of 256 {t_small:.3f} s ({n_avail} available)")
+
+    print(f"{len(codes)} courses, {len(students)} students; one DB read per student would take ~{t_legacy:.0f} s")
+
+
+if __name__ == "__main__":
+    main()
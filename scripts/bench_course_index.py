@@ -0,0 +1,142 @@
+"""Benchmark course availability queries: per-call DB reads vs CourseIndex.
+
+Usage:
+    python scripts/bench_course_index.py [--courses N] [--queries K]
+
+Builds a synthetic catalogue (prerequisites joined with "and" / "or",
+one programme holding half the courses) and runs K random students
+through legacy_find_available (the previous find_available_courses, which
+read every table on each call) and through CourseIndex. Results must be
+identical. Finally the DB is modified and the index must notice.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.dp_build.db_writer import CourseWriter, create_schema  # noqa: E402
+from core.dp_build.prereq_expr import compile_masks, evaluate, loads, satisfied  # noqa: E402
+from core.query.course_index import CourseIndex  # noqa: E402
+from bench_db_writer import synthetic_courses  # noqa: E402
+
+
+def legacy_find_available(db_path, completed_courses, semester_filter=None, programme=None):
+    """find_available_courses as it was before CourseIndex."""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    completed = set(c.strip().upper() for c in completed_courses)
+    sql = "SELECT course_code, course_title, semester FROM courses"
+    where = []
+    params = []
+    if semester_filter and semester_filter.upper() in ['A', 'B']:
+        where.append("course_code IN (SELECT course_code FROM course_semesters WHERE semester = ?)")
+        params.append(semester_filter.upper())
+    if programme:
+        where.append("course_code IN (SELECT course_code FROM programme_courses WHERE programme_code = ?)")
+        params.append(programme)
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    cursor.execute(sql, params)
+    all_courses = {row[0]: row[1] for row in cursor.fetchall()}
+    cursor.execute("SELECT course_code, prereq_code FROM prerequisites")
+    prereqs = {}
+    for course, prereq in cursor.fetchall():
+        prereqs.setdefault(course, []).append(prereq)
+    no_prereq = [(c, all_courses[c]) for c in all_courses if c not in prereqs and c not in completed]
+    cursor.execute("SELECT course_code, expression FROM prereq_expressions")
+    expressions = {code: loads(expr) for code, expr in cursor.fetchall()}
+    bit_of = {code: i for i, code in enumerate(sorted(completed))}
+    done_mask = (1 << len(bit_of)) - 1
+    available = []
+    for course in all_courses:
+        if course in completed or course not in prereqs:
+            continue
+        expr = expressions.get(course)
+        if expr is None:
+            ok = all(p in completed for p in prereqs[course])
+        else:
+            masks = compile_masks(expr, bit_of)
+            ok = satisfied(masks, done_mask) if masks is not None else evaluate(expr, completed)
+        if ok:
+            available.append((course, all_courses[course]))
+    completed_children = []
+    for course in all_courses:
+        if course in completed or course not in prereqs:
+            continue
+        if any(p in completed for p in prereqs[course]):
+            completed_children.append((course, all_courses[course], prereqs[course]))
+    conn.close()
+    return {
+        'available': sorted(available),
+        'no_prereq': sorted(no_prereq),
+        'completed_children': sorted(completed_children, key=lambda x: x[0]),
+    }
+
+
+def normalized(result):
+    # Prerequisite lists come back in table order; compare them as sets
+    out = dict(result)
+    out['completed_children'] = [(c, t, sorted(p)) for c, t, p in result['completed_children']]
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--courses", type=int, default=5000)
+    ap.add_argument("--queries", type=int, default=200)
+    args = ap.parse_args()
+    rnd = random.Random(4)
+
+    courses = synthetic_courses(args.courses)
+    for c in courses:
+        if c.get("prerequisites") and " and " in c["prerequisites"] and rnd.random() < 0.5:
+            c["prerequisites"] = c["prerequisites"].replace(" and ", " or ", 1)
+    codes = [c["course_code"] for c in courses if not c.get("error")]
+    students = [rnd.sample(codes, rnd.randint(5, 40)) for _ in range(args.queries)]
+    filters = [(rnd.choice([None, "A", "B"]), rnd.choice([None, None, "P1"])) for _ in students]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "courses.db")
+        conn = sqlite3.connect(db)
+        create_schema(conn.cursor(), reset=True)
+        writer = CourseWriter(conn)
+        writer.add_many(courses)
+        writer.write_programme("P1", "Programme 1", None, [(code, None, None) for code in codes[::2]])
+        writer.close()
+        conn.close()
+
+        t0 = time.perf_counter()
+        old = [legacy_find_available(db, s, sem, prog) for s, (sem, prog) in zip(students, filters)]
+        t_old = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        index = CourseIndex(db)
+        t_load = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        new = [index.find_available(s, sem, prog) for s, (sem, prog) in zip(students, filters)]
+        t_new = time.perf_counter() - t0
+
+        assert [normalized(r) for r in new] == [normalized(r) for r in old], "CourseIndex results differ"
+
+        time.sleep(0.01)
+        conn = sqlite3.connect(db)
+        conn.execute("INSERT INTO courses (course_code, course_title) VALUES ('ZZ9999', 'Added later')")
+        conn.commit()
+        conn.close()
+        assert ("ZZ9999", "Added later") in index.roots(), "index did not reload after the DB changed"
+        assert index.loads == 2, index.loads
+
+    n = len(students)
+    print(f"{len(codes)} courses, {n} queries")
+    print(f"read DB per query   {1000 * t_old / n:8.3f} ms/query")
+    print(f"CourseIndex         {1000 * t_new / n:8.3f} ms/query  (load {t_load:.3f} s once)  x{t_old / t_new:.0f}")
+    print("reload on DB change: OK")
+
+
+if __name__ == "__main__":
+    main()
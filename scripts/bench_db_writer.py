@@ -0,0 +1,133 @@
+"""Benchmark course DB writes: per-row inserts vs the batched CourseWriter.
+
+Usage:
+    python scripts/bench_db_writer.py [--courses N]
+
+A synthetic catalogue of N courses (with prerequisites, exclusions,
+free-text requirements and some failed pages) is written into two fresh
+databases, once with the old one-execute-per-row loop (legacy_write
+below) and once with CourseWriter. Table contents must match.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.dp_build.db_writer import CourseWriter, create_schema  # noqa: E402
+
+TABLES = ("courses", "prerequisites", "exclusions", "special_requirements")
+
+
+def synthetic_courses(n, seed=0):
+    rnd = random.Random(seed)
+    depts = ["CS", "MA", "SDSC", "EE", "GE", "PHY", "CHEM", "ECON"]
+    codes = [f"{depts[i % len(depts)]}{1000 + i}" for i in range(n)]
+    courses = []
+    for i, code in enumerate(codes):
+        if i % 97 == 0:
+            courses.append({"course_code": code, "url": f"https://example.invalid/{code}.htm", "error": "404"})
+            continue
+        k = rnd.choice([0, 0, 1, 2, 3])
+        prereqs = rnd.sample(codes[:max(1, i)], min(k, i)) if i else []
+        if prereqs:
+            prereq_text = " and ".join(prereqs)
+        else:
+            prereq_text = rnd.choice(["Nil", "", "Year 3 standing", "HKDSE Mathematics", "Consent of instructor"])
+        excl = rnd.sample(codes, rnd.choice([0, 0, 1, 2]))
+        courses.append({
+            "course_code": code,
+            "url": f"https://example.invalid/{code}.htm",
+            "course_title": f"Course {code}",
+            "offering_unit": "Department of " + code[:2],
+            "credit_units": "3",
+            "duration": "One Semester",
+            "semester": rnd.choice(["A", "B", "A, B", None]),
+            "prerequisites": prereq_text,
+            "exclusive_courses": ", ".join(excl) or None,
+            "aims": "Aims " * 40,
+            "assessment": {"coursework_pct": "40%", "exam_pct": "60%"},
+            "pdf_url": None,
+        })
+    return courses
+
+
+def legacy_write(conn, courses):
+    """The per-row insert loop build_course_db used before CourseWriter."""
+    cur = conn.cursor()
+    for c in courses:
+        code = c.get("course_code")
+        if not code:
+            continue
+        cur.execute(
+            "INSERT OR REPLACE INTO courses VALUES (?,?,?,?,?,?,?,?,?,?)",
+            (
+                code, c.get("course_title"), c.get("offering_unit"), c.get("credit_units"),
+                c.get("duration"), c.get("semester"), c.get("aims"),
+                json.dumps(c.get("assessment") or {}, ensure_ascii=False), c.get("pdf_url"), c.get("url"),
+            ),
+        )
+        prereq_text = c.get("prerequisites") or ""
+        prereq_codes = set(re.findall(r"[A-Z]{2,}\d{3,4}", prereq_text))
+        if not prereq_codes and prereq_text and prereq_text.strip():
+            cleaned_text = re.sub(r'\s+', ' ', prereq_text).strip()
+            lower_text = cleaned_text.lower()
+            is_hkdse_only = 'hkdse' in lower_text or 'dse' in lower_text
+            is_nil = lower_text in ['nil', 'none', 'n/a', 'na', '-', '']
+            if not is_nil and not is_hkdse_only:
+                cur.execute("INSERT OR REPLACE INTO special_requirements VALUES (?,?)", (code, cleaned_text))
+        for p in prereq_codes:
+            if p != code:
+                cur.execute("INSERT OR IGNORE INTO prerequisites VALUES (?,?)", (code, p))
+        excl_codes = set(re.findall(r"[A-Z]{2,}\d{3,4}", c.get("exclusive_courses") or ""))
+        for e in excl_codes:
+            if e != code:
+                cur.execute("INSERT OR IGNORE INTO exclusions VALUES (?,?)", (code, e))
+    conn.commit()
+
+
+def batched_write(conn, courses):
+    writer = CourseWriter(conn)
+    writer.add_many(courses)
+    writer.close()
+
+
+def run(fn, path, courses):
+    conn = sqlite3.connect(path)
+    create_schema(conn.cursor())
+    start = time.perf_counter()
+    fn(conn, courses)
+    elapsed = time.perf_counter() - start
+    dump = {t: sorted(conn.execute(f"SELECT * FROM {t}").fetchall(), key=repr) for t in TABLES}
+    conn.close()
+    return elapsed, dump
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--courses", type=int, default=12000)
+    args = ap.parse_args()
+
+    courses = synthetic_courses(args.courses)
+    with tempfile.TemporaryDirectory() as tmp:
+        t_old, old = run(legacy_write, os.path.join(tmp, "legacy.db"), courses)
+        t_new, new = run(batched_write, os.path.join(tmp, "batched.db"), courses)
+    rows = {t: len(new[t]) for t in TABLES}
+    print(f"{len(courses)} courses, rows: {rows}")
+    print(f"per-row execute   {t_old:7.3f} s")
+    print(f"CourseWriter      {t_new:7.3f} s  x{t_old / t_new:.1f}")
+    if old != new:
+        print("table contents differ", file=sys.stderr)
+        return 1
+    print("OK: identical tables")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""Compare structure table extraction before and after the single-pass rewrite.
+
+Usage:
+    python scripts/bench_major_parser.py [page.html ...] [--repeat N] [--scale K]
+
+For each page the previous implementation (backwards find_all_previous
+search per table, kept below as legacy_structure_tables) and
+extract_structure_tables are run on the same soup; their StructureTable
+lists must be identical. --scale K additionally times a synthetic page
+with the content block repeated K times, where the old per-table walks
+grow with the number of tables.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.dp_build.models import StructureTable  # noqa: E402
+from core.dp_build.parsers import extract_structure_tables, normalize_space  # noqa: E402
+
+
+def legacy_structure_tables(soup, content_root):
+    """Structure table extraction as parse_major_page did it before."""
+    structure_tables = []
+    tables = content_root.find_all("table", attrs={"border": True})
+
+    def infer_caption(tbl):
+        for prev in tbl.find_all_previous(limit=25):
+            if prev is tbl:
+                continue
+            if prev.name == "table":
+                return None
+            txt = normalize_space(prev.get_text(" ")) if prev.get_text(strip=True) else ""
+            if not txt:
+                continue
+            if len(txt) > 300:
+                continue
+            classes = " ".join(prev.get("class", []))
+            if any(key in classes for key in ["formText", "colorTitle", "formTitle"]) or prev.name in ["strong", "p", "div"]:
+                return txt[:120]
+        return None
+
+    for tbl in tables:
+        tbl_text = tbl.get_text(" ")
+        if not re.search(r"Course Code|Credit Units|GE|SDSC", tbl_text, re.I):
+            continue
+        caption = infer_caption(tbl)
+        headers = []
+        thead = tbl.find("thead")
+        if thead:
+            headers = [normalize_space(th.get_text(" ")) for th in thead.find_all(["th", "td"])]
+        else:
+            first_row = tbl.find("tr")
+            if first_row:
+                headers = [normalize_space(c.get_text(" ")) for c in first_row.find_all(["th", "td"])]
+        rows = []
+        for tr in tbl.find_all("tr"):
+            cells = tr.find_all(["td", "th"])
+            if not cells:
+                continue
+            row = [normalize_space(c.get_text(" ")) for c in cells]
+            if row and row != headers:
+                rows.append(row)
+        structure_tables.append(StructureTable(caption=caption, headers=headers, rows=rows))
+    return structure_tables
+
+
+def timed(fn, soup, root, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        out = fn(soup, root)
+    return out, (time.perf_counter() - start) / repeat
+
+
+def compare(label, html, repeat):
+    soup = BeautifulSoup(html, "lxml")
+    root = soup.select_one("#cityu-content") or soup
+    old, t_old = timed(legacy_structure_tables, soup, root, repeat)
+    new, t_new = timed(extract_structure_tables, soup, root, repeat)
+    same = old == new
+    print(f"{label:<28} tables={len(new):<4} legacy {t_old * 1000:8.2f} ms  single-pass {t_new * 1000:8.2f} ms  x{t_old / t_new:.1f}  {'identical' if same else 'DIFFERENT'}")
+    return same
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("files", nargs="*", help="major pages (default: data/sample_page.html)")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--scale", type=int, default=20, help="repeat the content block K times for a large synthetic page (0 = skip)")
+    args = ap.parse_args()
+
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    files = args.files or [os.path.join(root, "data", "sample_page.html")]
+    ok = True
+    for path in files:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            html = f.read()
+        ok &= compare(os.path.basename(path), html, args.repeat)
+        if args.scale > 1:
+            soup = BeautifulSoup(html, "lxml")
+            block = soup.select_one("#cityu-content") or soup.body
+            if block is not None:
+                inner = block.decode_contents()
+                big = f"<html><body><div id=\"cityu-content\">{inner * args.scale}</div></body></html>"
+                ok &= compare(f"{os.path.basename(path)} x{args.scale}", big, max(1, args.repeat // 2))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
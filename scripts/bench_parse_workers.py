@@ -0,0 +1,61 @@
+"""Benchmark the process-pool course parse stage against worker count.
+
+Usage:
+    python scripts/bench_parse_workers.py [--pages N] [--workers 1,2,4,8]
+
+The data/course_*.html fixtures are repeated until N pages are queued,
+then parse_courses is timed for each worker count. Speedup is relative
+to the single (in-process) worker run.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.dp_build.parsers import course_url, parse_courses  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pages", type=int, default=600, help="pages to parse per run")
+    ap.add_argument("--workers", help="comma-separated worker counts (default: 1,2,4,... up to CPU count)")
+    args = ap.parse_args()
+
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(root, "data", "course_*.html"))):
+        code = os.path.basename(path).split("_", 1)[-1].rsplit(".", 1)[0]
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            fixtures.append((code, course_url(code), f.read()))
+    if not fixtures:
+        print("No course pages found under data/", file=sys.stderr)
+        return 2
+    items = [fixtures[i % len(fixtures)] for i in range(args.pages)]
+
+    if args.workers:
+        counts = [int(w) for w in args.workers.split(",")]
+    else:
+        cpus = os.cpu_count() or 1
+        counts = [1]
+        while counts[-1] * 2 <= cpus:
+            counts.append(counts[-1] * 2)
+        if counts[-1] != cpus:
+            counts.append(cpus)
+
+    print(f"{len(items)} pages, {os.cpu_count()} CPUs")
+    base = None
+    for n in counts:
+        start = time.perf_counter()
+        parsed = parse_courses(items, parse_workers=n)
+        elapsed = time.perf_counter() - start
+        assert len(parsed) == len(items)
+        base = base or elapsed
+        print(f"workers={n:<3} {elapsed:7.2f} s  {len(items) / elapsed:8.0f} pages/s  speedup x{base / elapsed:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""Check and time the semester planner.
+
+Usage:
+    python scripts/bench_planner.py [--programmes N] [--size K]
+
+Builds synthetic programmes shaped like CityU curricula (four levels,
+later courses needing one to three earlier ones, some "X or Y"
+prerequisites, A-only / B-only / A+B offerings, a few exclusions) and:
+
+- compares plan lengths with an exhaustive search over every subset of
+  ready courses per semester on small programmes
+- checks every plan: prerequisites done in an earlier semester, course
+  offered in its semester, credits under the cap, no excluded pair
+- times plans for programmes of K courses
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from itertools import combinations
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.dp_build.db_writer import CourseWriter, create_schema  # noqa: E402
+from core.query.course_index import CourseIndex  # noqa: E402
+from core.query.planner import _Requirements, plan_semesters, semester_cycle  # noqa: E402
+from core.query.course_index import SEMESTER_BITS  # noqa: E402
+
+
+def synthetic_programme(prefix, n, rnd):
+    """Course dicts of one programme: n courses over four levels."""
+    courses = []
+    levels = [[] for _ in range(4)]
+    for i in range(n):
+        level = min(3, i * 4 // n)
+        code = f"{prefix}{level + 1}{i:03d}"
+        below = [c for lv in levels[:level] for c in lv]
+        if below and rnd.random() < 0.85:
+            picks = rnd.sample(below[-40:], min(len(below[-40:]), rnd.choice([1, 1, 2, 3])))
+            if len(picks) >= 2 and rnd.random() < 0.3:
+                text = f"{picks[0]} or {picks[1]}" + "".join(f" and {p}" for p in picks[2:])
+            else:
+                text = " and ".join(picks)
+        else:
+            text = "Nil"
+        excl = rnd.sample(below, 1) if below and rnd.random() < 0.05 else []
+        levels[level].append(code)
+        courses.append({
+            "course_code": code,
+            "url": f"https://example.invalid/{code}.htm",
+            "course_title": f"Course {code}",
+            "credit_units": rnd.choice(["3", "3", "3", "4", "6"]),
+            "semester": rnd.choice(["Semester A", "Semester B", "Semester A, Semester B", "Semester A, Semester B"]),
+            "prerequisites": text,
+            "exclusive_courses": ", ".join(excl) or None,
+        })
+    return courses
+
+
+def brute_force(req, cycle, cap):
+    """Fewest semesters, trying every subset of ready courses each semester."""
+    ids = sorted(req.needed)
+    full = frozenset(ids)
+    frontier = {frozenset()}
+    t = 0
+    while full not in frontier:
+        bit = SEMESTER_BITS[cycle[t % len(cycle)]]
+        nxt = set()
+        for done in frontier:
+            ready = [i for i in ids if i not in done and req.offer(i) & bit and all(p in done for p in req.needed[i])]
+            for r in range(len(ready) + 1):
+                for subset in combinations(ready, r):
+                    if sum(req.credits(i) for i in subset) <= cap:
+                        nxt.add(done | frozenset(subset))
+        frontier = nxt
+        t += 1
+    return t
+
+
+def check_plan(index, plan, completed, cap):
+    snap = index.snapshot()
+    done = set(completed)
+    taken = {c for s in plan["semesters"] for c, _, _ in s["courses"]}
+    for s in plan["semesters"]:
+        assert s["credits"] <= cap + 1e-9, s
+        for code, _, _ in s["courses"]:
+            i = snap.id_of[code]
+            assert not snap.semesters[i] or snap.semesters[i] & SEMESTER_BITS[s["term"]], (code, s["term"])
+            terms = snap.dnf.get(i) or [tuple(snap.pre_ids[snap.pre_ptr[i]:snap.pre_ptr[i + 1]])]
+            assert any(all(snap.codes[p] in done for p in t) for t in terms), (code, "prerequisites")
+            assert not snap.exclusions.get(i, frozenset()) & (taken | set(completed)), (code, "exclusion")
+        done |= {c for c, _, _ in s["courses"]}
+
+
+def build(db, courses, programmes):
+    conn = sqlite3.connect(db)
+    create_schema(conn.cursor(), reset=True)
+    writer = CourseWriter(conn)
+    writer.add_many(courses)
+    for prog, codes in programmes.items():
+        writer.write_programme(prog, f"Programme {prog}", None, [(c, "Core", None) for c in codes])
+    writer.close()
+    conn.close()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--programmes", type=int, default=30, help="small programmes checked against brute force")
+    ap.add_argument("--size", type=int, default=120, help="courses per large programme")
+    args = ap.parse_args()
+    rnd = random.Random(24)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Small programmes: plan length must match exhaustive search
+        courses, programmes = [], {}
+        for p in range(args.programmes):
+            prog = synthetic_programme(f"S{p:02d}", rnd.randint(6, 10), rnd)
+            courses += prog
+            programmes[f"S{p:02d}"] = [c["course_code"] for c in prog]
+        db = os.path.join(tmp, "small.db")
+        build(db, courses, programmes)
+        index = CourseIndex(db)
+        worse = 0
+        for prog in programmes:
+            for cap, start in ((9, "A"), (12, "B"), (7, "A")):
+                plan = plan_semesters(index, [], programme=prog, credit_cap=cap, start_semester=start)
+                check_plan(index, plan, [], cap)
+                req = _Requirements(index.snapshot(), set(), cap, 3)
+                for code in programmes[prog]:
+                    if code not in {c for c, _ in plan["unscheduled"]}:
+                        req.require(index.snapshot().id_of[code])
+                best = brute_force(req, semester_cycle(start), cap)
+                assert len(plan["semesters"]) >= best
+                if len(plan["semesters"]) > best:
+                    assert not plan["optimal"], (prog, cap, start)
+                    worse += 1
+        print(f"{args.programmes * 3} small plans: lengths match exhaustive search ({worse} longer, none claimed optimal)")
+
+        # Large programmes: timing
+        courses, programmes = [], {}
+        for p in range(5):
+            prog = synthetic_programme(f"L{p}", args.size, rnd)
+            courses += prog
+            programmes[f"L{p}"] = [c["course_code"] for c in prog]
+        db = os.path.join(tmp, "large.db")
+        build(db, courses, programmes)
+        index = CourseIndex(db)
+        for prog, codes in programmes.items():
+            completed = codes[: args.size // 8]
+            t0 = time.perf_counter()
+            plan = plan_semesters(index, completed, programme=prog, credit_cap=18)
+            elapsed = time.perf_counter() - t0
+            check_plan(index, plan, completed, 18)
+            n = sum(len(s["courses"]) for s in plan["semesters"])
+            print(f"{prog}: {n} courses in {len(plan['semesters'])} semesters (lower bound {plan['lower_bound']}, "
+                  f"{'optimal' if plan['optimal'] else 'best found'}, {len(plan['unscheduled'])} unschedulable) "
+                  f"in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
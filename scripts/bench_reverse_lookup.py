@@ -0,0 +1,95 @@
+"""Benchmark reverse-edge lookups with and without the secondary indexes.
+
+Usage:
+    python scripts/bench_reverse_lookup.py [--courses N] [--lookups K]
+
+Builds a synthetic catalogue (see bench_db_writer.synthetic_courses),
+then times K "which courses depend on / exclude X" queries and the
+semester-A course list, first with the reverse indexes dropped (full
+scans, LIKE matching) and then with the schema as built. Results must
+match; the query plans are printed for both.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.dp_build.db_writer import CourseWriter, create_schema  # noqa: E402
+from core.dp_build.migrations import INDEXES  # noqa: E402
+from bench_db_writer import synthetic_courses  # noqa: E402
+
+DEPENDENTS = "SELECT course_code FROM prerequisites WHERE prereq_code = ? ORDER BY course_code"
+EXCLUDED_BY = "SELECT course_code FROM exclusions WHERE excluded_code = ? ORDER BY course_code"
+SEMESTER_LIKE = "SELECT course_code FROM courses WHERE semester LIKE '%A%' ORDER BY course_code"
+SEMESTER_IDX = (
+    "SELECT course_code FROM courses WHERE course_code IN "
+    "(SELECT course_code FROM course_semesters WHERE semester = 'A') ORDER BY course_code"
+)
+
+
+def run(conn, codes, semester_sql):
+    out = []
+    t0 = time.perf_counter()
+    for code in codes:
+        out.append(conn.execute(DEPENDENTS, (code,)).fetchall())
+        out.append(conn.execute(EXCLUDED_BY, (code,)).fetchall())
+    t_edges = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    sem = conn.execute(semester_sql).fetchall()
+    t_sem = time.perf_counter() - t0
+    return out, sem, t_edges, t_sem
+
+
+def plan(conn, sql, params=()):
+    return "; ".join(r[-1] for r in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--courses", type=int, default=50000)
+    ap.add_argument("--lookups", type=int, default=2000)
+    args = ap.parse_args()
+
+    courses = synthetic_courses(args.courses)
+    # Word-form semesters, as on the catalogue pages
+    for c in courses:
+        if c.get("semester"):
+            c["semester"] = ", ".join(f"Semester {s.strip()} 2025/26" for s in c["semester"].split(","))
+    codes = random.Random(1).sample([c["course_code"] for c in courses], min(args.lookups, len(courses)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "courses.db")
+        conn = sqlite3.connect(db)
+        create_schema(conn.cursor(), reset=True)
+        writer = CourseWriter(conn)
+        writer.add_many(courses)
+        writer.close()
+        writer.analyze()
+
+        for sql in INDEXES:
+            conn.execute("DROP INDEX IF EXISTS " + sql.split(" IF NOT EXISTS ")[1].split(" ON ")[0])
+        conn.execute("ANALYZE")
+        print("before:", plan(conn, DEPENDENTS, ("X",)))
+        old, old_sem, old_edges, old_sem_t = run(conn, codes, SEMESTER_LIKE)
+
+        for sql in INDEXES:
+            conn.execute(sql)
+        conn.execute("ANALYZE")
+        print("after: ", plan(conn, DEPENDENTS, ("X",)))
+        new, new_sem, new_edges, new_sem_t = run(conn, codes, SEMESTER_IDX)
+        conn.close()
+
+    assert old == new, "reverse lookups differ"
+    assert old_sem == new_sem, "semester filter differs"
+    print(f"{len(courses)} courses, {len(codes)} codes x 2 reverse lookups")
+    print(f"reverse lookups  scan {old_edges:7.3f} s   index {new_edges:7.3f} s  x{old_edges / new_edges:.1f}")
+    print(f"semester A list  LIKE {old_sem_t:7.3f} s   table {new_sem_t:7.3f} s")
+
+
+if __name__ == "__main__":
+    main()
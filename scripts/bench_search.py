@@ -0,0 +1,84 @@
+"""Benchmark keyword search: courses_fts vs scanning every row in Python.
+
+Usage:
+    python scripts/bench_search.py [--courses N] [--queries K]
+
+Builds a synthetic catalogue whose aims are drawn from a Zipf-like
+vocabulary, then runs K two-word searches (one common, one random word) through search_courses and
+through a Python loop over all course rows (what callers had to do
+before the index). Both must find the same courses.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.dp_build.db_writer import CourseWriter, create_schema  # noqa: E402
+from core.query.search import search_courses  # noqa: E402
+from bench_db_writer import synthetic_courses  # noqa: E402
+
+# Zipf-like vocabulary: a few common words, a long tail of rare ones
+_rnd = random.Random(0)
+WORDS = sorted({"".join(_rnd.choice("bcdfghklmnprstvz") + _rnd.choice("aeiou") for _ in range(4)) for _ in range(5000)})
+
+
+def python_scan(conn, words):
+    hits = []
+    for code, title, aims in conn.execute("SELECT course_code, course_title, aims FROM courses"):
+        text = f"{code} {title or ''} {aims or ''}".lower().split()
+        if all(any(t.startswith(w) for t in text) for w in words):
+            hits.append(code)
+    return sorted(hits)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--courses", type=int, default=20000)
+    ap.add_argument("--queries", type=int, default=50)
+    args = ap.parse_args()
+    rnd = random.Random(3)
+
+    courses = synthetic_courses(args.courses)
+    for c in courses:
+        if not c.get("error"):
+            c["aims"] = " ".join(WORDS[min(int(rnd.paretovariate(0.6)), len(WORDS)) - 1] for _ in range(40))
+    queries = [[WORDS[rnd.randrange(20)], WORDS[rnd.randrange(len(WORDS))]] for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "courses.db")
+        conn = sqlite3.connect(db)
+        create_schema(conn.cursor(), reset=True)
+        writer = CourseWriter(conn)
+        writer.add_many(courses)
+        writer.close()
+        t0 = time.perf_counter()
+        n = writer.refresh_search_index()
+        t_index = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        scanned = [python_scan(conn, q) for q in queries]
+        t_scan = time.perf_counter() - t0
+        conn.close()
+
+        t0 = time.perf_counter()
+        found = [sorted(r[0] for r in search_courses(db, " ".join(q), limit=args.courses)) for q in queries]
+        t_fts = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for q in queries:
+            search_courses(db, " ".join(q), limit=20)
+        t_top = time.perf_counter() - t0
+
+    assert found == scanned, "FTS results differ from the Python scan"
+    print(f"indexed {n} courses in {t_index:.3f} s")
+    print(f"{len(queries)} queries, all matches: python scan {t_scan:.3f} s, fts {t_fts:.3f} s")
+    print(f"{len(queries)} queries, top 20 ranked: fts {1000 * t_top / len(queries):.1f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
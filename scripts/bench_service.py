@@ -0,0 +1,157 @@
+"""Load-test the query service and check hot reload.
+
+Usage:
+    python scripts/bench_service.py [--courses N] [--requests K] [--connections C]
+
+Starts ``serve`` on a synthetic catalogue in a background thread, then
+sends K keep-alive requests over C connections: mostly /available for a
+pool of student profiles (so the LRU cache sees repeats, as during
+registration week), plus /course, /search and /prerequisites. Every
+/available body is checked against CourseIndex. A malformed
+Content-Length must get a 400. Finally a course is added to the DB: it
+must not be served while the DB is marked as being built, and must
+appear once the build is marked complete.
+
+Client and server share the machine, so the reported rate is a lower
+bound for the server alone.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.dp_build.db_writer import CourseWriter, create_schema  # noqa: E402
+from core.dp_build.migrations import set_build_state  # noqa: E402
+from core.query.course_index import CourseIndex  # noqa: E402
+from core.query.service import serve  # noqa: E402
+from bench_db_writer import synthetic_courses  # noqa: E402
+
+
+async def get(reader, writer, path):
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: bench\r\n\r\n".encode())
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = int(next(line for line in head.split(b"\r\n") if line.lower().startswith(b"content-length")).split(b":")[1])
+    return status, await reader.readexactly(length)
+
+
+async def client(address, paths, results):
+    reader, writer = await asyncio.open_connection(*address)
+    for path in paths:
+        results.append((path,) + await get(reader, writer, path))
+    writer.close()
+
+
+async def load(address, paths, connections):
+    results = []
+    share = [paths[i::connections] for i in range(connections)]
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client(address, p, results) for p in share))
+    return results, time.perf_counter() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--courses", type=int, default=3000)
+    ap.add_argument("--requests", type=int, default=20000)
+    ap.add_argument("--connections", type=int, default=50)
+    ap.add_argument("--profiles", type=int, default=500, help="distinct student profiles")
+    args = ap.parse_args()
+    rnd = random.Random(8)
+
+    courses = synthetic_courses(args.courses)
+    codes = [c["course_code"] for c in courses if not c.get("error")]
+    profiles = [sorted(rnd.sample(codes, rnd.randint(3, 20))) for _ in range(args.profiles)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "courses.db")
+        conn = sqlite3.connect(db)
+        create_schema(conn.cursor(), reset=True)
+        writer = CourseWriter(conn)
+        writer.add_many(courses)
+        writer.close()
+        writer.refresh_closure()
+        writer.refresh_search_index()
+        conn.close()
+
+        ready = threading.Event()
+        address = []
+
+        def on_ready(addr):
+            address.extend(addr)
+            ready.set()
+
+        threading.Thread(
+            target=lambda: asyncio.run(serve(db, port=0, reload_interval=0.2, ready=on_ready)), daemon=True
+        ).start()
+        ready.wait(30)
+
+        paths = []
+        for _ in range(args.requests):
+            kind = rnd.random()
+            if kind < 0.85:
+                sem = rnd.choice(["", "&semester=A", "&semester=B"])
+                paths.append(f"/available?completed={','.join(rnd.choice(profiles))}{sem}")
+            elif kind < 0.93:
+                paths.append(f"/course/{rnd.choice(codes)}")
+            elif kind < 0.97:
+                paths.append(f"/prerequisites/{rnd.choice(codes)}")
+            else:
+                paths.append(f"/search?q=course+{rnd.choice(codes)[:3]}")
+
+        results, elapsed = asyncio.run(load(address, paths, args.connections))
+        assert all(status == 200 for _, status, _ in results), "non-200 responses"
+        index = CourseIndex(db)
+        checked = 0
+        for path, _, body in results[:2000]:
+            if not path.startswith("/available"):
+                continue
+            data = json.loads(body)
+            expected = index.find_available(data["completed"], data["semester"])
+            assert [d["code"] for d in data["available"]] == [c for c, _ in expected["available"]], path
+            assert [d["code"] for d in data["completed_children"]] == [c for c, _, _ in expected["completed_children"]], path
+            checked += 1
+        _, health = asyncio.run(load(address, ["/health"], 1))[0][0][1:]
+        stats = json.loads(health)
+        print(f"{len(results)} requests over {args.connections} connections in {elapsed:.2f} s: "
+              f"{len(results) / elapsed:.0f} req/s ({checked} /available bodies verified)")
+        print(f"cache: {stats['cache_hits']} hits, {stats['cache_misses']} misses")
+
+        for bad in (b"abc", b"-5"):
+            with socket.create_connection(tuple(address)) as sock:
+                sock.sendall(b"GET /health HTTP/1.1\r\nContent-Length: " + bad + b"\r\n\r\n")
+                assert sock.recv(100).startswith(b"HTTP/1.1 400"), bad
+        print("malformed Content-Length: 400")
+
+        conn = sqlite3.connect(db)
+        set_build_state(conn, "building")
+        conn.execute("INSERT INTO courses (course_code, course_title) VALUES ('ZZ9999', 'Added later')")
+        conn.commit()
+        time.sleep(1.5)
+        (_, _, body), = asyncio.run(load(address, ["/health"], 1))[0]
+        assert json.loads(body)["index_loads"] == 1, "service reloaded a DB still being built"
+        set_build_state(conn, "complete")
+        conn.close()
+        t0 = time.perf_counter()
+        while True:
+            (_, _, body), = asyncio.run(load(address, ["/health"], 1))[0]
+            if json.loads(body)["index_loads"] == 2:
+                break
+            assert time.perf_counter() - t0 < 10, "service did not reload"
+            time.sleep(0.1)
+        (_, _, body), = asyncio.run(load(address, ["/available?completed="], 1))[0]
+        assert "ZZ9999" in [d["code"] for d in json.loads(body)["no_prereq"]], "reloaded index lacks the new course"
+        print(f"hot reload: new course served after {time.perf_counter() - t0:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
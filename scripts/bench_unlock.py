@@ -0,0 +1,167 @@
+"""Check and time what-if and quickest-route queries.
+
+Usage:
+    python scripts/bench_unlock.py [--courses N] [--queries K]
+
+- what_if on the synthetic catalogue of bench_cohort.py must equal the
+  difference of two find_available calls (before / after adding the
+  courses); both ways are timed
+- unlock_path on small synthetic programmes (bench_planner.py) must
+  match the smallest valid set found by trying every subset, and every
+  route is checked: each step only needs completed or earlier courses,
+  no two chosen courses exclude each other
+- unlock_path is timed for random targets on the large catalogue
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from itertools import combinations
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.dp_build.db_writer import CourseWriter, create_schema  # noqa: E402
+from core.query.course_index import CourseIndex  # noqa: E402
+from core.query.planner import unlock_path  # noqa: E402
+from bench_db_writer import synthetic_courses  # noqa: E402
+from bench_planner import synthetic_programme  # noqa: E402
+
+
+def build(db, courses):
+    conn = sqlite3.connect(db)
+    create_schema(conn.cursor(), reset=True)
+    writer = CourseWriter(conn)
+    writer.add_many(courses)
+    writer.close()
+    conn.close()
+
+
+def check_route(index, route, completed):
+    snap = index.snapshot()
+    done = {snap.id_of[c] for c in completed if c in snap.id_of}
+    codes = set(completed)
+    chosen = {c for step in route["steps"] for c, _ in step}
+    for step in route["steps"]:
+        for code, _ in step:
+            i = snap.id_of[code]
+            assert snap.satisfied(i, done, codes), (code, "prerequisites")
+            assert not snap.exclusions.get(i, frozenset()) & (chosen | codes), (code, "exclusion")
+        done |= {snap.id_of[c] for c, _ in step}
+        codes |= {c for c, _ in step}
+    assert route["steps"][-1] == [(route["target"], snap.titles[snap.id_of[route["target"]]])]
+
+
+def smallest_route(index, completed, target):
+    """Fewest courses (target included) that can all be taken, by brute force."""
+    snap = index.snapshot()
+    t = snap.id_of[target]
+    # Candidates: everything the target's listed prerequisites reach
+    reach, stack = set(), [t]
+    while stack:
+        i = stack.pop()
+        for p in snap.pre_ids[snap.pre_ptr[i]:snap.pre_ptr[i + 1]]:
+            if p not in reach and snap.codes[p] not in completed:
+                reach.add(p)
+                stack.append(p)
+    cands = sorted(reach)
+    done0 = {snap.id_of[c] for c in completed if c in snap.id_of}
+    for r in range(len(cands) + 1):
+        for subset in combinations(cands, r):
+            chosen = set(subset) | {t}
+            names = {snap.codes[i] for i in chosen}
+            if any(snap.exclusions.get(i, frozenset()) & (names | set(completed)) for i in chosen):
+                continue
+            done, left = set(done0), set(chosen)
+            while left:
+                ready = {i for i in left if snap.satisfied(i, done, {snap.codes[d] for d in done})}
+                if not ready:
+                    break
+                done |= ready
+                left -= ready
+            if not left:
+                return r + 1
+    return None
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--courses", type=int, default=5000)
+    ap.add_argument("--queries", type=int, default=500)
+    args = ap.parse_args()
+    rnd = random.Random(25)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Small programmes: routes against brute force
+        courses = []
+        for p in range(40):
+            courses += synthetic_programme(f"S{p:02d}", rnd.randint(8, 14), rnd)
+        db = os.path.join(tmp, "small.db")
+        build(db, courses)
+        index = CourseIndex(db)
+        checked = 0
+        for c in courses:
+            prefix = c["course_code"][:3]
+            same = [x["course_code"] for x in courses if x["course_code"].startswith(prefix) and x is not c]
+            completed = rnd.sample(same, min(len(same), rnd.randint(0, 3)))
+            route = unlock_path(index, completed, c["course_code"])
+            best = smallest_route(index, completed, c["course_code"]) if c["course_code"] not in completed else None
+            if route["reason"]:
+                assert best is None or route["reason"] == "already completed", (c["course_code"], route, best)
+                continue
+            check_route(index, route, completed)
+            n = sum(len(step) for step in route["steps"])
+            assert route["optimal"] and n == best, (c["course_code"], completed, n, best)
+            checked += 1
+        print(f"{checked} routes on small programmes: valid and as short as exhaustive search")
+
+        # Large catalogue
+        courses = synthetic_courses(args.courses)
+        for c in courses:
+            if c.get("prerequisites") and " and " in c["prerequisites"] and rnd.random() < 0.5:
+                c["prerequisites"] = c["prerequisites"].replace(" and ", " or ", 1)
+        codes = [c["course_code"] for c in courses if not c.get("error")]
+        db = os.path.join(tmp, "large.db")
+        build(db, courses)
+        index = CourseIndex(db)
+        queries = [
+            (rnd.sample(codes, rnd.randint(5, 40)), rnd.sample(codes, rnd.randint(1, 3)))
+            for _ in range(args.queries)
+        ]
+
+        t0 = time.perf_counter()
+        diffs = []
+        for completed, added in queries:
+            before = index.find_available(completed)["available"]
+            after = index.find_available(completed + added)["available"]
+            diffs.append([x for x in after if x not in set(before)])
+        t_diff = (time.perf_counter() - t0) / len(queries)
+
+        t0 = time.perf_counter()
+        results = [index.what_if(completed, added) for completed, added in queries]
+        t_what_if = (time.perf_counter() - t0) / len(queries)
+        for r, diff in zip(results, diffs):
+            assert r["unlocked"] == diff
+        print(f"what_if: {t_what_if * 1000:.3f} ms/query vs {t_diff * 1000:.3f} ms for two find_available "
+              f"calls ({len(queries)} queries, results equal)")
+
+        t0 = time.perf_counter()
+        worst, lengths, proven = 0.0, [], 0
+        for completed, _ in queries[:100]:
+            target = rnd.choice(codes)
+            t1 = time.perf_counter()
+            route = unlock_path(index, completed, target)
+            worst = max(worst, time.perf_counter() - t1)
+            if not route["reason"]:
+                check_route(index, route, completed)
+                lengths.append(sum(len(step) for step in route["steps"]))
+                proven += route["optimal"]
+        elapsed = (time.perf_counter() - t0) / 100
+        print(f"unlock_path: {elapsed * 1000:.2f} ms/query (worst {worst * 1000:.1f} ms), routes of "
+              f"{min(lengths)}-{max(lengths)} courses, {proven}/{len(lengths)} proven shortest")
+
+
+if __name__ == "__main__":
+    main()
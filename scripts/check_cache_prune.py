@@ -0,0 +1,61 @@
+"""Check that pruning a shared HTML cache never loses live pages.
+
+Usage:
+    python scripts/check_cache_prune.py [--writers N] [--pages K]
+
+N processes each put K pages into one cache directory while another
+process prunes it in a loop. Afterwards every index entry must point to
+an existing object, and every page written must be in the index.
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.scraper.cache import HtmlStore  # noqa: E402
+
+
+def writer(cache_dir, seed, pages):
+    store = HtmlStore(cache_dir)
+    for i in range(pages):
+        store.put(f"https://example.invalid/{seed}/{i}", f"<p>{seed} {i} {'x' * 2000}</p>")
+
+
+def pruner(cache_dir, rounds):
+    store = HtmlStore(cache_dir)
+    for _ in range(rounds):
+        store.prune()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--writers", type=int, default=3)
+    ap.add_argument("--pages", type=int, default=300)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        procs = [mp.Process(target=writer, args=(tmp, k, args.pages)) for k in range(args.writers)]
+        procs.append(mp.Process(target=pruner, args=(tmp, 50)))
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        assert all(p.exitcode == 0 for p in procs), "a writer or the pruner failed"
+
+        store = HtmlStore(tmp)
+        missing = [
+            e["url"] for e in store._entries.values()
+            if not os.path.isfile(store._object_path(e["sha"], e.get("codec", "gz")))
+        ]
+        assert not missing, f"{len(missing)} entries lost their object, e.g. {missing[0]}"
+        assert len(store._entries) == args.writers * args.pages, len(store._entries)
+        for k in range(args.writers):
+            assert store.get(f"https://example.invalid/{k}/0") is not None
+        print(f"{len(store._entries)} pages from {args.writers} processes survived 50 concurrent prunes")
+
+
+if __name__ == "__main__":
+    main()
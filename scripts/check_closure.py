@@ -0,0 +1,130 @@
+"""Check the prereq_closure / prereq_reduced tables against networkx.
+
+Usage:
+    python scripts/check_closure.py [--courses N] [--rounds R]
+
+Writes a synthetic catalogue (see bench_db_writer.synthetic_courses),
+builds the closure and compares it with networkx ancestors, shortest
+path lengths and transitive_reduction. It then applies R rounds of random
+prerequisite edits through CourseWriter.sync and checks that the
+incrementally maintained tables equal a full rebuild. Finally it times
+"all prerequisites of X" as a SQL query against nx.ancestors on a graph
+loaded from the DB.
+"""
+import argparse
+import copy
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+import networkx as nx
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.dp_build.closure import rebuild_closure  # noqa: E402
+from core.dp_build.db_writer import CourseWriter, create_schema  # noqa: E402
+from bench_db_writer import synthetic_courses  # noqa: E402
+
+
+def tables(conn):
+    closure = sorted(conn.execute("SELECT * FROM prereq_closure"))
+    reduced = sorted(conn.execute("SELECT * FROM prereq_reduced"))
+    return closure, reduced
+
+
+def check_against_networkx(conn):
+    g = nx.DiGraph(conn.execute("SELECT prereq_code, course_code FROM prerequisites").fetchall())
+    expected = sorted(
+        (c, a, d)
+        for c in g.nodes
+        for a, d in nx.single_source_shortest_path_length(g.reverse(copy=False), c).items()
+        if a != c
+    )
+    closure, reduced = tables(conn)
+    assert closure == expected, "closure differs from networkx"
+    assert nx.is_directed_acyclic_graph(g)
+    expected_reduced = sorted((c, p) for p, c in nx.transitive_reduction(g).edges)
+    assert reduced == expected_reduced, "reduction differs from networkx"
+    return g
+
+
+def mutate(courses, rnd):
+    codes = [c["course_code"] for c in courses]
+    index = {code: i for i, code in enumerate(codes)}
+    for c in rnd.sample(courses, max(1, len(courses) // 50)):
+        if c.get("error"):
+            continue
+        i = index[c["course_code"]]
+        k = rnd.choice([0, 1, 2, 3])
+        # Prerequisites stay earlier in the list, so the graph stays acyclic
+        prereqs = rnd.sample(codes[:i], min(k, i))
+        c["prerequisites"] = " and ".join(prereqs) or "Nil"
+    drop = rnd.sample(range(len(courses)), max(1, len(courses) // 200))
+    return [c for i, c in enumerate(courses) if i not in set(drop)]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--courses", type=int, default=3000)
+    ap.add_argument("--rounds", type=int, default=5)
+    args = ap.parse_args()
+    rnd = random.Random(7)
+
+    courses = synthetic_courses(args.courses)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "courses.db")
+        conn = sqlite3.connect(db)
+        create_schema(conn.cursor(), reset=True)
+        writer = CourseWriter(conn)
+        writer.add_many(courses)
+        writer.close()
+        t0 = time.perf_counter()
+        writer.refresh_closure()
+        t_full = time.perf_counter() - t0
+        g = check_against_networkx(conn)
+        print(f"full rebuild: {len(g)} nodes, {g.number_of_edges()} edges, "
+              f"{len(tables(conn)[0])} closure rows in {t_full:.3f} s - matches networkx")
+
+        for r in range(args.rounds):
+            courses = mutate(copy.deepcopy(courses), rnd)
+            writer = CourseWriter(conn)
+            changes = writer.sync(courses)
+            writer.close()
+            t0 = time.perf_counter()
+            n = writer.refresh_closure()
+            t_inc = time.perf_counter() - t0
+            incremental = tables(conn)
+            rebuild_closure(conn)
+            conn.commit()
+            assert incremental == tables(conn), f"round {r}: incremental closure differs from rebuild"
+            check_against_networkx(conn)
+            print(f"round {r}: changed={changes['changed']} removed={changes['removed']} "
+                  f"-> recomputed {n} courses in {t_inc:.3f} s - matches full rebuild")
+
+        codes = rnd.sample([c["course_code"] for c in courses], 200)
+        t0 = time.perf_counter()
+        sql = [
+            {a for (a,) in conn.execute("SELECT ancestor_code FROM prereq_closure WHERE course_code = ?", (c,))}
+            for c in codes
+        ]
+        t_sql = time.perf_counter() - t0
+        conn.close()
+
+        t0 = time.perf_counter()
+        py = []
+        for c in codes:
+            # What render_dependency_tree did per call: load, build, walk
+            conn = sqlite3.connect(db)
+            g = nx.DiGraph(conn.execute("SELECT prereq_code, course_code FROM prerequisites").fetchall())
+            conn.close()
+            py.append(nx.ancestors(g, c) if c in g else set())
+        t_py = time.perf_counter() - t0
+    assert sql == py
+    print(f"ancestors of 200 courses: SQL {t_sql:.3f} s, load graph + nx.ancestors {t_py:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Check the lxml course parser against the BeautifulSoup reference.
+
+Usage:
+    python scripts/check_course_parser.py [data/course_*.html ...] [--repeat N]
+
+Every page is parsed with both implementations; any field that differs is
+printed and the script exits with status 1. Per-page timings are shown
+for both parsers.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.dp_build.parsers import course_url, parse_course_page_bs4, parse_course_page_lxml  # noqa: E402
+
+
+def time_parser(fn, code, url, html, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(code, url, html)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("files", nargs="*", help="course HTML files (default: data/course_*.html)")
+    ap.add_argument("--repeat", type=int, default=20, help="parses per file for timing")
+    args = ap.parse_args()
+
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    files = args.files or sorted(glob.glob(os.path.join(root, "data", "course_*.html")))
+    if not files:
+        print("No course pages found", file=sys.stderr)
+        return 2
+
+    mismatches = 0
+    total_bs4 = total_lxml = 0.0
+    for path in files:
+        code = os.path.basename(path).split("_", 1)[-1].rsplit(".", 1)[0]
+        url = course_url(code)
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            html = f.read()
+        ref = parse_course_page_bs4(code, url, html)
+        fast = parse_course_page_lxml(code, url, html)
+        for key in sorted(set(ref) | set(fast)):
+            if ref.get(key) != fast.get(key):
+                mismatches += 1
+                print(f"{code}.{key}:\n  bs4:  {ref.get(key)!r}\n  lxml: {fast.get(key)!r}")
+        t_bs4 = time_parser(parse_course_page_bs4, code, url, html, args.repeat)
+        t_lxml = time_parser(parse_course_page_lxml, code, url, html, args.repeat)
+        total_bs4 += t_bs4
+        total_lxml += t_lxml
+        print(f"{code:<10} bs4 {t_bs4 * 1000:7.2f} ms  lxml {t_lxml * 1000:7.2f} ms  x{t_bs4 / t_lxml:.1f}")
+
+    print(f"{'total':<10} bs4 {total_bs4 * 1000:7.2f} ms  lxml {total_lxml * 1000:7.2f} ms  x{total_bs4 / total_lxml:.1f}")
+    if mismatches:
+        print(f"{mismatches} field(s) differ", file=sys.stderr)
+        return 1
+    print(f"OK: {len(files)} page(s) identical")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
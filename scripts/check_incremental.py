@@ -0,0 +1,113 @@
+"""Check that an incremental build over some majors leaves the others alone.
+
+Usage:
+    python scripts/check_incremental.py
+
+Builds a shared database with two programmes through CourseSink (as
+build-db does with several major URLs), then runs an incremental sync
+with only the first programme, which has dropped one of its own courses
+and one course it shared with the second. Expected:
+
+- the dropped course only the first programme listed is deleted
+- the shared course stays (the second programme still lists it)
+- the second programme, its course list and its own courses are intact
+- a sync with both programmes then deletes a course neither lists
+
+Then a plain rebuild (no reset, not incremental) after one course moved
+from Semester A to B and changed its prerequisites, and another dropped
+its prerequisites, must leave no stale course_semesters, prerequisites
+or prereq_expressions rows behind.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.dp_build.db_writer import CourseSink  # noqa: E402
+from core.query.course_index import CourseIndex  # noqa: E402
+
+
+def course(code, **fields):
+    c = {"course_code": code, "course_title": f"Course {code}", "url": f"https://example.invalid/{code}.htm",
+         "prerequisites": "Nil"}
+    c.update(fields)
+    return c
+
+
+def build(db, programmes, incremental):
+    sink = CourseSink(db, reset=not incremental, incremental=incremental)
+    codes = sorted({c for members in programmes.values() for c in members})
+    for prog, members in programmes.items():
+        sink.put_programme(prog, f"Programme {prog}", None, [(c, "Core", None) for c in members])
+    for code in codes:
+        sink.put(course(code))
+    sink.close(complete=True)
+    return sink.changes
+
+
+def state(db):
+    conn = sqlite3.connect(db)
+    courses = {c for (c,) in conn.execute("SELECT course_code FROM courses")}
+    listed = {}
+    for prog, code in conn.execute("SELECT programme_code, course_code FROM programme_courses"):
+        listed.setdefault(prog, set()).add(code)
+    conn.close()
+    return courses, listed
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "courses.db")
+        a = {"AA1001", "AA1002", "AA2001", "SH1001"}
+        b = {"BB1001", "BB2001", "SH1001"}
+        build(db, {"PA": a, "PB": b}, incremental=False)
+
+        changes = build(db, {"PA": a - {"AA2001", "SH1001"}}, incremental=True)
+        courses, listed = state(db)
+        assert "AA2001" not in courses, "course dropped by the programme in the run was kept"
+        assert "SH1001" in courses, "course still listed by another programme was deleted"
+        assert b <= courses and listed.get("PB") == b, "other programme was touched"
+        assert changes["removed"] == 1, changes
+        print(f"single-major run: {changes}; PB and its {len(b)} courses intact")
+
+        conn = sqlite3.connect(db)
+        conn.execute("INSERT INTO courses (course_code, course_title) VALUES ('ZZ9999', 'Orphan')")
+        conn.commit()
+        conn.close()
+        changes = build(db, {"PA": a - {"AA2001", "SH1001"}, "PB": b - {"SH1001"}}, incremental=True)
+        courses, _ = state(db)
+        assert "SH1001" not in courses and "ZZ9999" not in courses, courses
+        print(f"both majors: {changes}; courses neither programme lists are deleted")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "courses.db")
+        first = [course("CS1000", semester="Semester A"), course("CS2000", semester="Semester A"),
+                 course("CS3000", semester="Semester A", prerequisites="CS1000 or CS2000"),
+                 course("CS4000", semester="Semester A", prerequisites="CS1000 or CS2000")]
+        second = first[:2] + [course("CS3000", semester="Semester B", prerequisites="CS1000"),
+                              course("CS4000", semester="Semester A")]
+        for courses in (first, second):
+            sink = CourseSink(db)
+            for c in courses:
+                sink.put(c)
+            sink.close(complete=True)
+
+        conn = sqlite3.connect(db)
+        semesters = {s for (s,) in conn.execute("SELECT semester FROM course_semesters WHERE course_code = 'CS3000'")}
+        prereqs = {p for (p,) in conn.execute("SELECT prereq_code FROM prerequisites WHERE course_code = 'CS3000'")}
+        dropped = [conn.execute(f"SELECT COUNT(*) FROM {table} WHERE course_code = 'CS4000'").fetchone()[0]
+                   for table in ("prerequisites", "prereq_expressions")]
+        conn.close()
+        assert semesters == {"B"}, f"stale semesters after rebuild: {semesters}"
+        assert prereqs == {"CS1000"} and dropped == [0, 0], f"stale prerequisite rows: {prereqs} {dropped}"
+        index = CourseIndex(db)
+        in_a = [code for code, _ in index.find_available(["CS1000"], semester_filter="A")["available"]]
+        in_b = [code for code, _ in index.find_available(["CS1000"], semester_filter="B")["available"]]
+        assert "CS3000" not in in_a and in_b == ["CS3000"], (in_a, in_b)
+        print("rebuild without reset: old semester and prerequisite rows replaced")
+
+
+if __name__ == "__main__":
+    main()
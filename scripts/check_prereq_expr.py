@@ -0,0 +1,113 @@
+"""Check the prerequisite expression parser and time the bitmask evaluator.
+
+Usage:
+    python scripts/check_prereq_expr.py [--students N]
+
+1. Parses known catalogue phrasings (including the three sample pages in
+   data/) and compares with the expected compact form; every expression
+   must survive dumps -> loads.
+2. Evaluates random expressions for N random students three ways: the
+   old rule (all listed codes required), direct AST evaluation, and DNF
+   bitmasks. The latter two must agree; the old rule's false "not
+   eligible" answers are counted.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.dp_build.parsers import parse_course_page  # noqa: E402
+from core.dp_build.prereq_expr import (  # noqa: E402
+    codes, compile_masks, dumps, evaluate, loads, parse_prereq, satisfied,
+)
+
+CASES = {
+    "CS2311 or CS2315 or CS1315": "CS1315|CS2311|CS2315",
+    "(CS2310 or CS2311) and MA1200": "(CS2310|CS2311)&MA1200",
+    "CS1102, CS1103 or CS1104": "CS1102|CS1103|CS1104",
+    "CS1102, CS1103 and CS1104": "CS1102&CS1103&CS1104",
+    "CS1102 and/or CS1103": "CS1102|CS1103",
+    "CS3201 (or equivalent)": "CS3201",
+    "MA1200 or MA1300; and CS1315": "CS1315&(MA1200|MA1300)",
+    "CS1102 CS1103": "CS1102&CS1103",
+    "Either CS1000 or CS2000, and CS3000": "(CS1000|CS2000)&CS3000",
+    "CS1000 and CS2000, or CS3000": "(CS1000&CS2000)|CS3000",
+    "CS1102, CS1103, or CS1104": "CS1102|CS1103|CS1104",
+    "CS1102, CS1103, and CS1104": "CS1102&CS1103&CS1104",
+    "HKDSE Mathematics Level 3": None,
+    "Nil": None,
+}
+
+SAMPLES = {
+    "course_CS2334.html": "CS1315|CS2311|CS2315",
+    "course_MA2510.html": "MA1201|MA1301|(MA1503&MA1508)",
+    "course_SDSC2001.html": "(CS1315|CS2311|CS2315|CS2360)&SDSC1001",
+}
+
+
+def random_expr(rnd, pool, depth=0):
+    if depth >= 2 or rnd.random() < 0.4:
+        return rnd.choice(pool)
+    op = rnd.choice(["&", "|"])
+    return (op, tuple(random_expr(rnd, pool, depth + 1) for _ in range(rnd.randint(2, 3))))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--students", type=int, default=2000)
+    ap.add_argument("--courses", type=int, default=500)
+    args = ap.parse_args()
+
+    data_dir = os.path.join(os.path.dirname(__file__), "..", "data")
+    for name, expected in SAMPLES.items():
+        with open(os.path.join(data_dir, name), "rb") as f:
+            html = f.read().decode("utf-8", "replace")
+        code = name[len("course_"):-len(".html")]
+        CASES[parse_course_page(code, "", html)["prerequisites"]] = expected
+    for text, expected in CASES.items():
+        expr = parse_prereq(text)
+        got = dumps(expr)
+        assert got == expected, f"{text!r}: {got!r} != {expected!r}"
+        assert loads(got) == expr, f"round trip failed for {got!r}"
+    print(f"parser: {len(CASES)} phrasings OK")
+
+    rnd = random.Random(5)
+    pool = [f"CS{1000 + i}" for i in range(200)]
+    exprs = [loads(dumps(random_expr(rnd, pool))) for _ in range(args.courses)]
+    students = [set(rnd.sample(pool, rnd.randint(20, 150))) for _ in range(args.students)]
+
+    listed = [codes(e) for e in exprs]
+    t0 = time.perf_counter()
+    old = [[all(c in done for c in cs) for cs in listed] for done in students]
+    t_old = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    direct = [[evaluate(e, done) for e in exprs] for done in students]
+    t_ast = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    bit_of = {code: i for i, code in enumerate(pool)}
+    masks = [compile_masks(e, bit_of) for e in exprs]
+    t_compile = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    fast = []
+    for done in students:
+        done_mask = 0
+        for c in done:
+            done_mask |= 1 << bit_of[c]
+        fast.append([satisfied(m, done_mask) for m in masks])
+    t_mask = time.perf_counter() - t0
+
+    assert fast == direct, "bitmask evaluation differs from AST evaluation"
+    n = args.students * args.courses
+    wrong = sum(o != d for row_o, row_d in zip(old, direct) for o, d in zip(row_o, row_d))
+    print(f"{n} checks: AST {t_ast:.3f} s, bitmask {t_mask:.3f} s (+{t_compile:.3f} s compile), "
+          f"all-required rule {t_old:.3f} s")
+    print(f"the old all-required rule gave a wrong answer for {wrong} of {n} checks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Check request pacing: token bucket, AIMD concurrency and Retry-After.
+
+Usage:
+    python scripts/check_ratelimit.py
+
+1. TokenBucket on a fake clock: the burst goes out at once, then one
+   request per 1/rate seconds; a pause holds every request until it ends.
+2. AdaptiveConcurrency: the limit halves on 429/5xx/errors and on a
+   latency jump, never leaves [minimum, maximum], and grows by one after
+   each window of healthy responses.
+3. retry_after_seconds parses delta-seconds and HTTP dates.
+4. A local server answers 429 with Retry-After (seconds, then an HTTP
+   date) before a 200: fetch_response and AsyncFetcher must wait at least
+   that long before retrying, with no limiter configured.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.scraper import ratelimit  # noqa: E402
+from core.scraper.async_fetch import AsyncFetcher  # noqa: E402
+from core.scraper.http import fetch_response  # noqa: E402
+from core.scraper.ratelimit import AdaptiveConcurrency, TokenBucket, configure_rate_limit, retry_after_seconds  # noqa: E402
+
+
+class FakeClock:
+    """Stands in for the ``time`` module inside ratelimit."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def check_bucket() -> None:
+    real, clock = ratelimit.time, FakeClock()
+    ratelimit.time = clock
+    try:
+        bucket = TokenBucket(rate=5, burst=3)
+        sent = []
+        for _ in range(13):
+            bucket.acquire()
+            sent.append(clock.now - 1000.0)
+        assert sent[:3] == [0.0, 0.0, 0.0], sent
+        gaps = [b - a for a, b in zip(sent[3:], sent[4:])]
+        assert abs(sent[3] - 0.2) < 1e-9 and all(abs(g - 0.2) < 1e-9 for g in gaps), sent
+        bucket.pause(5.0)
+        t0 = clock.now
+        bucket.acquire()
+        assert clock.now - t0 >= 5.0 - 1e-9, "pause not honoured"
+        clock.now += 10.0  # idle: refills to the burst, no more
+        t0 = clock.now
+        for _ in range(3):
+            bucket.acquire()
+        assert clock.now == t0
+        bucket.acquire()
+        assert abs(clock.now - t0 - 0.2) < 1e-9
+    finally:
+        ratelimit.time = real
+    print("token bucket: burst of 3 then one request per 0.2 s at 5/s; pause holds requests")
+
+
+def check_aimd() -> None:
+    ac = AdaptiveConcurrency(8, minimum=1, maximum=8)
+    seen = []
+    for status in (429, 503, None, 429, 429):
+        ac.acquire()
+        ac.release(status, 0.1)
+        seen.append(ac.limit)
+    assert seen == [4, 2, 1, 1, 1], seen
+    grown = []
+    while ac.limit < 8:
+        ac.acquire()
+        ac.release(200, 0.1)
+        grown.append(ac.limit)
+    # one more slot after each window of `limit` healthy responses: 1 + 2 + ... + 7
+    assert len(grown) == sum(range(1, 8)), len(grown)
+    for _ in range(50):
+        ac.acquire()
+        ac.release(200, 0.1)
+    assert ac.limit == 8, "limit went past maximum"
+    for _ in range(5):
+        ac.acquire()
+        ac.release(200, 2.0)
+    assert ac.limit < 8, "latency jump did not shrink the limit"
+    print(f"AIMD: 8 -> 4 -> 2 -> 1 on errors, back to 8 after {len(grown)} healthy responses, "
+          f"shrinks to {ac.limit} on slow responses")
+
+
+def check_parse() -> None:
+    assert retry_after_seconds(429, "3") == 3.0
+    assert retry_after_seconds(503, "3600") == ratelimit.MAX_RETRY_AFTER
+    assert retry_after_seconds(200, "3") is None
+    assert retry_after_seconds(429, "soon") is None
+    date = retry_after_seconds(429, formatdate(time.time() + 10, usegmt=True))
+    assert 8.5 <= date <= 10.0, date
+    assert retry_after_seconds(429, formatdate(time.time() - 10, usegmt=True)) == 0.0
+    print("Retry-After: delta-seconds and HTTP dates parsed, capped, past dates = 0")
+
+
+HITS = {}
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        n = HITS[self.path] = HITS.get(self.path, 0) + 1
+        if n == 1:
+            self.send_response(429)
+            if self.path.startswith("/seconds"):
+                self.send_header("Retry-After", "2")
+            else:
+                self.send_header("Retry-After", formatdate(time.time() + 3, usegmt=True))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+def check_retry_after() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    configure_rate_limit(None)
+
+    async def fetch_async(url):
+        async with AsyncFetcher(retries=2) as fetcher:
+            return await fetcher.fetch(url)
+
+    fetchers = (
+        ("fetch_response", lambda url: fetch_response(url, retries=2).text),
+        ("AsyncFetcher", lambda url: asyncio.run(fetch_async(url))),
+    )
+    try:
+        for name, fetch in fetchers:
+            # Backoff without Retry-After is 1 s on the first retry
+            for kind, least in (("seconds", 2.0), ("date", 1.9)):
+                t0 = time.perf_counter()
+                assert fetch(f"{base}/{kind}/{name}") == "ok"
+                elapsed = time.perf_counter() - t0
+                assert elapsed >= least, f"{name} retried after {elapsed:.2f} s despite Retry-After ({kind})"
+                print(f"{name}: 429 with Retry-After ({kind}) waited {elapsed:.2f} s before the retry")
+    finally:
+        server.shutdown()
+
+
+def main() -> None:
+    check_bucket()
+    check_aimd()
+    check_parse()
+    check_retry_after()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Check conditional revalidation of cached pages against a local server.
+
+Usage:
+    python scripts/check_revalidate.py
+
+Starts an http.server on a free port that serves pages with an ETag or a
+Last-Modified date and answers matching If-None-Match / If-Modified-Since
+with 304. For both cache backends (directory and single-file SQLite) and
+both fetchers (fetch_html_cached and AsyncFetcher.fetch_cached):
+
+- the first fetch is a plain 200 and is cached with its validators
+- a second fetch with revalidate sends the validators, gets a 304, is
+  served from the cache and counts as not_modified
+- a changed page comes back as 200 and replaces the cache entry
+- an entry past the cache TTL is still revalidated (304), not refetched
+- a 304 when nothing is cached raises instead of caching an empty body
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.scraper.async_fetch import AsyncFetcher  # noqa: E402
+from core.scraper.cache import configure_cache, maybe_read_cache, read_cache_meta  # noqa: E402
+from core.scraper.http import fetch_html_cached, get_pool_stats  # noqa: E402
+
+# path -> (body, version); bumping the version changes the validators
+INITIAL = {"/etag": ("<p>etag v1</p>", 1), "/dated": ("<p>dated v1</p>", 1)}
+PAGES = dict(INITIAL)
+LOG = []  # (path, conditional header sent, status answered)
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/always-304":
+            LOG.append((self.path, None, 304))
+            self.send_response(304)
+            self.end_headers()
+            return
+        body, version = PAGES[self.path]
+        if self.path == "/etag":
+            sent = self.headers.get("If-None-Match")
+            validator = ("ETag", f'"v{version}"')
+            fresh = sent == validator[1]
+        else:
+            sent = self.headers.get("If-Modified-Since")
+            validator = ("Last-Modified", formatdate(1_700_000_000 + version * 86400, usegmt=True))
+            fresh = sent == validator[1]
+        status = 304 if fresh else 200
+        LOG.append((self.path, sent, status))
+        self.send_response(status)
+        self.send_header(*validator)
+        if status == 200:
+            data = body.encode()
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        else:
+            self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def sync_fetch(url, cache_dir):
+    return fetch_html_cached(url, cache_dir, revalidate=True, retries=1)
+
+
+def async_fetch(url, cache_dir):
+    async def run():
+        async with AsyncFetcher(concurrency=2, retries=1) as fetcher:
+            return await fetcher.fetch_cached(url, cache_dir, revalidate=True)
+    return asyncio.run(run())
+
+
+def check(base, cache_dir, fetch, label):
+    PAGES.update(INITIAL)
+    for path in PAGES:
+        url = base + path
+
+        LOG.clear()
+        assert fetch(url, cache_dir) == PAGES[path][0]
+        assert LOG == [(path, None, 200)], LOG
+        assert maybe_read_cache(cache_dir, url) == PAGES[path][0], "first fetch not cached"
+        assert read_cache_meta(cache_dir, url).get("etag" if path == "/etag" else "last_modified")
+
+        LOG.clear()
+        before = get_pool_stats()["not_modified"]
+        assert fetch(url, cache_dir) == PAGES[path][0]
+        assert len(LOG) == 1 and LOG[0][1] and LOG[0][2] == 304, LOG
+        assert get_pool_stats()["not_modified"] == before + 1, "304 not counted"
+
+        PAGES[path] = (PAGES[path][0].replace("v1", "v2"), 2)
+        LOG.clear()
+        assert fetch(url, cache_dir) == PAGES[path][0], "changed page not returned"
+        assert LOG[0][2] == 200, LOG
+        assert maybe_read_cache(cache_dir, url) == PAGES[path][0], "changed page did not replace the entry"
+        LOG.clear()
+        assert fetch(url, cache_dir) == PAGES[path][0]
+        assert LOG[0][2] == 304, "validators of the changed page not stored"
+
+    url = base + "/always-304"
+    try:
+        fetch(url, cache_dir)
+    except requests.HTTPError:
+        pass
+    else:
+        raise AssertionError("304 without a cached copy was accepted")
+    assert maybe_read_cache(cache_dir, url) is None, "empty 304 body was cached"
+    print(f"{label}: 200 cached, 304 served from cache, changed page replaced, stray 304 rejected")
+
+
+def check_expired(base, cache_dir, fetch, label):
+    url = base + "/etag"
+    fetch(url, cache_dir)
+    time.sleep(0.3)
+    assert maybe_read_cache(cache_dir, url) is None, "entry should be past its TTL"
+    LOG.clear()
+    assert fetch(url, cache_dir) == PAGES["/etag"][0]
+    assert LOG[0][1] and LOG[0][2] == 304, f"expired entry fetched unconditionally: {LOG}"
+    print(f"{label}: entry past the TTL revalidated with a 304")
+
+
+def main() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for backend in ("dir", "pages.sqlite"):
+                for name, fetch in (("sync", sync_fetch), ("async", async_fetch)):
+                    label = f"{backend.split('.')[-1]} cache, {name}"
+                    configure_cache()
+                    check(base, os.path.join(tmp, f"{name}-{backend}"), fetch, label)
+                    configure_cache(ttl=0.2)
+                    check_expired(base, os.path.join(tmp, f"ttl-{name}-{backend}"), fetch, label)
+            configure_cache()
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()